@@ -0,0 +1,82 @@
+import datetime
+
+from crawler import (DEFAULT_DEPTH, DEFAULT_HOST_DELAY, DEFAULT_MAX_PAGES, DEFAULT_TIME_BUDGET,
+                     DEFAULT_WORKERS)
+from infocache import DEFAULT_TTL as INFO_TTL, configure_info_cache
+from integrity import DEFAULT_ALGORITHM, set_hash_algorithm
+from procpool import DEFAULT_PROCESSES, configure_process_pool
+from profiles import load_profile, set_active_profile
+from ratelimit import bandwidth_limiter
+from scancache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL, configure_scan_cache
+from scheduler import DEFAULT_MAX_CONCURRENT, DEFAULT_PER_HOST_LIMIT
+
+
+def open_settings():
+    """Open the settings store shared with the GUI, None when PyQt6 is missing.
+
+    Only QtCore is loaded, so this is safe in headless mode.
+    """
+    try:
+        from PyQt6.QtCore import QSettings
+    except ImportError:
+        return None
+    return QSettings('VideoDownloader', 'Settings')
+
+
+def parse_time(text, default):
+    try:
+        return datetime.datetime.strptime(text, '%H:%M').time()
+    except (TypeError, ValueError):
+        return datetime.datetime.strptime(default, '%H:%M').time()
+
+
+def queue_limits(settings):
+    """Return (max_concurrent, per_host_limit) from the settings"""
+    return (settings.value('max_concurrent_downloads', DEFAULT_MAX_CONCURRENT, type=int),
+            settings.value('max_downloads_per_host', DEFAULT_PER_HOST_LIMIT, type=int))
+
+
+def crawl_options(settings):
+    """Keyword arguments for SiteCrawler from the settings"""
+    return {
+        'max_depth': settings.value('crawl_depth', DEFAULT_DEPTH, type=int),
+        'max_pages': settings.value('crawl_max_pages', DEFAULT_MAX_PAGES, type=int),
+        'time_budget': settings.value('crawl_time_budget', DEFAULT_TIME_BUDGET, type=int),
+        'host_delay': settings.value('crawl_host_delay', DEFAULT_HOST_DELAY, type=float),
+        'workers': settings.value('crawl_workers', DEFAULT_WORKERS, type=int),
+        'follow_iframes': settings.value('crawl_follow_iframes', False, type=bool),
+    }
+
+
+def apply_transfer_settings(settings):
+    """Apply bandwidth limits, the download profile, checksums, the process pool and the caches"""
+    # Applies immediately to transfers that are already running
+    bandwidth_limiter.set_rate(settings.value('bandwidth_limit_kbps', 0, type=int) * 1024)
+    schedule = []
+    if settings.value('bandwidth_schedule_enabled', False, type=bool):
+        start = parse_time(settings.value('bandwidth_schedule_start', '09:00'), '09:00')
+        end = parse_time(settings.value('bandwidth_schedule_end', '18:00'), '18:00')
+        rate = settings.value('bandwidth_schedule_limit_kbps', 0, type=int) * 1024
+        schedule.append((start, end, rate))
+    bandwidth_limiter.set_schedule(schedule)
+
+    # Used by every yt-dlp call from here on, running jobs keep their profile
+    set_active_profile(load_profile(settings))
+
+    algorithm = settings.value('hash_algorithm', DEFAULT_ALGORITHM)
+    try:
+        set_hash_algorithm(None if algorithm == 'none' else algorithm)
+    except Exception as e:
+        print(f"Checksum setting ignored: {str(e)}")
+        set_hash_algorithm(DEFAULT_ALGORITHM)
+
+    configure_process_pool(settings.value('use_process_pool', False, type=bool),
+                           settings.value('process_pool_size', DEFAULT_PROCESSES, type=int))
+
+    configure_scan_cache(settings.value('scan_cache_enabled', True, type=bool),
+                         settings.value('scan_cache_ttl_minutes', DEFAULT_TTL // 60, type=int) * 60,
+                         settings.value('scan_cache_max_entries', DEFAULT_MAX_ENTRIES, type=int))
+
+    # Shared with downloads, so videos listed in the GUI are not extracted again
+    configure_info_cache(settings.value('info_cache_enabled', True, type=bool),
+                         settings.value('info_cache_ttl_minutes', INFO_TTL // 60, type=int) * 60)
@@ -0,0 +1,82 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from canonical import VideoUrlSet
+from crawler import PAGE_FAILED, PAGE_SCANNED, SiteCrawler
+from extractor import scan_url
+
+DEFAULT_BATCH_WORKERS = 4
+
+# Page state reported to on_page when a page starts, the end states are the crawler's
+PAGE_SCANNING = 'scanning'
+
+
+def parse_url_list(lines):
+    """The URLs of a pasted or imported list, skipping blanks, # comments and repeats"""
+    urls = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#') and line not in urls:
+            urls.append(line)
+    return urls
+
+
+class BatchScanner:
+    """Scan a list of pages for videos at the same time.
+
+    Up to workers pages are scanned at once. Videos are passed to on_found
+    as soon as any page finds them, each video once across all the pages,
+    and on_page(url, state, videos, error) reports every page starting and
+    finishing with the videos found on it. With crawl, each page is crawled
+    with those SiteCrawler options instead, on_crawled gets its pages.
+    """
+
+    def __init__(self, urls, workers=DEFAULT_BATCH_WORKERS, crawl=None, force=False,
+                 on_found=None, on_page=None, on_crawled=None):
+        self.urls = urls
+        self.workers = max(1, workers)
+        self.crawl = crawl
+        self.force = force
+        self.on_found = on_found
+        self.on_page = on_page
+        self.on_crawled = on_crawled
+        self.videos = VideoUrlSet()
+        self.video_urls = []
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def run(self):
+        """Scan every page and return every video found"""
+        with ThreadPoolExecutor(min(self.workers, len(self.urls) or 1)) as pool:
+            futures = [pool.submit(self.scan_page, url) for url in self.urls]
+            for future in as_completed(futures):
+                future.result()
+        return self.video_urls
+
+    def scan_page(self, url):
+        self.report_page(url, PAGE_SCANNING)
+        try:
+            if self.crawl is not None:
+                found = SiteCrawler(url, on_found=self.report_videos, on_page=self.on_crawled,
+                                    **self.crawl).run()
+            else:
+                found = scan_url(url, on_found=self.report_videos, force=self.force)
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            self.report_page(url, PAGE_FAILED, error=str(e))
+            return
+        # Cached and direct video results arrive here without on_found
+        self.report_videos(found)
+        self.report_page(url, PAGE_SCANNED, found)
+
+    def report_page(self, url, state, videos=(), error=None):
+        if self.on_page:
+            self.on_page(url, state, videos, error)
+
+    def report_videos(self, urls):
+        with self._lock:
+            urls = self.videos.add(urls)
+            self.video_urls.extend(urls)
+        if urls and self.on_found:
+            self.on_found(urls)
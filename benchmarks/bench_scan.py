@@ -0,0 +1,66 @@
+"""Time the per-pattern page scan against the single-pass UrlScanner.
+
+Builds a large generated page (plain markup, embeds and JSON blobs), runs
+both scans on it and checks they agree. That they return the same URLs on
+every page is tested in tests/test_urlscan.py, which also holds the old
+per-pattern scan.
+
+    python benchmarks/bench_scan.py --items 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+from test_urlscan import BASE_URL, legacy_scan  # noqa: E402
+from urlscan import UrlScanner  # noqa: E402
+
+
+def build_page(items):
+    parts = []
+    for i in range(items):
+        parts.append(f'<div class="item"><a href="/watch/{i}">Item {i}</a><p>Lorem ipsum {i}</p>')
+        parts.append(f'<img src="https://img.example.com/thumbs/{i}.jpg" alt="">')
+        if i % 50 == 0:
+            parts.append(f'<video src="https://edge{i}.example.cdn.net/v/{i}.mp4?t=1"></video>')
+            parts.append(f'<script>var c = {{"hls": "https://x.com/storage3/a{i}.m3u8", '
+                         f'"dl": \'https://x.com/download/{i}.webm\'}};</script>')
+        if i % 70 == 0:
+            parts.append(f'<iframe src="https://www.youtube.com/embed/id{i}"></iframe> '
+                         f'https://vimeo.com/{i}; https://youtu.be/s{i},')
+    return '\n'.join(parts)
+
+
+def timed(label, func, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<24} {best * 1000:8.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=20000, help="Items on the large page")
+    args = parser.parse_args()
+
+    scanner = UrlScanner()
+    page = build_page(args.items)
+    print(f"{len(page) / 1024 / 1024:.1f} MB page, {args.items} items")
+    expected = timed("legacy, per pattern", legacy_scan, page, BASE_URL)
+    found = timed("single pass", scanner.scan, page, BASE_URL)
+    if expected != found:
+        print("Large page results differ")
+        sys.exit(1)
+    print(f"{len(found)} video URLs, identical results")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Compare the direct download loop against the buffered reader/writer pipeline.
+
+Serves a generated file from a local HTTP server with range support and
+downloads it with the old 8 KiB iter_content loop and with SegmentedDownloader.
+
+    python benchmarks/bench_transfer.py --size 2048 --segments 1 4
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+import downloader  # noqa: E402
+from ratelimit import bandwidth_limiter  # noqa: E402
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    source_file = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_body(head=True)
+
+    def do_GET(self):
+        self.send_body()
+
+    def send_body(self, head=False):
+        size = os.path.getsize(self.source_file)
+        start, end = 0, size - 1
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else size - 1
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        if head:
+            return
+        with open(self.source_file, 'rb') as f:
+            try:
+                self.connection.sendfile(f, start, end - start + 1)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+
+def legacy_download(url, output_file):
+    """The loop DownloadWorker.download_direct used before the pipeline"""
+    response = requests.get(url, stream=True, timeout=60)
+    response.raise_for_status()
+    with open(output_file, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=8192):
+            if chunk:
+                f.write(chunk)
+
+
+def pipeline_download(url, output_file, segments, buffer_size, queue_depth):
+    downloader.SegmentedDownloader(
+        url, output_file,
+        session=requests.Session(),
+        segments=segments,
+        buffer_size=buffer_size,
+        queue_depth=queue_depth
+    ).download()
+
+
+def timed(label, size, func, *args):
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed:8.2f} s {size / elapsed / 1024 / 1024:10.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=2048, help="file size in MB")
+    parser.add_argument('--segments', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--buffer-size', type=int, default=downloader.BUFFER_SIZE // 1024,
+                        help="pipeline buffer size in KB")
+    parser.add_argument('--queue-depth', type=int, default=downloader.QUEUE_DEPTH)
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+
+    bandwidth_limiter.set_rate(0)
+    size = args.size * 1024 * 1024
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_file = os.path.join(temp_dir, 'source.bin')
+        with open(source_file, 'wb') as f:
+            block = os.urandom(1024 * 1024)
+            for _ in range(args.size):
+                f.write(block)
+
+        RangeHandler.source_file = source_file
+        server = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_address[1]}/source.bin'
+        output_file = os.path.join(temp_dir, 'output.bin')
+
+        print(f"{args.size} MB, buffer {args.buffer_size} KB, queue depth {args.queue_depth}")
+        if not args.skip_legacy:
+            timed("legacy 8 KiB loop", size, legacy_download, url, output_file)
+            os.remove(output_file)
+        for segments in args.segments:
+            timed(f"pipeline, {segments} segment(s)", size, pipeline_download, url, output_file,
+                  segments, args.buffer_size * 1024, args.queue_depth)
+            os.remove(output_file)
+
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Compare a new YoutubeDL per URL against pooled YoutubeDL instances.
+
+Serves small video files from a local HTTP server, runs extract_info on
+every URL both ways and prints the per-URL cost, with the cost of only
+building the instance for reference. No network access is needed.
+
+    python benchmarks/bench_ydl.py --urls 200
+"""
+import argparse
+import functools
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp  # noqa: E402
+
+from ydlpool import YoutubeDLPool  # noqa: E402
+
+OPTIONS = {'quiet': True, 'no_warnings': True, 'extract_flat': True}
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    # Keep-alive, as real video hosts do
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+
+class QuietServer(ThreadingHTTPServer):
+    # Clients dropping kept-alive connections are expected
+    def handle_error(self, request, client_address):
+        pass
+
+
+def serve(directory, files):
+    for number in range(files):
+        with open(os.path.join(directory, f'clip{number}.mp4'), 'wb') as f:
+            f.write(os.urandom(4096))
+    server = QuietServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/'
+
+
+def fresh_extract(urls):
+    for url in urls:
+        with yt_dlp.YoutubeDL(OPTIONS) as ydl:
+            ydl.extract_info(url, download=False)
+
+
+def pooled_extract(urls):
+    pool = YoutubeDLPool()
+    for url in urls:
+        ydl = pool.checkout(OPTIONS)
+        ydl.extract_info(url, download=False)
+        pool.checkin(ydl)
+    pool.close()
+
+
+def construct_only(urls):
+    for _ in urls:
+        yt_dlp.YoutubeDL(OPTIONS).close()
+
+
+def timed(label, func, urls, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(urls)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<24} {best * 1000 / len(urls):8.2f} ms per URL")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--urls', type=int, default=200, help="URLs extracted per run")
+    parser.add_argument('--files', type=int, default=20, help="Distinct files served")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        server, base = serve(directory, args.files)
+        urls = [f'{base}clip{number % args.files}.mp4?n={number}' for number in range(args.urls)]
+        try:
+            # Warm up imports and the extractor registry once
+            fresh_extract(urls[:2])
+            timed("construct only", construct_only, urls, args.repeat)
+            fresh = timed("new YoutubeDL per URL", fresh_extract, urls, args.repeat)
+            pooled = timed("pooled YoutubeDL", pooled_extract, urls, args.repeat)
+        finally:
+            server.shutdown()
+    print(f"{args.urls} URLs, pooled is {fresh / pooled:.1f}x faster")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+YOUTUBE_ID_PATTERNS = [
+    re.compile(r'(?:youtube\.com/watch\?v=|youtu\.be/)([^&\n?#]+)'),
+    re.compile(r'youtube.com/embed/([^&\n?#]+)'),
+]
+# A YouTube video id is 11 characters, anything else (playlists, channels) is no id
+YOUTUBE_ID = re.compile(r'[A-Za-z0-9_-]{11}')
+# Embed paths of the right length that are no video
+YOUTUBE_NOT_IDS = {'videoseries'}
+
+# (extractor, id patterns, canonical URL template) for the other platforms
+PLATFORM_RULES = [
+    ('Vimeo', [re.compile(r'(?:player\.)?vimeo\.com/(?:video/)?(\d+)')],
+     'https://vimeo.com/{}'),
+    ('Dailymotion', [re.compile(r'dailymotion\.com/(?:embed/)?video/([a-zA-Z0-9]+)'),
+                     re.compile(r'dai\.ly/([a-zA-Z0-9]+)')],
+     'https://www.dailymotion.com/video/{}'),
+]
+YOUTUBE_URL = 'https://www.youtube.com/watch?v={}'
+
+# Query parameters that never change the video a URL points to: tracking and expiry
+IGNORED_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'mc_cid', 'mc_eid', 'ref_src',
+    'expires', 'expire', 'exp', 'validfrom', 'validto',
+}
+IGNORED_PARAM_PREFIXES = ('utm_',)
+
+# (host suffixes, names, prefixes) of the signing parameters of CDNs whose
+# paths alone name the file. Elsewhere a token or signature can be what
+# picks the video, so it is kept.
+SIGNED_URL_PARAMS = [
+    (('cloudfront.net',), {'signature', 'policy', 'key-pair-id'}, ('x-amz-',)),
+    (('amazonaws.com',), set(), ('x-amz-',)),
+    (('storage.googleapis.com',), set(), ('x-goog-',)),
+    (('akamaihd.net', 'akamaized.net', 'akamai.net'), {'hdnts', 'hdnea'}, ()),
+    (('fbcdn.net', 'cdninstagram.com'), {'oh', 'oe'}, ('_nc_',)),
+]
+
+
+def canonical_url(url):
+    """Normalise a URL so trivially different spellings share one history entry"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or 'https'
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and (scheme, parts.port) not in (('http', 80), ('https', 443)):
+        host = f'{host}:{parts.port}'
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((scheme, host, path, parts.query, ''))
+
+
+def youtube_id(url):
+    """The video id of a watch, youtu.be or embed URL"""
+    for pattern in YOUTUBE_ID_PATTERNS:
+        match = pattern.search(url)
+        if match and YOUTUBE_ID.fullmatch(match.group(1)) and match.group(1) not in YOUTUBE_NOT_IDS:
+            return match.group(1)
+    return None
+
+
+def platform_video(url):
+    """(extractor, video id, canonical URL) for URLs of the known platforms"""
+    video_id = youtube_id(url)
+    if video_id:
+        return 'Youtube', video_id, YOUTUBE_URL.format(video_id)
+    for extractor, patterns, template in PLATFORM_RULES:
+        for pattern in patterns:
+            match = pattern.search(url)
+            if match:
+                return extractor, match.group(1), template.format(match.group(1))
+    return None
+
+
+def ignored_params(host):
+    """(names, prefixes) of the query parameters left out of host's video keys"""
+    names = set(IGNORED_PARAMS)
+    prefixes = IGNORED_PARAM_PREFIXES
+    for suffixes, signed_names, signed_prefixes in SIGNED_URL_PARAMS:
+        if any(host == suffix or host.endswith('.' + suffix) for suffix in suffixes):
+            names |= signed_names
+            prefixes += signed_prefixes
+    return names, prefixes
+
+
+def video_key(url):
+    """Key shared by every URL of the same video.
+
+    Platform URLs map to extractor:id, so watch, short and embed links of
+    one video collapse. Other URLs are normalised and lose the tracking
+    and expiry parameters, and the signature of known CDNs, sorting the
+    ones left.
+    """
+    video = platform_video(url)
+    if video:
+        return f'{video[0]}:{video[1]}'
+    parts = urlsplit(canonical_url(url))
+    names, prefixes = ignored_params(parts.hostname or '')
+    params = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                    if name.lower() not in names and not name.lower().startswith(prefixes))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(params), ''))
+
+
+def preferred_url(url):
+    """The URL a video is listed and downloaded as: the canonical platform URL
+    or the URL as it was found"""
+    video = platform_video(url)
+    return video[2] if video else url
+
+
+class VideoUrlSet:
+    """Videos found so far, one per video key"""
+
+    def __init__(self):
+        self.keys = set()
+
+    def add(self, urls):
+        """Return the URLs of videos not seen before, as preferred URLs"""
+        new = []
+        for url in urls:
+            key = video_key(url)
+            if key not in self.keys:
+                self.keys.add(key)
+                new.append(preferred_url(url))
+        return new
+
+    def __contains__(self, url):
+        return video_key(url) in self.keys
+
+    def __len__(self):
+        return len(self.keys)
@@ -0,0 +1,205 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urldefrag, urlsplit
+from urllib.robotparser import RobotFileParser
+
+from extractor import is_direct_video_url, scan_url
+from canonical import VideoUrlSet, canonical_url
+from pagescan import CHUNK_SIZE, PageScan
+from transport import get_session
+
+DEFAULT_DEPTH = 2
+DEFAULT_MAX_PAGES = 50
+# Seconds after which no new pages are fetched and running ones stop reading
+DEFAULT_TIME_BUDGET = 120
+# Seconds between two requests to the same host, robots.txt may ask for more
+DEFAULT_HOST_DELAY = 1.0
+DEFAULT_WORKERS = 4
+
+# Name matched against the User-agent lines of robots.txt
+ROBOTS_AGENT = 'VLoader'
+
+# Links to these are never pages worth fetching
+SKIPPED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.css', '.js',
+                      '.pdf', '.zip', '.rar', '.7z', '.gz', '.mp3', '.m4a', '.woff', '.woff2')
+
+# Page states reported to on_page
+PAGE_SCANNED = 'scanned'
+PAGE_SKIPPED = 'skipped'
+PAGE_BLOCKED = 'blocked'
+PAGE_FAILED = 'failed'
+
+
+def site_host(url):
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class SiteCrawler:
+    """Scan a page and the same-site pages it links to for videos.
+
+    Pages are fetched breadth first by a small thread pool, up to max_depth
+    links away from the start page, max_pages pages and time_budget
+    seconds. Every URL is fetched once, robots.txt is honoured and requests
+    to one host are spaced by host_delay seconds (or the robots.txt
+    Crawl-delay). Videos are passed to on_found as they are found.
+    """
+
+    def __init__(self, start_url, max_depth=DEFAULT_DEPTH, max_pages=DEFAULT_MAX_PAGES,
+                 time_budget=DEFAULT_TIME_BUDGET, host_delay=DEFAULT_HOST_DELAY,
+                 workers=DEFAULT_WORKERS, follow_iframes=False, on_found=None, on_page=None):
+        self.start_url = start_url
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.time_budget = time_budget
+        self.host_delay = host_delay
+        self.workers = max(1, workers)
+        self.follow_iframes = follow_iframes
+        self.on_found = on_found
+        self.on_page = on_page
+        self.site = site_host(start_url)
+        self.videos = VideoUrlSet()
+        self.video_urls = []
+        self.pages = 0
+        self.deadline = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._next_request = {}
+        self._robots = {}
+        self._robots_lock = threading.Lock()
+
+    def stop(self):
+        self._stop.set()
+
+    def stopped(self):
+        return self._stop.is_set() or (self.deadline is not None and time.monotonic() > self.deadline)
+
+    def run(self):
+        """Crawl and return every video found"""
+        # Video and Instagram URLs are not pages to crawl
+        if is_direct_video_url(self.start_url) or 'instagram.com' in self.start_url:
+            return scan_url(self.start_url, on_found=self.on_found)
+
+        self.deadline = time.monotonic() + self.time_budget
+        frontier = deque([(self.start_url, 0)])
+        seen = {canonical_url(self.start_url)}
+        running = {}
+        with ThreadPoolExecutor(self.workers) as pool:
+            while frontier or running:
+                while (frontier and len(running) < self.workers
+                       and self.pages < self.max_pages and not self.stopped()):
+                    url, depth = frontier.popleft()
+                    running[pool.submit(self.crawl_page, url)] = (url, depth)
+                    self.pages += 1
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, depth = running.pop(future)
+                    try:
+                        state, links = future.result()
+                    except Exception as e:
+                        self.report_page(url, depth, PAGE_FAILED, str(e))
+                        if depth == 0:
+                            raise Exception(f"Error crawling {url}: {str(e)}")
+                        print(f"Crawl of {url} failed: {str(e)}")
+                        continue
+                    self.report_page(url, depth, state)
+                    if depth >= self.max_depth:
+                        continue
+                    for link in links:
+                        key = canonical_url(link)
+                        if key not in seen:
+                            seen.add(key)
+                            frontier.append((link, depth + 1))
+        return self.video_urls
+
+    def report_page(self, url, depth, state, error=None):
+        if self.on_page:
+            self.on_page(url, depth, state, error)
+
+    def report_videos(self, urls):
+        with self._lock:
+            urls = self.videos.add(urls)
+            self.video_urls.extend(urls)
+        if urls and self.on_found:
+            self.on_found(urls)
+
+    def crawl_page(self, url):
+        """Scan one page, return its state and the links to crawl from it"""
+        if not self.allowed(url):
+            return PAGE_BLOCKED, []
+        self.wait_for_host(url)
+        if self.stopped():
+            return PAGE_SKIPPED, []
+
+        links = []
+        response = get_session().get(url, timeout=30, stream=True)
+        try:
+            response.raise_for_status()
+            if 'html' not in response.headers.get('Content-Type', 'text/html').lower():
+                return PAGE_SKIPPED, []
+            # Links are resolved against the page's final URL after redirects
+            scan = PageScan(response.url, response.encoding, self.report_videos,
+                            on_link=lambda tag, link: self.add_link(links, tag, link))
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if self.stopped():
+                    break
+                scan.feed(chunk)
+            scan.close()
+        finally:
+            response.close()
+        return PAGE_SCANNED, links
+
+    def add_link(self, links, tag, link):
+        if tag == 'iframe' and not self.follow_iframes:
+            return
+        link = urldefrag(link)[0]
+        parts = urlsplit(link)
+        if parts.scheme not in ('http', 'https') or site_host(link) != self.site:
+            return
+        if parts.path.lower().endswith(SKIPPED_EXTENSIONS) or is_direct_video_url(link):
+            return
+        links.append(link)
+
+    def wait_for_host(self, url):
+        """Sleep until the host may be sent the next request"""
+        host = urlsplit(url).netloc.lower()
+        delay = max(self.host_delay, self.crawl_delay(url))
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_request.get(host, now))
+            self._next_request[host] = start + delay
+        if self.deadline is not None:
+            start = min(start, self.deadline)
+        self._stop.wait(max(0, start - now))
+
+    def robots(self, url):
+        """The parsed robots.txt of the URL's host, fetched once per host"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._robots_lock:
+            if origin not in self._robots:
+                robots = RobotFileParser(f"{origin}/robots.txt")
+                try:
+                    response = get_session().get(robots.url, timeout=10)
+                    if response.status_code in (401, 403):
+                        robots.disallow_all = True
+                    elif response.status_code >= 400:
+                        robots.allow_all = True
+                    else:
+                        robots.parse(response.text.splitlines())
+                except Exception as e:
+                    print(f"Could not read {robots.url}: {str(e)}")
+                    robots.allow_all = True
+                self._robots[origin] = robots
+            return self._robots[origin]
+
+    def allowed(self, url):
+        return self.robots(url).can_fetch(ROBOTS_AGENT, url)
+
+    def crawl_delay(self, url):
+        return self.robots(url).crawl_delay(ROBOTS_AGENT) or 0
@@ -0,0 +1,451 @@
+import argparse
+import collections
+import ipaddress
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+import yt_dlp
+
+from appsettings import apply_transfer_settings, crawl_options, open_settings, queue_limits
+from crawler import SiteCrawler
+from extractor import scan_url
+from history import DownloadHistory
+from progress import ProgressAggregator
+from scheduler import DownloadScheduler, DEFAULT_MAX_CONCURRENT, DEFAULT_PER_HOST_LIMIT
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# Events kept for clients that reconnect with ?since=
+EVENT_BACKLOG = 1000
+# Seconds between progress events for running jobs
+PROGRESS_INTERVAL = 1.0
+# Seconds an idle event stream waits before sending a keep-alive line
+STREAM_KEEPALIVE = 15.0
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '[::1]')
+# Largest unused request body read off a kept-alive connection, larger ones close it
+MAX_DISCARD_BYTES = 1024 * 1024
+
+
+def is_loopback(host):
+    """Whether host only accepts connections from this machine"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host.strip('[]')).is_loopback
+    except ValueError:
+        return False
+
+
+def job_to_dict(job):
+    return {
+        'id': job.id,
+        'url': job.url,
+        'output_path': job.output_path,
+        'state': job.state,
+        'downloaded_bytes': job.downloaded_bytes,
+        'total_bytes': job.total_bytes,
+        'progress': job.progress,
+        'error': job.error,
+    }
+
+
+class EventBus:
+    """Numbered events with a bounded backlog that readers can wait on"""
+
+    def __init__(self, backlog=EVENT_BACKLOG):
+        self._events = collections.deque(maxlen=backlog)
+        self._next_id = 1
+        self._condition = threading.Condition()
+
+    def publish(self, event, **fields):
+        with self._condition:
+            self._events.append({'id': self._next_id, 'event': event,
+                                 'time': round(time.time(), 3), **fields})
+            self._next_id += 1
+            self._condition.notify_all()
+
+    def since(self, last_id, timeout=None):
+        """Return events after last_id, waiting up to timeout for new ones"""
+        with self._condition:
+            if timeout and self._next_id - 1 <= last_id:
+                self._condition.wait(timeout)
+            return [event for event in self._events if event['id'] > last_id]
+
+
+class DownloadService:
+    """Scan and download jobs behind the daemon's API, on the GUI's scheduler"""
+
+    def __init__(self, output_path, max_concurrent=DEFAULT_MAX_CONCURRENT,
+                 per_host_limit=DEFAULT_PER_HOST_LIMIT, history=None,
+                 progress_interval=PROGRESS_INTERVAL, crawl=None):
+        self.output_path = output_path
+        self.history = history
+        # SiteCrawler options for scans with crawl set
+        self.crawl = crawl or {}
+        self.events = EventBus()
+        self.scheduler = DownloadScheduler(max_concurrent, per_host_limit,
+                                           listener=self.job_changed, history=history)
+        self.progress_interval = progress_interval
+        self._stopped = threading.Event()
+        threading.Thread(target=self._sample_progress, daemon=True).start()
+
+    def job_changed(self, job):
+        self.events.publish('state', job=job_to_dict(job))
+
+    def scan(self, url, download=False, output_path=None, crawl=False, rescan=False):
+        if crawl:
+            crawler = SiteCrawler(url, on_page=self.page_crawled, **self.crawl)
+            videos = crawler.run()
+        else:
+            videos = scan_url(url, force=rescan)
+        known = self.history.known_urls(videos) if self.history is not None else set()
+        self.events.publish('scanned', url=url, videos=videos)
+        result = {'url': url, 'videos': videos, 'downloaded_before': sorted(known)}
+        if download:
+            result['jobs'] = self.download(videos, output_path)
+        return result
+
+    def page_crawled(self, url, depth, state, error):
+        self.events.publish('page', url=url, depth=depth, state=state, error=error)
+
+    def download(self, urls, output_path=None):
+        output_path = output_path or self.output_path
+        os.makedirs(output_path, exist_ok=True)
+        return [job_to_dict(self.scheduler.submit(url, output_path)) for url in urls]
+
+    def jobs(self):
+        return [job_to_dict(job) for job in self.scheduler.jobs()]
+
+    def job(self, job_id):
+        job = self.scheduler.get(job_id)
+        return job_to_dict(job) if job else None
+
+    def stop(self):
+        self._stopped.set()
+        self.scheduler.cancel_all()
+
+    def _sample_progress(self):
+        aggregator = ProgressAggregator()
+        while not self._stopped.wait(self.progress_interval):
+            for sample in aggregator.sample(self.scheduler.progress_counters()):
+                self.events.publish('progress', job=sample.key, downloaded=sample.downloaded,
+                                    total=sample.total, percent=round(sample.percent, 1),
+                                    speed=round(sample.speed),
+                                    eta=sample.eta and round(sample.eta))
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    """JSON API, see README for the routes"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'VLoaderDaemon/1.0'
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        print(f"daemon: {self.address_string()} {format % args}", file=sys.stderr)
+
+    def do_GET(self):
+        if not self._check_host():
+            return
+        parsed = urlparse(self.path)
+        parts = [part for part in parsed.path.split('/') if part]
+        query = parse_qs(parsed.query)
+
+        if parts == ['status']:
+            jobs = self.service.jobs()
+            counts = collections.Counter(job['state'] for job in jobs)
+            self._send_json(200, {'jobs': dict(counts), 'pid': os.getpid()})
+        elif parts == ['downloads']:
+            self._send_json(200, {'jobs': self.service.jobs()})
+        elif len(parts) == 2 and parts[0] == 'downloads' and parts[1].isdigit():
+            job = self.service.job(int(parts[1]))
+            if job:
+                self._send_json(200, job)
+            else:
+                self._send_error(404, "No such job")
+        elif parts == ['events']:
+            try:
+                since = int(query.get('since', ['0'])[0] or 0)
+            except ValueError:
+                self._send_error(400, "since must be an event id")
+                return
+            if query.get('stream', ['1'])[0] == '0':
+                self._send_json(200, {'events': self.service.events.since(since)})
+            else:
+                self._stream_events(since)
+        else:
+            self._send_error(404, "Unknown route")
+
+    def do_POST(self):
+        if not self._check_host():
+            return
+        body = self._read_json()
+        if body is None:
+            return
+        parts = [part for part in urlparse(self.path).path.split('/') if part]
+
+        try:
+            if parts == ['scan']:
+                if not body.get('url'):
+                    self._send_error(400, "url is required")
+                    return
+                self._send_json(200, self.service.scan(body['url'], bool(body.get('download')),
+                                                       body.get('output_path'),
+                                                       bool(body.get('crawl')),
+                                                       bool(body.get('rescan'))))
+            elif parts == ['downloads']:
+                urls = body.get('urls') or ([body['url']] if body.get('url') else [])
+                if not urls:
+                    self._send_error(400, "url or urls is required")
+                    return
+                self._send_json(201, {'jobs': self.service.download(urls, body.get('output_path'))})
+            elif (len(parts) == 3 and parts[0] == 'downloads' and parts[1].isdigit() and
+                  parts[2] in ('pause', 'resume', 'cancel')):
+                job_id = int(parts[1])
+                if not self.service.job(job_id):
+                    self._send_error(404, "No such job")
+                    return
+                getattr(self.service.scheduler, parts[2])(job_id)
+                self._send_json(200, self.service.job(job_id))
+            elif parts == ['shutdown']:
+                self._send_json(200, {'stopping': True})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                self._send_error(404, "Unknown route")
+        except Exception as e:
+            self._send_error(500, str(e))
+
+    def _check_host(self):
+        # Refuse requests addressed to other names, which guards against DNS rebinding
+        host = (self.headers.get('Host') or '').rsplit(':', 1)[0]
+        if host not in LOCAL_HOSTS and host != self.server.server_address[0]:
+            self._discard_body()
+            self._send_error(403, "Only local requests are accepted")
+            return False
+        return True
+
+    def _discard_body(self):
+        """Skip the body of a rejected request, so the next request on the
+        connection starts where it should"""
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if self.headers.get('Transfer-Encoding') or not 0 <= length <= MAX_DISCARD_BYTES:
+            self.close_connection = True
+        elif length:
+            self.rfile.read(length)
+
+    def _read_json(self):
+        # Browsers cannot send application/json cross-site without a preflight we never answer
+        if self.headers.get('Content-Type', '').split(';')[0].strip() != 'application/json':
+            self._discard_body()
+            self._send_error(415, "Content-Type must be application/json")
+            return None
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            self.close_connection = True
+            self._send_error(400, "Invalid Content-Length")
+            return None
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_error(400, "Invalid JSON")
+            return None
+        if not isinstance(body, dict):
+            self._send_error(400, "Expected a JSON object")
+            return None
+        return body
+
+    def _send_json(self, status, data):
+        payload = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_error(self, status, message):
+        self._send_json(status, {'error': message})
+
+    def _stream_events(self, since):
+        """Send events as JSON lines until the client goes away"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            while not self.server.stopping:
+                events = self.service.events.since(since, timeout=STREAM_KEEPALIVE)
+                lines = [json.dumps(event) for event in events] or ['{}']
+                if events:
+                    since = events[-1]['id']
+                self._write_chunk(('\n'.join(lines) + '\n').encode('utf-8'))
+            self._write_chunk(b'')
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.close_connection = True
+
+    def _write_chunk(self, data):
+        self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+
+class DaemonServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.service = service
+        self.stopping = False
+        super().__init__((host, port), DaemonRequestHandler)
+
+    def serve_until_shutdown(self):
+        try:
+            self.serve_forever()
+        finally:
+            self.stopping = True
+            self.service.stop()
+            self.server_close()
+
+
+class DaemonClient:
+    """Minimal client for the daemon API, also handy as a stand-in in scripts"""
+
+    def __init__(self, base_url=f'http://{DEFAULT_HOST}:{DEFAULT_PORT}', timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _request(self, method, path, data=None):
+        response = self.session.request(method, self.base_url + path, json=data,
+                                        timeout=self.timeout)
+        result = response.json()
+        if not response.ok:
+            raise Exception(f"Daemon error ({response.status_code}): {result.get('error')}")
+        return result
+
+    def status(self):
+        return self._request('GET', '/status')
+
+    def scan(self, url, download=False, output_path=None, crawl=False, rescan=False):
+        return self._request('POST', '/scan', {'url': url, 'download': download,
+                                               'output_path': output_path, 'crawl': crawl,
+                                               'rescan': rescan})
+
+    def download(self, urls, output_path=None):
+        if isinstance(urls, str):
+            urls = [urls]
+        return self._request('POST', '/downloads', {'urls': urls,
+                                                    'output_path': output_path})['jobs']
+
+    def jobs(self):
+        return self._request('GET', '/downloads')['jobs']
+
+    def job(self, job_id):
+        return self._request('GET', f'/downloads/{job_id}')
+
+    def pause(self, job_id):
+        return self._request('POST', f'/downloads/{job_id}/pause', {})
+
+    def resume(self, job_id):
+        return self._request('POST', f'/downloads/{job_id}/resume', {})
+
+    def cancel(self, job_id):
+        return self._request('POST', f'/downloads/{job_id}/cancel', {})
+
+    def shutdown(self):
+        return self._request('POST', '/shutdown', {})
+
+    def events(self, since=0):
+        """Yield events as they happen, keep-alive lines are skipped"""
+        with self.session.get(f'{self.base_url}/events', params={'since': since},
+                              stream=True, timeout=(self.timeout, None)) as response:
+            response.raise_for_status()
+            try:
+                for line in response.iter_lines():
+                    if line:
+                        event = json.loads(line)
+                        if event:
+                            yield event
+            except requests.exceptions.ChunkedEncodingError:
+                # The daemon shut down while we were listening
+                return
+
+
+def warm_up():
+    """Load yt-dlp's extractors once so the first request does not pay for it"""
+    try:
+        list(yt_dlp.extractor.gen_extractor_classes())
+    except Exception as e:
+        print(f"Extractor warm-up failed: {str(e)}", file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='main.py --daemon',
+                                     description="Serve a local JSON API for scans and downloads.")
+    parser.add_argument('--daemon', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help="Loopback address to listen on (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help="Port to listen on (default: %(default)s)")
+    parser.add_argument('-o', '--output', help="Default output directory")
+    parser.add_argument('-j', '--jobs', type=int, help="Simultaneous downloads")
+    parser.add_argument('--no-settings', action='store_true',
+                        help="Ignore the settings saved by the GUI")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not is_loopback(args.host):
+        # There is no authentication, anyone who can connect could write files anywhere
+        print(f"Refusing to listen on {args.host}, only loopback addresses are allowed",
+              file=sys.stderr)
+        return 1
+
+    settings = None if args.no_settings else open_settings()
+    max_concurrent, per_host_limit = DEFAULT_MAX_CONCURRENT, DEFAULT_PER_HOST_LIMIT
+    output_path = args.output
+    crawl = None
+    if settings is not None:
+        apply_transfer_settings(settings)
+        max_concurrent, per_host_limit = queue_limits(settings)
+        output_path = output_path or settings.value('default_output_path', '')
+        crawl = crawl_options(settings)
+    if args.jobs:
+        max_concurrent = args.jobs
+
+    try:
+        history = DownloadHistory()
+    except Exception as e:
+        print(f"Download history unavailable: {str(e)}", file=sys.stderr)
+        history = None
+
+    service = DownloadService(output_path or os.getcwd(), max_concurrent, per_host_limit,
+                              history=history, crawl=crawl)
+    try:
+        server = DaemonServer(service, args.host, args.port)
+    except OSError as e:
+        print(f"Could not listen on {args.host}:{args.port}: {str(e)}", file=sys.stderr)
+        return 1
+
+    warm_up()
+    print(f"VLoader daemon listening on http://{args.host}:{server.server_address[1]}",
+          file=sys.stderr)
+    try:
+        server.serve_until_shutdown()
+    except KeyboardInterrupt:
+        pass
+    return 0
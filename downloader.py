@@ -0,0 +1,862 @@
+import json
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+import yt_dlp
+
+from hls import HLSDownloader, is_hls_url
+from infocache import forget_info, get_cached_info
+from integrity import (StreamHasher, format_digest, hash_algorithm, server_digests, verify,
+                       write_checksum_file)
+from procpool import get_process_pool, picklable_options
+from profiles import active_profile, ydl_download_options
+from ratelimit import bandwidth_limiter
+from transport import get_session
+from ydlpool import pooled_ydl
+
+# Number of parallel range requests used for a single file
+DEFAULT_SEGMENTS = 4
+# Files smaller than two segments of this size are fetched in one stream
+MIN_SEGMENT_SIZE = 1024 * 1024
+# Network reads go straight into reusable buffers of this size
+BUFFER_SIZE = 1024 * 1024
+# Filled buffers waiting for the disk writer, bounds memory to about
+# (QUEUE_DEPTH + segments) * BUFFER_SIZE per download
+QUEUE_DEPTH = 8
+SEGMENT_RETRIES = 3
+# How often the progress journal is written to disk while downloading
+JOURNAL_INTERVAL = 1.0
+# Usual names of HLS playlists, which say nothing about the video
+HLS_PLAYLIST_NAMES = ('index', 'master', 'playlist', 'prog_index', 'chunklist', 'manifest',
+                      'media', 'main', 'stream', 'video')
+
+
+# Output paths, without extension, held by running downloads
+_reserved_paths = set()
+_reserved_lock = threading.Lock()
+
+
+class DownloadCancelled(yt_dlp.utils.DownloadCancelled):
+    """Raised inside a download when its job was paused or cancelled"""
+
+
+def reserve_output(directory, name, extensions, resumable=None):
+    """Pick and hold an output path in directory, so no two jobs share a file.
+
+    Tries "<name>", "<name> (2)", ... and takes the first path no running
+    download holds and for which no "<path><ext>" exists for any of
+    extensions. A leftover "<path><ext>.part" also makes a path taken,
+    unless resumable(path + ext) says this download continues it. Returns
+    the path without extension, give it back with release_output.
+    """
+    stem = os.path.abspath(os.path.join(directory, name))
+    number = 1
+    with _reserved_lock:
+        while True:
+            path = stem if number == 1 else f'{stem} ({number})'
+            if path not in _reserved_paths and not any(
+                    _output_taken(path + extension, resumable) for extension in extensions):
+                _reserved_paths.add(path)
+                return path
+            number += 1
+
+
+def _output_taken(file_path, resumable):
+    if os.path.exists(file_path):
+        return True
+    return os.path.exists(file_path + '.part') and not (resumable and resumable(file_path))
+
+
+def release_output(path):
+    with _reserved_lock:
+        _reserved_paths.discard(path)
+
+
+class DiskWriter:
+    """Write filled buffers to a file on a dedicated thread.
+
+    Readers take a buffer from a fixed pool, fill it from the network and
+    queue it with its file offset. The bounded queue and the pool keep memory
+    flat and slow readers down when the disk falls behind. When a hasher is
+    given it sees every buffer right after it was written.
+    """
+
+    def __init__(self, path, mode='r+b', buffer_size=BUFFER_SIZE, buffer_count=QUEUE_DEPTH,
+                 queue_depth=QUEUE_DEPTH, on_written=None, hasher=None):
+        # Unbuffered, the buffers are already large
+        self._file = open(path, mode, buffering=0)
+        self._free = queue.Queue()
+        for _ in range(buffer_count):
+            self._free.put(bytearray(buffer_size))
+        self._queue = queue.Queue(maxsize=queue_depth)
+        self.on_written = on_written
+        self.hasher = hasher
+        self.error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def acquire(self):
+        self._check_error()
+        return self._free.get()
+
+    def release(self, buffer):
+        self._free.put(buffer)
+
+    def write(self, offset, buffer, length):
+        """Queue length bytes of buffer for offset, the buffer returns to the pool once written"""
+        self._check_error()
+        self._queue.put((offset, buffer, length))
+
+    def close(self):
+        """Wait for queued buffers to reach the file, then close it"""
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        self._check_error()
+
+    def _check_error(self):
+        if self.error is not None:
+            raise Exception(f"Writing to disk failed: {str(self.error)}")
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            offset, buffer, length = item
+            try:
+                if self.error is None:
+                    view = memoryview(buffer)[:length]
+                    self._file.seek(offset)
+                    remaining = view
+                    while remaining:
+                        written = self._file.write(remaining)
+                        remaining = remaining[written:]
+                    if self.hasher:
+                        self.hasher.update(offset, view)
+                    if self.on_written:
+                        self.on_written(offset, length)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.release(buffer)
+
+
+class DownloadJournal:
+    """Completed byte ranges of a .part file, persisted next to it.
+
+    The journal also stores the validator (ETag/Last-Modified) and size of
+    the remote file so a resumed download never mixes two versions.
+    """
+
+    def __init__(self, path, url='', total_size=0, etag=None, last_modified=None):
+        self.path = path
+        self.url = url
+        self.total_size = total_size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.ranges = []
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            journal = cls(path, data.get('url', ''), data.get('total_size', 0),
+                          data.get('etag'), data.get('last_modified'))
+            journal.ranges = [tuple(r) for r in data.get('ranges', [])]
+            return journal
+        except (OSError, ValueError):
+            return None
+
+    def matches(self, url, total_size, etag, last_modified):
+        """Check that the remote file is still the one we started downloading"""
+        if self.url != url or self.total_size != total_size:
+            return False
+        if self.etag or etag:
+            return self.etag == etag
+        if self.last_modified or last_modified:
+            return self.last_modified == last_modified
+        return True
+
+    def add_range(self, start, end):
+        """Mark the inclusive byte range start-end as written"""
+        if end < start:
+            return
+        with self._lock:
+            merged = []
+            for r_start, r_end in sorted(self.ranges + [(start, end)]):
+                if merged and r_start <= merged[-1][1] + 1:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], r_end))
+                else:
+                    merged.append((r_start, r_end))
+            self.ranges = merged
+
+    def completed_bytes(self):
+        with self._lock:
+            return sum(end - start + 1 for start, end in self.ranges)
+
+    def missing_ranges(self):
+        """Return the inclusive byte ranges that still have to be fetched"""
+        with self._lock:
+            missing = []
+            position = 0
+            for start, end in self.ranges:
+                if start > position:
+                    missing.append((position, start - 1))
+                position = max(position, end + 1)
+            if position < self.total_size:
+                missing.append((position, self.total_size - 1))
+            return missing
+
+    def save(self):
+        with self._lock:
+            data = {
+                'url': self.url,
+                'total_size': self.total_size,
+                'etag': self.etag,
+                'last_modified': self.last_modified,
+                'ranges': self.ranges,
+            }
+        # Write to a temporary file first so a crash never leaves a torn journal
+        with self._save_lock:
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+
+    def remove(self):
+        for path in (self.path, self.path + '.tmp'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class SegmentedDownloader:
+    """Download a file over several concurrent HTTP range requests.
+
+    Data is written to "<output>.part" with a journal of completed ranges in
+    "<output>.part.json", so an interrupted download resumes where it
+    stopped. Falls back to a single stream when the server does not support
+    ranges or does not report a content length.
+
+    Segment readers fill large reusable buffers with readinto() and hand
+    them to a single DiskWriter thread, so network reads never wait on disk
+    writes. With hash_algorithm set the file is hashed as it is written,
+    checked against the size and any digest the server announced, and the
+    digest is stored next to it in "<output>.<algorithm>".
+    """
+
+    def __init__(self, url, output_file, session=None, headers=None,
+                 segments=DEFAULT_SEGMENTS, min_segment_size=MIN_SEGMENT_SIZE,
+                 buffer_size=BUFFER_SIZE, queue_depth=QUEUE_DEPTH, progress_callback=None,
+                 timeout=60, cancel_event=None, throttle=None, hash_algorithm=None):
+        self.url = url
+        self.output_file = output_file
+        self.part_file = output_file + '.part'
+        self.journal_file = self.part_file + '.json'
+        self.session = session or get_session()
+        self.headers = dict(headers or {})
+        self.segments = max(1, segments)
+        self.min_segment_size = min_segment_size
+        self.buffer_size = buffer_size
+        self.queue_depth = queue_depth
+        self.progress_callback = progress_callback
+        self.timeout = timeout
+        self.cancel_event = cancel_event
+        # Every chunk is paid for with bandwidth tokens, by default from the global limiter
+        self.throttle = throttle or (
+            lambda amount: bandwidth_limiter.throttle(amount, cancel_event=self.cancel_event))
+
+        self.total_size = 0
+        self.downloaded = 0
+        self.etag = None
+        self.last_modified = None
+        self.journal = None
+        self.hash_algorithm = hash_algorithm
+        self.hasher = None
+        self.digest = None
+        self.expected_size = None
+        self.expected_digests = {}
+        self._last_journal_save = 0
+        self._lock = threading.Lock()
+
+    def download(self):
+        total_size, supports_ranges = self.probe()
+        self.total_size = total_size
+
+        if self.hash_algorithm:
+            self.hasher = StreamHasher(self.hash_algorithm, self.part_file)
+
+        if supports_ranges and total_size:
+            self.expected_size = total_size
+            self._download_ranges()
+        else:
+            self._download_single()
+
+        self._verify()
+        os.replace(self.part_file, self.output_file)
+        if self.journal:
+            self.journal.remove()
+        if self.hasher:
+            write_checksum_file(self.output_file, self.hash_algorithm, self.hasher.hexdigest())
+        return self.output_file
+
+    def _verify(self):
+        """Check the finished .part file against the size and digest the server announced"""
+        hexdigest = self.hasher.hexdigest() if self.hasher else None
+        try:
+            verify(self.output_file, hexdigest, self.hash_algorithm, self.downloaded,
+                   self.expected_size, self.expected_digests)
+        except Exception:
+            # Corrupt data must not be resumed from
+            self.discard()
+            raise
+        if hexdigest:
+            self.digest = format_digest(self.hash_algorithm, hexdigest)
+
+    @staticmethod
+    def can_resume(output_file, url):
+        """Whether the .part file of output_file was started for url"""
+        journal = DownloadJournal.load(output_file + '.part.json')
+        return journal is not None and journal.url == url
+
+    def discard(self):
+        """Remove the partial file and journal of an abandoned download"""
+        for path in (self.part_file, self.journal_file, self.journal_file + '.tmp'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def probe(self):
+        """Return (content_length, supports_ranges) for the URL"""
+        headers = self._request_headers()
+        total_size = 0
+        supports_ranges = False
+
+        try:
+            response = self.session.head(self.url, headers=headers,
+                                         allow_redirects=True, timeout=self.timeout)
+            if response.ok:
+                total_size = int(response.headers.get('content-length', 0) or 0)
+                supports_ranges = response.headers.get('accept-ranges', '').lower() == 'bytes'
+                self._store_validator(response)
+        except requests.exceptions.RequestException:
+            pass
+
+        if not supports_ranges or not total_size:
+            # Some servers do not answer HEAD properly, ask for the first byte instead
+            headers['Range'] = 'bytes=0-0'
+            try:
+                response = self.session.get(self.url, headers=headers, stream=True,
+                                            timeout=self.timeout)
+                with response:
+                    content_range = response.headers.get('content-range', '')
+                    if response.status_code == 206 and '/' in content_range:
+                        size = content_range.rsplit('/', 1)[1]
+                        if size.isdigit():
+                            total_size = int(size)
+                            supports_ranges = True
+                            self._store_validator(response)
+            except requests.exceptions.RequestException:
+                pass
+
+        return total_size, supports_ranges
+
+    @staticmethod
+    def split_ranges(total_size, segments, min_segment_size):
+        """Split total_size bytes into inclusive (start, end) byte ranges"""
+        count = max(1, min(segments, total_size // max(1, min_segment_size)))
+        segment_size = total_size // count
+        ranges = []
+        for i in range(count):
+            start = i * segment_size
+            end = total_size - 1 if i == count - 1 else start + segment_size - 1
+            ranges.append((start, end))
+        return ranges
+
+    def _store_validator(self, response):
+        etag = response.headers.get('etag')
+        # Weak validators cannot be used with If-Range
+        self.etag = etag if etag and not etag.startswith('W/') else None
+        self.last_modified = response.headers.get('last-modified')
+        self.expected_digests.update(server_digests(response.headers))
+
+    def _request_headers(self):
+        headers = dict(self.headers)
+        # Byte offsets only line up with the file when the body is not re-encoded
+        headers['Accept-Encoding'] = 'identity'
+        return headers
+
+    def _check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise DownloadCancelled("Download stopped")
+
+    def _report(self, length):
+        self.throttle(length)
+        self._check_cancelled()
+        with self._lock:
+            self.downloaded += length
+            downloaded = self.downloaded
+            save_journal = (self.journal is not None and
+                            time.monotonic() - self._last_journal_save >= JOURNAL_INTERVAL)
+            if save_journal:
+                self._last_journal_save = time.monotonic()
+        if save_journal:
+            self.journal.save()
+        if self.progress_callback:
+            self.progress_callback(downloaded, self.total_size)
+
+    def _open_journal(self):
+        journal = DownloadJournal.load(self.journal_file)
+        if (journal and os.path.exists(self.part_file) and
+                os.path.getsize(self.part_file) == self.total_size and
+                journal.matches(self.url, self.total_size, self.etag, self.last_modified)):
+            print(f"Resuming download: {journal.completed_bytes()} of {self.total_size} bytes present")
+            return journal
+
+        # Nothing usable to resume from, start a fresh pre-allocated .part file
+        journal = DownloadJournal(self.journal_file, self.url, self.total_size,
+                                  self.etag, self.last_modified)
+        with open(self.part_file, 'wb') as f:
+            f.truncate(self.total_size)
+        journal.save()
+        return journal
+
+    def _download_ranges(self):
+        self.journal = self._open_journal()
+        self.downloaded = self.journal.completed_bytes()
+
+        pieces = []
+        for start, end in self.journal.missing_ranges():
+            for piece_start, piece_end in self.split_ranges(end - start + 1, self.segments,
+                                                            self.min_segment_size):
+                pieces.append((start + piece_start, start + piece_end))
+
+        if len(pieces) > 1:
+            print(f"Segmented download: {len(pieces)} segments, {self.total_size} bytes")
+
+        if self.hasher:
+            # Ranges from an earlier run are hashed from the file once
+            for start, end in self.journal.ranges:
+                self.hasher.add_existing(start, end)
+
+        self._check_cancelled()
+        if pieces:
+            workers = min(self.segments, len(pieces))
+            # The journal only records ranges once the writer has put them in the file
+            writer = DiskWriter(self.part_file, buffer_size=self.buffer_size,
+                                buffer_count=self.queue_depth + workers,
+                                queue_depth=self.queue_depth,
+                                on_written=lambda offset, length: self.journal.add_range(
+                                    offset, offset + length - 1),
+                                hasher=self.hasher)
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(self._download_segment, writer, start, end)
+                               for start, end in pieces]
+                    for future in futures:
+                        future.result()
+            finally:
+                writer.close()
+                self.journal.save()
+
+        if self.journal.missing_ranges():
+            raise Exception("Download incomplete, missing byte ranges remain")
+
+    def _download_segment(self, writer, start, end):
+        position = start
+        attempt = 0
+        while position <= end:
+            headers = self._request_headers()
+            headers['Range'] = f'bytes={position}-{end}'
+            # Make the server send the full file instead of a range if it changed
+            if self.etag or self.last_modified:
+                headers['If-Range'] = self.etag or self.last_modified
+            try:
+                response = self.session.get(self.url, headers=headers, stream=True,
+                                            timeout=self.timeout)
+                with response:
+                    if response.status_code != 206:
+                        raise Exception(f"Server ignored range request (HTTP {response.status_code})")
+                    if self._is_encoded(response):
+                        raise Exception("Server sent an encoded range")
+                    position = self._read_into(response, writer, position, end)
+                if position <= end:
+                    raise Exception("Connection closed before segment was complete")
+            except DownloadCancelled:
+                raise
+            except Exception as e:
+                attempt += 1
+                if attempt > SEGMENT_RETRIES:
+                    raise Exception(f"Segment {start}-{end} failed: {str(e)}")
+                print(f"Retrying segment {start}-{end} at byte {position}: {str(e)}")
+
+    @staticmethod
+    def _is_encoded(response):
+        return response.headers.get('content-encoding', 'identity').lower() not in ('', 'identity')
+
+    def _read_into(self, response, writer, position, end=None):
+        """Read the body into pooled buffers and queue them for writing.
+
+        Returns the file position after the last byte read. Reads stop after
+        byte end when it is given, otherwise at the end of the body.
+        """
+        raw = response.raw
+        while end is None or position <= end:
+            buffer = writer.acquire()
+            view = memoryview(buffer)
+            limit = len(buffer) if end is None else min(len(buffer), end - position + 1)
+            filled = 0
+            try:
+                while filled < limit:
+                    count = raw.readinto(view[filled:limit])
+                    if not count:
+                        break
+                    filled += count
+            except BaseException:
+                view.release()
+                writer.release(buffer)
+                raise
+            view.release()
+
+            if not filled:
+                writer.release(buffer)
+                break
+            writer.write(position, buffer, filled)
+            position += filled
+            self._report(filled)
+            if filled < limit:
+                break
+        return position
+
+    def _download_single(self):
+        # Without range support there is nothing to resume from
+        response = self.session.get(self.url, headers=self._request_headers(), stream=True,
+                                    timeout=self.timeout)
+
+        with response:
+            # Inside the block, so an error status still returns the connection to the pool
+            response.raise_for_status()
+            if not self.total_size:
+                self.total_size = int(response.headers.get('content-length', 0) or 0)
+            self.expected_digests.update(server_digests(response.headers))
+
+            if self._is_encoded(response):
+                # The server compressed the body anyway, let requests decode it
+                with open(self.part_file, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=self.buffer_size):
+                        if chunk:
+                            f.write(chunk)
+                            if self.hasher:
+                                self.hasher.update(self.downloaded, chunk)
+                            self._report(len(chunk))
+                return
+
+            # Content-Length counts the bytes on the wire, which here are the file bytes
+            self.expected_size = int(response.headers.get('content-length', 0) or 0) or None
+            writer = DiskWriter(self.part_file, mode='wb', buffer_size=self.buffer_size,
+                                buffer_count=self.queue_depth + 1, queue_depth=self.queue_depth,
+                                hasher=self.hasher)
+            try:
+                self._read_into(response, writer, 0)
+            finally:
+                writer.close()
+
+
+class DownloadTask:
+    """Download one video with yt-dlp, falling back to a direct HTTP download.
+
+    Progress is reported as progress_callback(downloaded, total_size) byte
+    counts, with a total of 0 when the size is unknown. Setting cancel_event stops the download with
+    DownloadCancelled, leaving partial files in place so it can resume.
+    Traffic is throttled by the global bandwidth limiter and, when given, by
+    the job's own rate_bucket. Network tuning comes from the download profile,
+    the active one unless profile is given. Every file written is listed in
+    results once the download finishes.
+    """
+
+    def __init__(self, url, output_path, progress_callback=None, cancel_event=None,
+                 rate_bucket=None, profile=None):
+        self.url = url
+        self.output_path = output_path
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+        self.rate_bucket = rate_bucket
+        self.profile = profile or active_profile()
+        self.hash_algorithm = hash_algorithm()
+        self.direct_downloader = None
+        self.hls_downloader = None
+        self.hook_file = None
+        self.hook_bytes = 0
+        self.results = []
+
+        # Shared pooled session, connections are reused across jobs
+        self.session = get_session()
+
+    def report_progress(self, downloaded, total_size):
+        if self.progress_callback:
+            self.progress_callback(downloaded, total_size)
+
+    def check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise DownloadCancelled("Download stopped")
+
+    def throttle(self, amount):
+        bandwidth_limiter.throttle(amount, self.rate_bucket, self.cancel_event)
+
+    def throttle_hook(self, d):
+        """Throttle yt-dlp by blocking its progress hook for the bytes it just read"""
+        downloaded = d.get('downloaded_bytes') or 0
+        if d.get('filename') != self.hook_file or downloaded < self.hook_bytes:
+            self.hook_file = d.get('filename')
+            self.hook_bytes = 0
+        if downloaded > self.hook_bytes:
+            self.throttle(downloaded - self.hook_bytes)
+            self.hook_bytes = downloaded
+
+    def progress_hook(self, d):
+        # Raising here is how yt-dlp lets us abort a running download
+        self.check_cancelled()
+
+        if d['status'] == 'downloading':
+            self.throttle_hook(d)
+            # Only record byte counters, progress is sampled by whoever displays it
+            total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+            self.report_progress(d.get('downloaded_bytes') or 0, total)
+
+        elif d['status'] == 'finished':
+            total = d.get('total_bytes') or d.get('downloaded_bytes') or 0
+            self.report_progress(total, total)
+            info = d.get('info_dict') or {}
+            self.add_result(d.get('filename'), total, info.get('extractor_key'),
+                            info.get('id'), info.get('title'))
+
+    def process_progress(self, d):
+        """Progress sent back by a worker process running yt-dlp"""
+        if d['status'] == 'downloading':
+            total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+            self.report_progress(d.get('downloaded_bytes') or 0, total)
+        elif d['status'] == 'finished':
+            self.report_progress(d['total_bytes'], d['total_bytes'])
+
+    def download_ytdlp(self, ydl_opts):
+        """Download with yt-dlp, from the cached info dict when there is one.
+
+        That skips a second extraction of a video that was already listed.
+        Info whose format URLs stopped working is dropped and the video is
+        extracted again.
+        """
+        info = get_cached_info(self.url)
+        if info is not None:
+            try:
+                self.run_ytdlp(ydl_opts, info)
+                if self.results:
+                    return
+            except DownloadCancelled:
+                raise
+            except Exception as e:
+                print(f"Download from cached info failed: {str(e)}")
+            forget_info(self.url)
+        self.run_ytdlp(ydl_opts)
+
+    def run_ytdlp(self, ydl_opts, info=None):
+        pool = get_process_pool()
+        if pool is not None:
+            self.download_in_process(pool, ydl_opts, info)
+            return
+        with pooled_ydl(ydl_opts) as ydl:
+            if info is not None:
+                ydl.process_ie_result(info, download=True)
+            else:
+                ydl.download([self.url])
+
+    def download_in_process(self, pool, ydl_opts, info=None):
+        """Run yt-dlp in a worker process, which is killed when the job is stopped"""
+        options = picklable_options(ydl_opts)
+        # The limiters cannot reach into the worker, so hand yt-dlp the rate that applies now
+        rates = [bandwidth_limiter.current_rate(), self.rate_bucket.rate if self.rate_bucket else 0]
+        rates = [rate for rate in rates if rate]
+        if rates:
+            options['ratelimit'] = min(rates)
+
+        future = pool.submit('download', self.url, options, info, progress_callback=self.process_progress)
+        while not wait([future], timeout=0.2).done:
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                pool.kill(future)
+                raise DownloadCancelled("Download stopped")
+        for result in future.result():
+            self.add_result(**result)
+
+    def add_result(self, file_path, size=None, extractor=None, video_id=None, title=None,
+                   content_hash=None):
+        self.results.append({
+            'file_path': file_path,
+            'size': size,
+            'extractor': extractor,
+            'video_id': video_id,
+            'title': title,
+            'content_hash': content_hash,
+        })
+
+    def run(self):
+        try:
+            print(f"Starting download for URL: {self.url}")
+
+            # Enhanced yt-dlp options
+            ydl_opts = {
+                'format': 'best',
+                'outtmpl': str(Path(self.output_path) / '%(title)s.%(ext)s'),
+                'progress_hooks': [self.progress_hook],
+                'quiet': False,
+                'no_warnings': False,
+                'extract_flat': False,
+                'retry_sleep': lambda n: min(10 + n, 60),
+                'nocheckcertificate': True,
+                'ignoreerrors': True,
+                'no_color': True,
+                'geo_bypass': True,
+                'geo_bypass_country': 'US',
+                # Add these options for better progress reporting
+                'progress_with_newline': True,
+                'force_progress': True,
+                # Keep .part files and fragment state so restarted jobs resume
+                'continuedl': True,
+                'nopart': False,
+                'hls_use_mpegts': True,
+            }
+            # Fragment concurrency, chunk and buffer sizes, timeouts and retries
+            ydl_opts.update(ydl_download_options(self.profile))
+
+            # HLS playlists go through the native parallel segment fetcher first
+            if is_hls_url(self.url):
+                try:
+                    self.download_hls(self.url)
+                    return
+                except DownloadCancelled:
+                    raise
+                except Exception as e:
+                    print(f"Native HLS download failed: {str(e)}")
+                    print("Falling back to yt-dlp...")
+
+            # Try multiple download methods
+            try:
+                self.download_ytdlp(ydl_opts)
+                # ignoreerrors hides failures, a download that wrote nothing did not work
+                if not self.results:
+                    raise Exception("no file was downloaded")
+            except DownloadCancelled:
+                raise
+            except Exception as e:
+                print(f"yt-dlp download failed: {str(e)}")
+                print("Attempting direct download...")
+                self.download_direct(self.url)
+
+            self.check_cancelled()
+
+        except DownloadCancelled:
+            raise
+        except Exception as e:
+            error_msg = f"Download failed: {str(e)}"
+            print(error_msg)
+            raise Exception(error_msg)
+
+    def download_direct(self, url):
+        if is_hls_url(url):
+            # Never save the playlist text itself
+            self.download_hls(url)
+            return
+
+        reserved = None
+        try:
+            # Resumable segmented download, falls back to a single stream when unsupported
+            output_file = self.output_path
+            if Path(output_file).is_dir():
+                # Files of other URLs with the same name are neither resumed nor overwritten
+                name = Path(self.sanitize_filename(url) or 'video.mp4')
+                reserved = reserve_output(output_file, name.stem, [name.suffix],
+                                          lambda path: SegmentedDownloader.can_resume(path, url))
+                output_file = reserved + name.suffix
+
+            self.direct_downloader = SegmentedDownloader(
+                url, output_file,
+                session=self.session,
+                progress_callback=self.report_progress,
+                timeout=self.profile['socket_timeout'],
+                cancel_event=self.cancel_event,
+                throttle=self.throttle,
+                hash_algorithm=self.hash_algorithm
+            )
+            self.direct_downloader.download()
+            self.add_result(output_file, os.path.getsize(output_file),
+                            content_hash=self.direct_downloader.digest)
+
+        except DownloadCancelled:
+            raise
+        except Exception as e:
+            raise Exception(f"Direct download failed: {str(e)}")
+        finally:
+            if reserved:
+                release_output(reserved)
+
+    def download_hls(self, url):
+        # The stream may turn out to be fragmented MP4, so both names are kept free
+        reserved = reserve_output(self.output_path, self.hls_name(url), ['.ts', '.mp4'])
+        try:
+            self.hls_downloader = HLSDownloader(
+                url, reserved + '.ts',
+                session=self.session,
+                progress_callback=self.report_progress,
+                cancel_event=self.cancel_event,
+                throttle=self.throttle,
+                timeout=self.profile['socket_timeout'],
+                hash_algorithm=self.hash_algorithm
+            )
+            output_file = self.hls_downloader.download()
+        finally:
+            release_output(reserved)
+        self.add_result(output_file, os.path.getsize(output_file),
+                        content_hash=self.hls_downloader.digest)
+
+    @classmethod
+    def hls_name(cls, url):
+        """File name for an HLS stream: the video title when it is known,
+        else the playlist name, or its folder when the name is a usual one"""
+        info = get_cached_info(url) or {}
+        title = yt_dlp.utils.sanitize_filename(info.get('title') or '')[:100]
+        if title and title.lower() not in HLS_PLAYLIST_NAMES:
+            return title
+        parts = [cls.sanitize_filename(part) for part in urlparse(url).path.split('/')]
+        parts = [part for part in parts if part]
+        name = Path(parts[-1]).stem if parts else ''
+        if name.lower() in HLS_PLAYLIST_NAMES and len(parts) > 1:
+            name = parts[-2]
+        return name or 'video'
+
+    def discard(self):
+        """Remove partial files left behind by a cancelled download"""
+        if self.direct_downloader:
+            self.direct_downloader.discard()
+        if self.hls_downloader:
+            self.hls_downloader.discard()
+
+    @staticmethod
+    def sanitize_filename(url):
+        """Sanitize filename from URL"""
+        # Extract filename from URL
+        filename = url.split('/')[-1].split('?')[0]
+        # Remove invalid characters
+        filename = re.sub(r'[<>:"/\\|?*]', '', filename)
+        # Limit length
+        return filename[:50]
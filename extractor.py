@@ -0,0 +1,200 @@
+import re
+import tempfile
+
+import requests
+from browser_cookie3 import chrome, firefox
+
+from pagescan import scan_response
+from procpool import extract_info
+from profiles import ydl_network_options
+from scancache import get_scan_cache, validator_headers
+from transport import get_session
+
+DIRECT_VIDEO_EXTENSIONS = ['.mp4', '.webm', '.ogg']
+VIDEO_SITES = ['youtube.com', 'youtu.be', 'vimeo.com']
+
+
+def is_direct_video_url(url):
+    """True for URLs that are downloaded as they are instead of being scanned"""
+    url = url.lower()
+    return (any(ext in url for ext in DIRECT_VIDEO_EXTENSIONS) or
+            any(site in url for site in VIDEO_SITES))
+
+
+def scan_url(url, on_found=None, force=False):
+    """Return the video URLs for url, scanning the page unless it is a video itself.
+
+    on_found is called with lists of URLs while the page is being scanned.
+    force skips the scan cache and scans the page again.
+    """
+    if is_direct_video_url(url):
+        return [url]
+    return VideoExtractor.extract_video_urls(url, on_found, force)
+
+
+class VideoExtractor:
+    @staticmethod
+    def extract_video_urls(page_url, on_found=None, force=False):
+        try:
+            # Check if it's an Instagram URL
+            if 'instagram.com' in page_url:
+                return VideoExtractor.extract_instagram_video(page_url)
+            
+            # Shared pooled session with the central retry and timeout policy
+            session = get_session()
+
+            # Recent scans are reused, older ones are revalidated with the server
+            cache = get_scan_cache()
+            cached = None
+            if cache is not None and not force:
+                try:
+                    cached = cache.get(page_url)
+                except Exception as e:
+                    print(f"Scan cache lookup failed: {str(e)}")
+            if cached and cache.is_fresh(cached):
+                return cached['videos']
+            
+            # Stream the page, it is scanned while it downloads
+            headers = validator_headers(cached) if cached else None
+            response = session.get(page_url, timeout=30, stream=True, headers=headers)
+            try:
+                if cached and response.status_code == 304:
+                    try:
+                        cache.revalidated(page_url, response.headers.get('ETag'),
+                                          response.headers.get('Last-Modified'))
+                    except Exception as e:
+                        print(f"Scan cache update failed: {str(e)}")
+                    return cached['videos']
+                response.raise_for_status()
+                video_urls = scan_response(response, page_url, on_found)
+            finally:
+                response.close()
+            
+            if cache is not None:
+                try:
+                    cache.store(page_url, video_urls, response.headers.get('ETag'),
+                                response.headers.get('Last-Modified'))
+                except Exception as e:
+                    print(f"Scan cache update failed: {str(e)}")
+            return video_urls
+            
+        except Exception as e:
+            error_msg = str(e)
+            if isinstance(e, requests.exceptions.ConnectionError):
+                error_msg = "Connection was interrupted. Please check your internet connection and try again."
+            elif isinstance(e, requests.exceptions.Timeout):
+                error_msg = "The connection timed out. Please try again or check your internet connection."
+            elif isinstance(e, requests.exceptions.TooManyRedirects):
+                error_msg = "Too many redirects. The website might be blocking automated access."
+            elif isinstance(e, requests.exceptions.RequestException):
+                error_msg = "Failed to connect to the website. Please check the URL and try again."
+            
+            raise Exception(f"Error extracting videos: {error_msg}")
+
+    @staticmethod
+    def extract_instagram_video(url):
+        try:
+            # Get cookies from browser with better error handling
+            cookies = {}
+            try:
+                try:
+                    chrome_cookies = chrome()
+                    cookies = {cookie.name: cookie.value for cookie in chrome_cookies if '.instagram.com' in cookie.domain}
+                except Exception as chrome_error:
+                    print(f"Chrome cookies error: {str(chrome_error)}")
+                    try:
+                        firefox_cookies = firefox()
+                        cookies = {cookie.name: cookie.value for cookie in firefox_cookies if '.instagram.com' in cookie.domain}
+                    except Exception as firefox_error:
+                        print(f"Firefox cookies error: {str(firefox_error)}")
+                        # Continue without cookies
+                        pass
+            except Exception as e:
+                print(f"Cookie extraction error: {str(e)}")
+                # Continue without cookies
+                pass
+
+            # Configure yt-dlp options for Instagram
+            ydl_opts = {
+                'quiet': True,
+                'no_warnings': True,
+                'extract_flat': True,
+                'format': 'best',
+                **ydl_network_options(),
+            }
+
+            # Only add cookie options if we successfully got cookies
+            if cookies:
+                # Create a temporary cookie file
+                with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt') as f:
+                    for name, value in cookies.items():
+                        f.write(f'.instagram.com\tTRUE\t/\tTRUE\t0\t{name}\t{value}\n')
+                    ydl_opts['cookiefile'] = f.name
+
+            # Runs in a worker process when the process pool is enabled
+            try:
+                info = extract_info(url, ydl_opts)
+            except Exception as e:
+                if 'Login required' in str(e):
+                    # If login required, try alternative method
+                    return VideoExtractor.extract_instagram_video_alternative(url, cookies)
+                raise e
+
+            # Get video URL
+            if info.get('url'):
+                return [info['url']]
+            elif info.get('entries'):
+                return [entry['url'] for entry in info['entries'] if entry.get('url')]
+            else:
+                raise Exception("No video URL found in the Instagram post")
+
+        except Exception as e:
+            if 'Login required' in str(e):
+                raise Exception("This Instagram content requires login. Please log in to Instagram in your browser first.")
+            raise Exception(f"Failed to extract Instagram video: {str(e)}")
+
+    @staticmethod
+    def extract_instagram_video_alternative(url, cookies):
+        try:
+            # Headers to mimic browser
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+                'Accept': '*/*',
+                'Accept-Language': 'en-US,en;q=0.9',
+                'Accept-Encoding': 'gzip, deflate',
+                'Origin': 'https://www.instagram.com',
+                'Referer': 'https://www.instagram.com/',
+            }
+
+            # Send the browser cookies with this request only, the session is shared
+            session = get_session()
+
+            # Get the Instagram post page
+            response = session.get(url, headers=headers, cookies=cookies)
+            response.raise_for_status()
+
+            # Look for video URLs in the page source
+            video_urls = []
+            
+            # Pattern for video URLs in Instagram's HTML
+            patterns = [
+                r'"video_url":"([^"]+)"',
+                r'"video_versions":\[{"type":\d+,"width":\d+,"height":\d+,"url":"([^"]+)"',
+                r'property="og:video" content="([^"]+)"'
+            ]
+
+            for pattern in patterns:
+                matches = re.findall(pattern, response.text)
+                if matches:
+                    video_urls.extend(matches)
+
+            # Clean up URLs (remove escapes)
+            video_urls = [url.replace('\\u0026', '&') for url in video_urls]
+
+            if not video_urls:
+                raise Exception("No video URLs found in the Instagram post")
+
+            return list(set(video_urls))
+
+        except Exception as e:
+            raise Exception(f"Failed to extract Instagram video using alternative method: {str(e)}")
@@ -0,0 +1,253 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+from appsettings import apply_transfer_settings, crawl_options, open_settings, queue_limits
+from batchscan import DEFAULT_BATCH_WORKERS, BatchScanner, parse_url_list
+from canonical import VideoUrlSet
+from crawler import PAGE_FAILED, PAGE_SCANNED
+from history import DownloadHistory
+from integrity import available_algorithms, set_hash_algorithm
+from procpool import configure_process_pool
+from profiles import PROFILES, set_active_profile
+from progress import ProgressAggregator
+from ratelimit import bandwidth_limiter
+from scheduler import (DownloadScheduler, COMPLETED, FAILED, CANCELLED,
+                       DEFAULT_MAX_CONCURRENT, DEFAULT_PER_HOST_LIMIT)
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+# Seconds between progress events for running jobs
+PROGRESS_INTERVAL = 1.0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='main.py --headless',
+        description="Scan pages and download videos without the GUI. "
+                    "Events are written to stdout as JSON lines, logs go to stderr.")
+    parser.add_argument('--headless', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('urls', nargs='*', help="Page or video URLs")
+    parser.add_argument('-i', '--input', action='append', default=[],
+                        help="File with one URL per line, - for stdin (repeatable)")
+    parser.add_argument('-o', '--output', help="Output directory (default: the GUI setting)")
+    parser.add_argument('-j', '--jobs', type=int, help="Simultaneous downloads")
+    parser.add_argument('--per-host', type=int, help="Simultaneous downloads per host")
+    parser.add_argument('--rate-limit', type=int, help="Global limit in KB/s, 0 = unlimited")
+    parser.add_argument('--profile', choices=list(PROFILES), help="Download profile")
+    parser.add_argument('--hash', choices=available_algorithms() + ['none'],
+                        help="Checksum computed while downloading")
+    parser.add_argument('--processes', type=int,
+                        help="Run yt-dlp in this many worker processes, 0 = in this process")
+    parser.add_argument('--no-scan', action='store_true',
+                        help="Download the URLs as they are instead of scanning pages")
+    parser.add_argument('--rescan', action='store_true',
+                        help="Scan pages again even if they are in the scan cache")
+    parser.add_argument('--crawl', action='store_true',
+                        help="Also scan the same-site pages each page links to")
+    parser.add_argument('--depth', type=int, help="Links to follow away from each page when crawling")
+    parser.add_argument('--max-pages', type=int, help="Pages to scan per crawl")
+    parser.add_argument('--scan-workers', type=int, help="Pages scanned at the same time")
+    parser.add_argument('--skip-downloaded', action='store_true',
+                        help="Skip videos found in the download history")
+    parser.add_argument('--no-settings', action='store_true',
+                        help="Ignore the settings saved by the GUI")
+    parser.add_argument('--progress-interval', type=float, default=PROGRESS_INTERVAL,
+                        help="Seconds between progress events (default: %(default)s)")
+    return parser
+
+
+def read_urls(args):
+    """Collect URLs from the arguments and input files, skipping blanks and # comments"""
+    lines = list(args.urls)
+    for path in args.input:
+        if path == '-':
+            lines.extend(sys.stdin.read().splitlines())
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                lines.extend(f.read().splitlines())
+    return parse_url_list(lines)
+
+
+class JsonLineWriter:
+    """Write one JSON object per line, safe to call from any thread"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        line = json.dumps({'event': event, 'time': round(time.time(), 3), **fields})
+        with self._lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+
+class HeadlessRunner:
+    """Scan the given URLs, download every video found and report as JSON lines"""
+
+    def __init__(self, urls, output_path, events, max_concurrent=DEFAULT_MAX_CONCURRENT,
+                 per_host_limit=DEFAULT_PER_HOST_LIMIT, scan=True, history=None,
+                 skip_downloaded=False, progress_interval=PROGRESS_INTERVAL, crawl=None,
+                 rescan=False, scan_workers=DEFAULT_BATCH_WORKERS):
+        self.urls = urls
+        self.output_path = output_path
+        self.events = events
+        self.scan = scan
+        # SiteCrawler options, None to scan only the given pages
+        self.crawl = crawl
+        self.rescan = rescan
+        self.scan_workers = scan_workers
+        self.history = history
+        self.skip_downloaded = skip_downloaded
+        self.progress_interval = max(0.1, progress_interval)
+        self.scan_failures = 0
+        self.skipped = 0
+        self._changed = threading.Event()
+        self.scheduler = DownloadScheduler(max_concurrent, per_host_limit,
+                                           listener=self.job_changed, history=history)
+
+    def job_changed(self, job):
+        self.events.emit('state', job=job.id, url=job.url, state=job.state, error=job.error)
+        self._changed.set()
+
+    def page_crawled(self, url, depth, state, error):
+        self.events.emit('page', url=url, depth=depth, state=state, error=error)
+
+    def page_scanned(self, url, state, videos, error):
+        if state == PAGE_SCANNED:
+            self.events.emit('scanned', url=url, videos=list(videos))
+        elif state == PAGE_FAILED:
+            self.events.emit('scan_failed', url=url, error=error)
+
+    def collect_videos(self):
+        if not self.scan:
+            # One URL per video, as a scan would list them
+            videos = VideoUrlSet().add(self.urls)
+        else:
+            # Pages are scanned in parallel, one URL per video across all of them
+            scanner = BatchScanner(self.urls, self.scan_workers, self.crawl, self.rescan,
+                                   on_page=self.page_scanned, on_crawled=self.page_crawled)
+            videos = scanner.run()
+            self.scan_failures = scanner.failures
+
+        if self.skip_downloaded and self.history is not None:
+            known = self.history.known_urls(videos)
+            for url in videos:
+                if url in known:
+                    self.skipped += 1
+                    self.events.emit('skipped', url=url, reason='downloaded')
+            videos = [url for url in videos if url not in known]
+        return videos
+
+    def run(self):
+        started = time.monotonic()
+        interrupted = False
+        try:
+            for url in self.collect_videos():
+                self.scheduler.submit(url, self.output_path)
+            self.wait()
+        except KeyboardInterrupt:
+            interrupted = True
+            self.scheduler.cancel_all()
+            self.wait()
+
+        jobs = self.scheduler.jobs()
+        counts = {state: sum(1 for job in jobs if job.state == state)
+                  for state in (COMPLETED, FAILED, CANCELLED)}
+        self.events.emit('summary', completed=counts[COMPLETED], failed=counts[FAILED],
+                         cancelled=counts[CANCELLED], skipped=self.skipped,
+                         scan_failed=self.scan_failures,
+                         elapsed=round(time.monotonic() - started, 3))
+
+        if interrupted:
+            return EXIT_INTERRUPTED
+        if counts[FAILED] or counts[CANCELLED] or self.scan_failures:
+            return EXIT_FAILED
+        return EXIT_OK
+
+    def wait(self):
+        """Block until every job has finished, emitting progress on the way"""
+        aggregator = ProgressAggregator()
+        while not all(job.is_finished for job in self.scheduler.jobs()):
+            self._changed.wait(self.progress_interval)
+            self._changed.clear()
+            for sample in aggregator.sample(self.scheduler.progress_counters()):
+                self.events.emit('progress', job=sample.key, downloaded=sample.downloaded,
+                                 total=sample.total, percent=round(sample.percent, 1),
+                                 speed=round(sample.speed), eta=sample.eta and round(sample.eta))
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    events = JsonLineWriter(sys.stdout)
+
+    try:
+        urls = read_urls(args)
+    except OSError as e:
+        print(f"Could not read input: {str(e)}", file=sys.stderr)
+        return EXIT_USAGE
+    if not urls:
+        print("No URLs given, use -i FILE or pass them as arguments", file=sys.stderr)
+        return EXIT_USAGE
+
+    settings = None if args.no_settings else open_settings()
+    max_concurrent, per_host_limit = DEFAULT_MAX_CONCURRENT, DEFAULT_PER_HOST_LIMIT
+    output_path = args.output
+    crawl = {}
+    if settings is not None:
+        apply_transfer_settings(settings)
+        max_concurrent, per_host_limit = queue_limits(settings)
+        output_path = output_path or settings.value('default_output_path', '')
+        crawl = crawl_options(settings)
+
+    # Command line options win over saved settings
+    if args.jobs:
+        max_concurrent = args.jobs
+    if args.per_host:
+        per_host_limit = args.per_host
+    if args.rate_limit is not None:
+        bandwidth_limiter.set_rate(args.rate_limit * 1024)
+        bandwidth_limiter.set_schedule([])
+    if args.profile:
+        set_active_profile(PROFILES[args.profile])
+    if args.hash:
+        set_hash_algorithm(None if args.hash == 'none' else args.hash)
+    if args.processes is not None:
+        configure_process_pool(args.processes > 0, args.processes)
+    if args.depth is not None:
+        crawl['max_depth'] = args.depth
+    if args.max_pages is not None:
+        crawl['max_pages'] = args.max_pages
+    scan_workers = DEFAULT_BATCH_WORKERS
+    if settings is not None:
+        scan_workers = settings.value('batch_scan_workers', DEFAULT_BATCH_WORKERS, type=int)
+    if args.scan_workers:
+        scan_workers = args.scan_workers
+
+    output_path = output_path or os.getcwd()
+    os.makedirs(output_path, exist_ok=True)
+
+    try:
+        history = DownloadHistory()
+    except Exception as e:
+        print(f"Download history unavailable: {str(e)}", file=sys.stderr)
+        history = None
+
+    runner = HeadlessRunner(urls, output_path, events, max_concurrent, per_host_limit,
+                            scan=not args.no_scan, history=history,
+                            skip_downloaded=args.skip_downloaded,
+                            progress_interval=args.progress_interval,
+                            crawl=crawl if args.crawl else None, rescan=args.rescan,
+                            scan_workers=scan_workers)
+    # yt-dlp and the engines print to stdout, keep it for the JSON events
+    with contextlib.redirect_stdout(sys.stderr):
+        return runner.run()
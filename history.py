@@ -0,0 +1,129 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from canonical import canonical_url, youtube_id
+
+DEFAULT_HISTORY_PATH = Path.home() / '.vloader' / 'history.db'
+# Stay well below SQLite's limit on bound parameters per statement
+LOOKUP_BATCH = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    canonical_url TEXT NOT NULL,
+    extractor TEXT,
+    video_id TEXT,
+    content_hash TEXT,
+    title TEXT,
+    file_path TEXT,
+    size INTEGER,
+    completed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_downloads_url ON downloads (canonical_url);
+CREATE INDEX IF NOT EXISTS idx_downloads_video ON downloads (extractor, video_id);
+CREATE INDEX IF NOT EXISTS idx_downloads_hash ON downloads (content_hash);
+"""
+
+
+def guess_video_id(url):
+    """(extractor, video id) when it can be read from the URL alone"""
+    video_id = youtube_id(url)
+    return ('Youtube', video_id) if video_id else None
+
+
+class DownloadHistory:
+    """SQLite record of completed downloads.
+
+    Entries are indexed by canonical URL, by (extractor, video id) and by
+    content hash, so lookups stay fast however large the library grows. The
+    database runs in WAL mode and one connection is shared by all threads.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = str(path)
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def record(self, url, file_path=None, extractor=None, video_id=None, title=None,
+               size=None, content_hash=None):
+        if video_id is None:
+            extractor, video_id = guess_video_id(url) or (extractor, None)
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO downloads (url, canonical_url, extractor, video_id, content_hash, '
+                'title, file_path, size, completed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, canonical_url(url), extractor, video_id, content_hash,
+                 title, file_path, size, time.time()))
+            self._conn.commit()
+
+    def find(self, url):
+        """Return the latest entry for url or for the video it points to"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM downloads WHERE canonical_url = ? ORDER BY id DESC LIMIT 1',
+                (canonical_url(url),)).fetchone()
+            video = guess_video_id(url)
+            if row is None and video:
+                row = self._conn.execute(
+                    'SELECT * FROM downloads WHERE extractor = ? AND video_id = ? '
+                    'ORDER BY id DESC LIMIT 1', video).fetchone()
+        return dict(row) if row else None
+
+    def find_video(self, extractor, video_id):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM downloads WHERE extractor = ? AND video_id = ? '
+                'ORDER BY id DESC LIMIT 1', (extractor, video_id)).fetchone()
+        return dict(row) if row else None
+
+    def find_hash(self, content_hash):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM downloads WHERE content_hash = ? ORDER BY id DESC LIMIT 1',
+                (content_hash,)).fetchone()
+        return dict(row) if row else None
+
+    def known_urls(self, urls):
+        """Return the subset of urls that were downloaded before, in batched queries"""
+        by_canonical = {}
+        by_video = {}
+        for url in urls:
+            by_canonical.setdefault(canonical_url(url), []).append(url)
+            video = guess_video_id(url)
+            if video:
+                by_video.setdefault(video[1], []).append(url)
+
+        known = set()
+        with self._lock:
+            for batch in _batches(list(by_canonical)):
+                rows = self._conn.execute(
+                    'SELECT DISTINCT canonical_url FROM downloads WHERE canonical_url IN '
+                    f'({",".join("?" * len(batch))})', batch)
+                for row in rows:
+                    known.update(by_canonical[row[0]])
+            for batch in _batches(list(by_video)):
+                rows = self._conn.execute(
+                    "SELECT DISTINCT video_id FROM downloads WHERE extractor = 'Youtube' AND video_id IN "
+                    f'({",".join("?" * len(batch))})', batch)
+                for row in rows:
+                    known.update(by_video[row[0]])
+        return known
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _batches(items, size=LOOKUP_BATCH):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
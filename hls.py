@@ -0,0 +1,327 @@
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+
+from yt_dlp.aes import aes_cbc_decrypt_bytes, unpad_pkcs7
+
+from integrity import StreamHasher, format_digest, write_checksum_file
+from ratelimit import bandwidth_limiter
+from transport import get_session
+
+# Segments fetched in parallel
+DEFAULT_CONCURRENCY = 8
+# Segments allowed in flight ahead of the one being written, bounds memory use
+DEFAULT_WINDOW = 16
+SEGMENT_RETRIES = 3
+
+ATTRIBUTE_PATTERN = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+def is_hls_url(url):
+    return urlparse(url).path.lower().endswith('.m3u8')
+
+
+def parse_attributes(text):
+    """Parse an HLS attribute list such as BANDWIDTH=1280000,URI="key.bin" """
+    return {name: value.strip('"') for name, value in ATTRIBUTE_PATTERN.findall(text)}
+
+
+def parse_byterange(text, offset):
+    """Parse "length[@offset]", continuing from offset when no offset is given"""
+    length, _, start = text.partition('@')
+    start = int(start) if start else offset
+    return start, start + int(length) - 1
+
+
+class HLSVariant:
+    def __init__(self, uri, bandwidth=0, resolution=None):
+        self.uri = uri
+        self.bandwidth = bandwidth
+        self.resolution = resolution
+
+    @property
+    def height(self):
+        if self.resolution and 'x' in self.resolution:
+            return int(self.resolution.split('x')[1])
+        return 0
+
+
+class HLSKey:
+    def __init__(self, method, uri=None, iv=None):
+        self.method = method
+        self.uri = uri
+        self.iv = iv
+
+
+class HLSSegment:
+    def __init__(self, uri, duration=0.0, sequence=0, key=None, byterange=None):
+        self.uri = uri
+        self.duration = duration
+        self.sequence = sequence
+        self.key = key
+        self.byterange = byterange
+
+
+class HLSPlaylist:
+    """A parsed master playlist (variants) or media playlist (segments)"""
+
+    def __init__(self):
+        self.variants = []
+        self.segments = []
+        self.init_segment = None
+        self.is_endlist = False
+
+    @property
+    def is_master(self):
+        return bool(self.variants)
+
+
+def parse_playlist(text, base_url):
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines or not lines[0].startswith('#EXTM3U'):
+        raise Exception("Not an HLS playlist")
+
+    playlist = HLSPlaylist()
+    sequence = 0
+    key = None
+    duration = 0.0
+    byterange = None
+    byterange_offset = 0
+    pending_variant = None
+
+    for line in lines[1:]:
+        if line.startswith('#EXT-X-STREAM-INF:'):
+            attributes = parse_attributes(line.split(':', 1)[1])
+            pending_variant = HLSVariant(None, int(attributes.get('BANDWIDTH', 0) or 0),
+                                         attributes.get('RESOLUTION'))
+        elif line.startswith('#EXT-X-MEDIA-SEQUENCE:'):
+            sequence = int(line.split(':', 1)[1])
+        elif line.startswith('#EXT-X-KEY:'):
+            attributes = parse_attributes(line.split(':', 1)[1])
+            method = attributes.get('METHOD', 'NONE')
+            key = None
+            if method != 'NONE':
+                iv = attributes.get('IV')
+                key = HLSKey(method, urljoin(base_url, attributes.get('URI', '')),
+                             bytes.fromhex(iv[2:]) if iv else None)
+        elif line.startswith('#EXT-X-MAP:'):
+            attributes = parse_attributes(line.split(':', 1)[1])
+            map_range = None
+            if attributes.get('BYTERANGE'):
+                map_range = parse_byterange(attributes['BYTERANGE'], 0)
+            playlist.init_segment = HLSSegment(urljoin(base_url, attributes['URI']),
+                                               byterange=map_range)
+        elif line.startswith('#EXTINF:'):
+            duration = float(line.split(':', 1)[1].split(',')[0] or 0)
+        elif line.startswith('#EXT-X-BYTERANGE:'):
+            byterange = parse_byterange(line.split(':', 1)[1], byterange_offset)
+        elif line.startswith('#EXT-X-ENDLIST'):
+            playlist.is_endlist = True
+        elif not line.startswith('#'):
+            uri = urljoin(base_url, line)
+            if pending_variant is not None:
+                pending_variant.uri = uri
+                playlist.variants.append(pending_variant)
+                pending_variant = None
+            else:
+                playlist.segments.append(HLSSegment(uri, duration, sequence, key, byterange))
+                if byterange:
+                    byterange_offset = byterange[1] + 1
+                sequence += 1
+                duration = 0.0
+                byterange = None
+
+    return playlist
+
+
+class HLSDownloader:
+    """Download an HLS stream by fetching its segments concurrently.
+
+    Master playlists are resolved to the best variant (optionally capped at
+    max_height). Segments are fetched by a thread pool with at most window
+    segments in flight, decrypted when they use AES-128 and appended to the
+    output file strictly in playlist order. Live playlists are downloaded as
+    far as the current playlist goes. With hash_algorithm set the output is
+    hashed as it is written and the digest stored in "<output>.<algorithm>".
+    """
+
+    def __init__(self, url, output_file, session=None, headers=None,
+                 concurrency=DEFAULT_CONCURRENCY, window=DEFAULT_WINDOW, max_height=None,
+                 progress_callback=None, cancel_event=None, throttle=None, timeout=60,
+                 hash_algorithm=None):
+        self.url = url
+        self.output_file = output_file
+        self.session = session or get_session()
+        self.headers = dict(headers or {})
+        self.concurrency = max(1, concurrency)
+        self.window = max(self.concurrency, window)
+        self.max_height = max_height
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+        self.throttle = throttle or (
+            lambda amount: bandwidth_limiter.throttle(amount, cancel_event=self.cancel_event))
+        self.timeout = timeout
+        self.hash_algorithm = hash_algorithm
+        self.hasher = None
+        self.digest = None
+        self.part_file = None
+
+        self.downloaded = 0
+        self._keys = {}
+        self._keys_lock = threading.Lock()
+
+    def download(self):
+        playlist = self.load_playlist(self.url)
+        if playlist.is_master:
+            variant = self.pick_variant(playlist.variants, self.max_height)
+            print(f"HLS variant: {variant.resolution or 'unknown'} @ {variant.bandwidth} bps")
+            playlist = self.load_playlist(variant.uri)
+
+        if not playlist.segments:
+            raise Exception("HLS playlist has no segments")
+        for segment in playlist.segments:
+            if segment.key and segment.key.method != 'AES-128':
+                raise Exception(f"Unsupported HLS encryption: {segment.key.method}")
+
+        # Fragmented MP4 streams carry an init segment, everything else is MPEG-TS
+        if playlist.init_segment and self.output_file.endswith('.ts'):
+            self.output_file = self.output_file[:-3] + '.mp4'
+
+        self.part_file = self.output_file + '.part'
+        if self.hash_algorithm:
+            self.hasher = StreamHasher(self.hash_algorithm)
+        try:
+            with open(self.part_file, 'wb') as f:
+                if playlist.init_segment:
+                    self._write(f, self._fetch(playlist.init_segment))
+                self._download_segments(playlist.segments, f)
+        except BaseException:
+            # Segments are not resumed, a partial file is of no use
+            self.discard()
+            raise
+        os.replace(self.part_file, self.output_file)
+
+        if self.hasher:
+            hexdigest = self.hasher.hexdigest()
+            self.digest = format_digest(self.hash_algorithm, hexdigest)
+            write_checksum_file(self.output_file, self.hash_algorithm, hexdigest)
+        return self.output_file
+
+    def discard(self):
+        """Remove the partial file of a failed or cancelled download"""
+        if self.part_file:
+            try:
+                os.remove(self.part_file)
+            except FileNotFoundError:
+                pass
+
+    def _write(self, f, data):
+        if self.hasher:
+            # Segments are written in order, so the hash never has to read back
+            self.hasher.update(f.tell(), data)
+        f.write(data)
+
+    def load_playlist(self, url):
+        response = self.session.get(url, headers=self.headers, timeout=self.timeout)
+        response.raise_for_status()
+        return parse_playlist(response.text, response.url)
+
+    @staticmethod
+    def pick_variant(variants, max_height=None):
+        candidates = variants
+        if max_height:
+            candidates = [v for v in variants if v.height and v.height <= max_height] or variants
+        return max(candidates, key=lambda v: (v.bandwidth, v.height))
+
+    def _download_segments(self, segments, f):
+        pending = deque()
+        segment_iter = iter(segments)
+        count = len(segments)
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            try:
+                for segment in segment_iter:
+                    pending.append(executor.submit(self._fetch_segment, segment))
+                    if len(pending) >= self.window:
+                        break
+
+                while pending:
+                    # Write in playlist order while later segments keep downloading
+                    data = pending.popleft().result()
+                    self._write(f, data)
+                    done += 1
+                    self._report(len(data), done, count)
+
+                    segment = next(segment_iter, None)
+                    if segment is not None:
+                        pending.append(executor.submit(self._fetch_segment, segment))
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _report(self, length, done, count):
+        self.downloaded += length
+        if self.progress_callback:
+            # Estimate the total from the average size of the segments so far
+            self.progress_callback(self.downloaded, int(self.downloaded / done * count))
+
+    def _check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            # Imported here because downloader imports this module
+            from downloader import DownloadCancelled
+            raise DownloadCancelled("Download stopped")
+
+    def _fetch_segment(self, segment):
+        data = self._fetch(segment)
+        if segment.key:
+            key = self._get_key(segment.key.uri)
+            iv = segment.key.iv or segment.sequence.to_bytes(16, 'big')
+            data = unpad_pkcs7(aes_cbc_decrypt_bytes(data, key, iv))
+        return data
+
+    def _fetch(self, segment):
+        headers = dict(self.headers)
+        if segment.byterange:
+            headers['Range'] = f'bytes={segment.byterange[0]}-{segment.byterange[1]}'
+
+        attempt = 0
+        while True:
+            self._check_cancelled()
+            try:
+                response = self.session.get(segment.uri, headers=headers, timeout=self.timeout)
+                response.raise_for_status()
+                data = response.content
+                if segment.byterange:
+                    data = self._slice_range(segment.byterange, response.status_code, data)
+                self.throttle(len(data))
+                return data
+            except Exception as e:
+                attempt += 1
+                if attempt > SEGMENT_RETRIES:
+                    raise Exception(f"HLS segment failed: {str(e)}")
+                print(f"Retrying HLS segment {segment.uri}: {str(e)}")
+
+    @staticmethod
+    def _slice_range(byterange, status_code, data):
+        """The bytes of a byterange segment, cut out of the whole resource
+        when the server ignored the Range header"""
+        start, end = byterange
+        if status_code == 200:
+            data = data[start:end + 1]
+        elif status_code != 206:
+            raise Exception(f"Unexpected status {status_code} for a byte range")
+        if len(data) != end - start + 1:
+            raise Exception(f"Byte range {start}-{end} returned {len(data)} bytes")
+        return data
+
+    def _get_key(self, uri):
+        with self._keys_lock:
+            if uri not in self._keys:
+                response = self.session.get(uri, headers=self.headers, timeout=self.timeout)
+                response.raise_for_status()
+                self._keys[uri] = response.content
+            return self._keys[uri]
@@ -0,0 +1,228 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+import yt_dlp
+
+from canonical import video_key
+from procpool import extract_info
+
+DEFAULT_CACHE_PATH = Path.home() / '.vloader' / 'infocache.db'
+# Seconds an info dict is reused, shorter when its format URLs expire sooner
+DEFAULT_TTL = 6 * 60 * 60
+# Signed URLs are not used this close to their expiry
+EXPIRY_MARGIN = 10 * 60
+# Videos kept on disk, the least recently used ones are dropped first
+DEFAULT_MAX_ENTRIES = 1000
+# Bytes of info JSON also kept in memory
+DEFAULT_MEMORY_BYTES = 32 * 1024 * 1024
+
+# Query parameters and path segments holding the expiry time of signed URLs
+EXPIRY_PARAMS = ('expire', 'expires', 'exp')
+EXPIRY_PATH = re.compile(r'/expire/(\d{9,11})(?:/|$)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS infos (
+    video_key TEXT PRIMARY KEY,
+    info TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_infos_used ON infos (used_at);
+"""
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def url_expiry(url):
+    """Epoch seconds a signed URL stops working at, or None"""
+    parts = urlsplit(url)
+    for name, value in parse_qsl(parts.query):
+        if name.lower() in EXPIRY_PARAMS and value.isdigit() and 9 <= len(value) <= 11:
+            return int(value)
+    match = EXPIRY_PATH.search(parts.path)
+    return int(match.group(1)) if match else None
+
+
+def info_expiry(info, ttl):
+    """When an info dict should no longer be used: after ttl seconds, or
+    before the first of its format URLs expires"""
+    expires_at = time.time() + ttl
+    for item in [info] + list(info.get('formats') or []):
+        expiry = url_expiry(item.get('url') or '')
+        if expiry:
+            expires_at = min(expires_at, expiry - EXPIRY_MARGIN)
+    return expires_at
+
+
+class InfoCache:
+    """yt-dlp info dicts of single videos, in memory and on disk.
+
+    Entries are keyed by video_key and stored sanitised the way yt-dlp
+    writes --write-info-json, so they can be downloaded from with
+    process_ie_result. Each entry expires after ttl seconds or shortly
+    before its signed format URLs do. Recent entries are kept in memory
+    as JSON text, so every get returns a fresh copy.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                 memory_bytes=DEFAULT_MEMORY_BYTES):
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_bytes = memory_bytes
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def get(self, url):
+        """The info dict of url's video, or None when there is none that is still valid"""
+        key = video_key(url)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            else:
+                row = self._conn.execute('SELECT info, expires_at FROM infos WHERE video_key = ?',
+                                         (key,)).fetchone()
+                if row is None:
+                    return None
+                entry = (row[0], row[1])
+                self._remember(key, entry)
+            if entry[1] <= now:
+                self._forget(key)
+                self._conn.commit()
+                return None
+            self._conn.execute('UPDATE infos SET used_at = ? WHERE video_key = ?', (now, key))
+            self._conn.commit()
+        return json.loads(entry[0])
+
+    def store(self, url, info):
+        """Keep the info dict of a single video, playlists are not cached"""
+        if info is None or info.get('_type', 'video') != 'video':
+            return
+        text = json.dumps(yt_dlp.YoutubeDL.sanitize_info(info, remove_private_keys=True))
+        expires_at = info_expiry(info, self.ttl)
+        if expires_at <= time.time():
+            return
+        key = video_key(url)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO infos (video_key, info, expires_at, used_at) VALUES (?, ?, ?, ?)',
+                (key, text, expires_at, time.time()))
+            self._evict()
+            self._conn.commit()
+            self._remember(key, (text, expires_at))
+
+    def forget(self, url):
+        """Drop url's video, for info whose URLs stopped working"""
+        with self._lock:
+            self._forget(video_key(url))
+            self._conn.commit()
+
+    def _forget(self, key):
+        self._conn.execute('DELETE FROM infos WHERE video_key = ?', (key,))
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key)[0])
+
+    def _remember(self, key, entry):
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key)[0])
+        self._memory[key] = entry
+        self._memory_size += len(entry[0])
+        while self._memory_size > self.memory_bytes and len(self._memory) > 1:
+            self._memory_size -= len(self._memory.popitem(last=False)[1][0])
+
+    def _evict(self):
+        self._conn.execute('DELETE FROM infos WHERE expires_at <= ?', (time.time(),))
+        count = self._conn.execute('SELECT COUNT(*) FROM infos').fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                'DELETE FROM infos WHERE video_key IN '
+                '(SELECT video_key FROM infos ORDER BY used_at LIMIT ?)', (count - self.max_entries,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM infos')
+            self._conn.commit()
+            self._memory.clear()
+            self._memory_size = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def cached_extract_info(url, options, timeout=None):
+    """extract_info that reuses and fills the shared info cache"""
+    info = get_cached_info(url)
+    if info is not None:
+        return info
+
+    info = extract_info(url, options, timeout)
+    cache = get_info_cache()
+    if cache is not None:
+        try:
+            cache.store(url, info)
+        except Exception as e:
+            print(f"Info cache update failed: {str(e)}")
+    return info
+
+
+def get_cached_info(url):
+    """The cached info dict of url's video, or None"""
+    cache = get_info_cache()
+    if cache is None:
+        return None
+    try:
+        return cache.get(url)
+    except Exception as e:
+        print(f"Info cache lookup failed: {str(e)}")
+        return None
+
+
+def forget_info(url):
+    cache = get_info_cache()
+    if cache is not None:
+        try:
+            cache.forget(url)
+        except Exception as e:
+            print(f"Info cache update failed: {str(e)}")
+
+
+def configure_info_cache(enabled, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+    """Open, update or close the shared info cache"""
+    global _cache
+    with _cache_lock:
+        if not enabled:
+            if _cache is not None:
+                _cache.close()
+                _cache = None
+            return
+        if _cache is None:
+            try:
+                _cache = InfoCache(ttl=ttl, max_entries=max_entries)
+            except Exception as e:
+                print(f"Info cache unavailable: {str(e)}")
+                return
+        _cache.ttl = ttl
+        _cache.max_entries = max_entries
+
+
+def get_info_cache():
+    """The shared info cache, or None when it is disabled"""
+    return _cache
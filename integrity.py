@@ -0,0 +1,163 @@
+import base64
+import binascii
+import hashlib
+import heapq
+import os
+import threading
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+DEFAULT_ALGORITHM = 'sha256'
+# Bytes read per call when the hash catches up with data written ahead of it
+CATCH_UP_CHUNK = 1024 * 1024
+
+# Names used by the Digest / Repr-Digest headers for our algorithms
+SERVER_DIGEST_NAMES = {
+    'sha256': 'sha-256',
+    'sha512': 'sha-512',
+}
+
+_algorithm = DEFAULT_ALGORITHM
+_algorithm_lock = threading.Lock()
+
+
+def available_algorithms():
+    algorithms = ['sha256', 'sha512']
+    if xxhash is not None:
+        algorithms += ['xxh64', 'xxh3_128']
+    return algorithms
+
+
+def new_hash(algorithm):
+    if algorithm in ('sha256', 'sha512'):
+        return hashlib.new(algorithm)
+    if algorithm in ('xxh64', 'xxh3_128'):
+        if xxhash is None:
+            raise Exception(f"{algorithm} needs the xxhash package")
+        return getattr(xxhash, algorithm)()
+    raise Exception(f"Unknown hash algorithm: {algorithm}")
+
+
+def set_hash_algorithm(algorithm):
+    """Select the algorithm downloads hash with, None turns hashing off"""
+    global _algorithm
+    if algorithm:
+        new_hash(algorithm)
+    with _algorithm_lock:
+        _algorithm = algorithm or None
+
+
+def hash_algorithm():
+    with _algorithm_lock:
+        return _algorithm
+
+
+class StreamHasher:
+    """Hash a file in order while it is written, possibly out of order.
+
+    update() is called with every piece right after it was written. Pieces
+    at the current position are hashed from memory; pieces further ahead are
+    only remembered, and read back from the file once the hash reaches them,
+    which usually hits the page cache.
+    """
+
+    def __init__(self, algorithm, path=None):
+        self.algorithm = algorithm
+        self.path = path
+        self.position = 0
+        self._hash = new_hash(algorithm)
+        # Heap of (offset, end) of pieces written past the position
+        self._ahead = []
+        self._lock = threading.Lock()
+
+    def add_existing(self, start, end):
+        """Register an inclusive byte range already in the file, e.g. when resuming"""
+        with self._lock:
+            self._remember(start, end - start + 1)
+            self._catch_up()
+
+    def update(self, offset, data):
+        with self._lock:
+            length = len(data)
+            if offset + length <= self.position:
+                return
+            if offset > self.position:
+                self._remember(offset, length)
+                return
+            # Skip bytes already hashed, e.g. when a retried range overlaps
+            self._hash.update(data[self.position - offset:])
+            self.position = offset + length
+            self._catch_up()
+
+    def hexdigest(self):
+        with self._lock:
+            self._catch_up()
+            return self._hash.hexdigest()
+
+    def _remember(self, offset, length):
+        heapq.heappush(self._ahead, (offset, offset + length))
+
+    def _catch_up(self):
+        # Pieces are taken in offset order, and only once the first one reaches the position
+        f = None
+        try:
+            while self._ahead and self._ahead[0][0] <= self.position:
+                end = heapq.heappop(self._ahead)[1]
+                if end <= self.position:
+                    continue
+                if f is None:
+                    f = open(self.path, 'rb')
+                f.seek(self.position)
+                while self.position < end:
+                    data = f.read(min(CATCH_UP_CHUNK, end - self.position))
+                    if not data:
+                        raise Exception("File is shorter than the data written to it")
+                    self._hash.update(data)
+                    self.position += len(data)
+        finally:
+            if f is not None:
+                f.close()
+
+
+def format_digest(algorithm, hexdigest):
+    return f'{algorithm}:{hexdigest}'
+
+
+def server_digests(headers):
+    """Map algorithm -> hex digest from the Digest and Repr-Digest headers"""
+    digests = {}
+    # RFC 3230: Digest: sha-256=<base64>, RFC 9530: Repr-Digest: sha-256=:<base64>:
+    for header in ('digest', 'repr-digest'):
+        for item in (headers.get(header) or '').split(','):
+            name, _, value = item.strip().partition('=')
+            value = value.strip().strip(':')
+            if not name or not value:
+                continue
+            for algorithm, server_name in SERVER_DIGEST_NAMES.items():
+                if name.lower() == server_name:
+                    try:
+                        digests[algorithm] = base64.b64decode(value).hex()
+                    except (binascii.Error, ValueError):
+                        pass
+    return digests
+
+
+def verify(path, hexdigest, algorithm, size, expected_size=None, expected_digests=None):
+    """Raise when size or digest disagree with what the server announced"""
+    if expected_size and size != expected_size:
+        raise Exception(f"Integrity check failed for {path}: "
+                        f"got {size} bytes, expected {expected_size}")
+    expected = (expected_digests or {}).get(algorithm)
+    if expected and hexdigest and expected.lower() != hexdigest.lower():
+        raise Exception(f"Integrity check failed for {path}: {algorithm} mismatch")
+
+
+def write_checksum_file(path, algorithm, hexdigest):
+    """Store the digest next to the file in the format of sha256sum and xxhsum"""
+    checksum_file = f'{path}.{algorithm}'
+    with open(checksum_file, 'w') as f:
+        f.write(f'{hexdigest}  {os.path.basename(path)}\n')
+    return checksum_file
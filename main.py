@@ -1,25 +1,50 @@
+import heapq
+import itertools
 import sys
+import threading
+
+# Headless and daemon modes must not load the Qt GUI or WebEngine, so dispatch before importing them
+if __name__ == "__main__" and '--headless' in sys.argv[1:]:
+    from headless import main as headless_main
+    sys.exit(headless_main(sys.argv[1:]))
+if __name__ == "__main__" and '--daemon' in sys.argv[1:]:
+    from daemon import main as daemon_main
+    sys.exit(daemon_main(sys.argv[1:]))
+
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QLineEdit, QPushButton, QListWidget, 
                             QLabel, QProgressBar, QFileDialog, QMessageBox,
                             QSplitter, QToolButton, QListWidgetItem, QGroupBox, 
-                            QDialog, QComboBox, QSplashScreen, QStyle)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSize, QUrl, QObject, QSettings, QTimer
-from PyQt6.QtGui import QPixmap, QImage, QIcon, QFont, QPalette, QColor, QShortcut, QKeySequence, QAction, QMovie
-from pathlib import Path
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-import re
-import yt_dlp
-import tempfile
+                            QDialog, QComboBox, QSplashScreen, QStyle, QSpinBox,
+                            QAbstractItemView, QCheckBox, QTimeEdit, QInputDialog,
+                            QFormLayout, QDoubleSpinBox, QPlainTextEdit)
+from PyQt6.QtCore import (Qt, QThread, pyqtSignal, QSize, QUrl, QObject, QSettings, QTimer, QTime,
+                          QThreadPool, QPoint, QBuffer, QByteArray, QIODevice)
+from PyQt6.QtGui import QPixmap, QImage, QImageReader, QIcon, QFont, QPalette, QColor, QShortcut, QKeySequence, QAction, QMovie
 from PyQt6.QtGui import QDesktopServices
 import time
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebEngineCore import QWebEnginePage, QWebEngineProfile, QWebEngineSettings
-from urllib3.util.retry import Retry
-from requests.adapters import HTTPAdapter
-from browser_cookie3 import chrome, firefox
+from extractor import scan_url
+from batchscan import (BatchScanner, DEFAULT_BATCH_WORKERS, PAGE_SCANNING, parse_url_list)
+from procpool import DEFAULT_PROCESSES
+from infocache import InfoCache, cached_extract_info, get_info_cache, DEFAULT_TTL as INFO_CACHE_TTL
+from scheduler import (DownloadScheduler, QUEUED, RUNNING, PAUSED, COMPLETED,
+                       FAILED, CANCELLED, DEFAULT_MAX_CONCURRENT, DEFAULT_PER_HOST_LIMIT)
+from transport import get_session
+from progress import ProgressAggregator, SAMPLE_INTERVAL, format_speed, format_eta
+from history import DownloadHistory
+from canonical import VideoUrlSet, youtube_id
+from scancache import (ScanCache, get_scan_cache, DEFAULT_MAX_ENTRIES as SCAN_CACHE_MAX_ENTRIES,
+                       DEFAULT_TTL as SCAN_CACHE_TTL)
+from thumbcache import (ThumbnailCache, configure_thumbnail_cache, get_thumbnail_cache,
+                        DEFAULT_MAX_BYTES as THUMBNAIL_CACHE_MAX_BYTES)
+from appsettings import apply_transfer_settings, crawl_options, queue_limits
+from crawler import (SiteCrawler, DEFAULT_DEPTH, DEFAULT_HOST_DELAY, DEFAULT_MAX_PAGES,
+                     DEFAULT_TIME_BUDGET, DEFAULT_WORKERS, PAGE_FAILED)
+from integrity import DEFAULT_ALGORITHM, available_algorithms
+from profiles import (PROFILES, CUSTOM_PROFILE, DEFAULT_PROFILE, load_custom_profile, save_profile,
+                      ydl_network_options)
 
 class SplashScreen(QSplashScreen):
     def __init__(self):
@@ -226,414 +251,219 @@ class SplashScreen(QSplashScreen):
         y = (screen.height() - self.height()) // 2
         self.move(x, y)
 
-class ThumbnailWorker(QThread):
-    thumbnail_ready = pyqtSignal(QPixmap)
-    title_ready = pyqtSignal(str)
-    error = pyqtSignal(str)
-
-    def __init__(self, url):
-        super().__init__()
-        self.url = url
-
-    def run(self):
+# Threads fetching titles and thumbnails, however many videos are listed
+THUMBNAIL_WORKERS = 4
+# Lower goes first: the selected video's title, rows on screen, the rest in list order
+PRIORITY_PREVIEW = 0
+PRIORITY_VISIBLE = 1
+PRIORITY_NORMAL = 2
+# Size thumbnails are shown, and cached, at in the video list
+THUMBNAIL_SIZE = QSize(160, 90)
+
+def placeholder_image():
+    image = QImage(THUMBNAIL_SIZE, QImage.Format.Format_RGB32)
+    image.fill(Qt.GlobalColor.gray)
+    return image
+
+def decode_thumbnail(data):
+    """Decode image bytes straight to the list size, a null QImage on failure.
+
+    The reader scales while decoding, JPEGs are decoded at a reduced
+    resolution, so the full-size image is never built. Safe off the GUI
+    thread, unlike QPixmap.
+    """
+    buffer = QBuffer()
+    buffer.setData(QByteArray(data))
+    buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+    reader = QImageReader(buffer)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid() and (size.width() > THUMBNAIL_SIZE.width() or size.height() > THUMBNAIL_SIZE.height()):
+        reader.setScaledSize(size.scaled(THUMBNAIL_SIZE, Qt.AspectRatioMode.KeepAspectRatio))
+    return reader.read()
+
+def encode_thumbnail(image):
+    """JPEG bytes of a list-sized thumbnail, for the thumbnail cache"""
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, 'JPG', 90)
+    buffer.close()
+    return bytes(data)
+
+class ThumbnailLoader(QObject):
+    """Fetch titles and thumbnails on a small shared thread pool.
+
+    Requests wait in a priority queue and each pool job takes the most
+    urgent one when it starts, so rows scrolled into view can jump ahead
+    of the queue. Videos in the thumbnail cache are answered right away
+    without any network work. Results are signalled with their URL.
+    """
+    title_ready = pyqtSignal(str, str)
+    thumbnail_ready = pyqtSignal(str, QImage)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, workers=THUMBNAIL_WORKERS, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(workers)
+        self._lock = threading.Lock()
+        self._heap = []
+        # url -> its live heap entry, replaced entries stay in the heap marked dead
+        self._queued = {}
+        self._running = set()
+        self._order = itertools.count()
+        # Breaks ties between a live entry and a dead one with the same priority and order
+        self._pushes = itertools.count()
+
+    def request(self, url, priority=PRIORITY_NORMAL):
+        """Queue url, or move it up if it is queued with a lower priority"""
+        if self.load_cached(url):
+            return
+        with self._lock:
+            if url in self._running:
+                return
+            entry = self._queued.get(url)
+            if entry is not None:
+                if priority < entry[0]:
+                    self._push(url, priority, entry)
+                return
+            self._push(url, priority)
+        self.pool.start(self._run_next)
+
+    def load_cached(self, url):
+        cache = get_thumbnail_cache()
+        if cache is None:
+            return False
         try:
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': True,
-            }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(self.url, download=False)
-                
-                # Get title
-                title = info.get('title', 'Unknown Title')
-                self.title_ready.emit(title)
-                
-                # Get thumbnail
-                thumbnail_url = info.get('thumbnail')
-                if thumbnail_url:
-                    response = requests.get(thumbnail_url)
-                    img = QImage()
-                    img.loadFromData(response.content)
-                    pixmap = QPixmap.fromImage(img)
-                    scaled_pixmap = pixmap.scaled(320, 180, Qt.AspectRatioMode.KeepAspectRatio)
-                    self.thumbnail_ready.emit(scaled_pixmap)
-                else:
-                    self.show_placeholder()
+            entry = cache.get(url)
         except Exception as e:
-            self.error.emit(str(e))
-            self.show_placeholder()
+            print(f"Thumbnail cache lookup failed: {str(e)}")
+            return False
+        if entry is None:
+            return False
+        title, data = entry
+        image = placeholder_image()
+        if data:
+            image = decode_thumbnail(data)
+            if image.isNull():
+                return False
+        self.title_ready.emit(url, title or 'Unknown Title')
+        self.thumbnail_ready.emit(url, image)
+        return True
 
-    def show_placeholder(self):
-        pixmap = QPixmap(320, 180)
-        pixmap.fill(Qt.GlobalColor.gray)
-        self.thumbnail_ready.emit(pixmap)
+    def _push(self, url, priority, replaced=None):
+        if replaced is not None:
+            replaced[3] = None
+        entry = [priority, replaced[1] if replaced else next(self._order), next(self._pushes), url]
+        self._queued[url] = entry
+        heapq.heappush(self._heap, entry)
+
+    def set_priority(self, url, priority):
+        """Change the priority of a queued url, in either direction"""
+        with self._lock:
+            entry = self._queued.get(url)
+            if entry is not None and entry[0] != priority:
+                self._push(url, priority, entry)
+
+    def clear(self):
+        """Drop every queued request, running ones still finish"""
+        with self._lock:
+            self._heap = []
+            self._queued = {}
+
+    def _take(self):
+        with self._lock:
+            while self._heap:
+                url = heapq.heappop(self._heap)[3]
+                if url is not None:
+                    del self._queued[url]
+                    self._running.add(url)
+                    return url
+        return None
 
-class VideoExtractor:
-    @staticmethod
-    def extract_video_urls(page_url):
+    def _run_next(self):
+        url = self._take()
+        if url is None:
+            return
         try:
-            # Check if it's an Instagram URL
-            if 'instagram.com' in page_url:
-                return VideoExtractor.extract_instagram_video(page_url)
-            
-            # Configure session with retries and headers
-            session = requests.Session()
-            session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': '*/*',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate'
-            })
-            
-            # Add retry strategy
-            retries = Retry(
-                total=5,
-                backoff_factor=0.1,
-                status_forcelist=[500, 502, 503, 504]
-            )
-            session.mount('http://', HTTPAdapter(max_retries=retries))
-            session.mount('https://', HTTPAdapter(max_retries=retries))
-
-            # Fetch page content
-            response = session.get(page_url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            video_urls = set()
-            
-            # Enhanced patterns for video URL detection
-            patterns = [
-                # Standard video files
-                r'https?://[^\s<>"\']+?\.(?:mp4|webm|ogg|m3u8)(?:[^\s<>"\']*)?',
-                
-                # Video platforms
-                r'https?://(?:www\.)?youtube\.com/watch\?v=[^\s<>"\']+',
-                r'https?://(?:www\.)?youtu\.be/[^\s<>"\']+',
-                r'https?://(?:www\.)?vimeo\.com/[^\s<>"\']+',
-                r'https?://(?:www\.)?dailymotion\.com/video/[^\s<>"\']+',
-                
-                # Video IDs and embeds
-                r'https?://[^\s<>"\']+?/(?:videos?|media|embed)/[a-zA-Z0-9-_]+',
-                
-                # CDN patterns
-                r'https?://[^\s<>"\']+?\.cdn\.net/[^\s<>"\']+?\.(?:mp4|webm|ogg|m3u8)',
-                
-                # Storage patterns
-                r'https?://[^\s<>"\']+?/storage\d+/[^\s<>"\']+?\.(?:mp4|webm|ogg|m3u8)',
-                
-                # Additional patterns from JS code
-                r'https?://[^\s<>"\']+?/download/[^\s<>"\']+?\.(?:mp4|webm|ogg)',
-                r'https?://[^\s<>"\']+?/files?/[^\s<>"\']+?\.(?:mp4|webm|ogg)'
-            ]
-            
-            # Find video elements in HTML
-            for video in soup.find_all(['video', 'source']):
-                src = video.get('src')
-                if src:
-                    video_urls.add(urljoin(page_url, src))
-                
-                # Check data-src attribute
-                data_src = video.get('data-src')
-                if data_src:
-                    video_urls.add(urljoin(page_url, data_src))
-            
-            # Find iframes that might contain videos
-            for iframe in soup.find_all('iframe'):
-                src = iframe.get('src', '')
-                if any(platform in src.lower() for platform in ['youtube', 'vimeo', 'dailymotion']):
-                    video_urls.add(urljoin(page_url, src))
-            
-            # Search for video URLs in the page source
-            for pattern in patterns:
-                urls = re.findall(pattern, response.text, re.IGNORECASE)
-                for url in urls:
-                    # Clean up the URL
-                    cleaned_url = url.strip("'\"\\;,")
-                    if cleaned_url:
-                        video_urls.add(urljoin(page_url, cleaned_url))
-            
-            # Additional check for JSON data that might contain video URLs
-            json_pattern = r'["\'](https?://[^\s<>"\']+?\.(?:mp4|webm|ogg|m3u8)[^\s<>"\']*)["\']'
-            json_urls = re.findall(json_pattern, response.text)
-            video_urls.update(json_urls)
-            
-            return list(video_urls)
-            
+            self.fetch(url)
         except Exception as e:
-            error_msg = str(e)
-            if isinstance(e, requests.exceptions.ConnectionError):
-                error_msg = "Connection was interrupted. Please check your internet connection and try again."
-            elif isinstance(e, requests.exceptions.Timeout):
-                error_msg = "The connection timed out. Please try again or check your internet connection."
-            elif isinstance(e, requests.exceptions.TooManyRedirects):
-                error_msg = "Too many redirects. The website might be blocking automated access."
-            elif isinstance(e, requests.exceptions.RequestException):
-                error_msg = "Failed to connect to the website. Please check the URL and try again."
-            
-            raise Exception(f"Error extracting videos: {error_msg}")
-
-    @staticmethod
-    def extract_instagram_video(url):
-        try:
-            # Get cookies from browser with better error handling
-            cookies = {}
+            self.failed.emit(url, str(e))
+        finally:
+            with self._lock:
+                self._running.discard(url)
+
+    def fetch(self, url):
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'extract_flat': True,
+            **ydl_network_options(),
+        }
+        
+        # Kept for the preview and the download, runs in a worker process when
+        # the process pool is enabled
+        info = cached_extract_info(url, ydl_opts)
+        title = info.get('title', 'Unknown Title')
+        self.title_ready.emit(url, title)
+        
+        thumbnail_url = info.get('thumbnail')
+        data = None
+        if thumbnail_url:
+            response = get_session().get(thumbnail_url, timeout=30)
+            img = decode_thumbnail(response.content)
+            if not img.isNull():
+                data = encode_thumbnail(img)
+        else:
+            img = placeholder_image()
+        # QPixmaps are only made on the GUI thread
+        self.thumbnail_ready.emit(url, img)
+        
+        # Images that could not be decoded are fetched again next time
+        cache = get_thumbnail_cache()
+        if cache is not None and (data or not thumbnail_url):
             try:
-                try:
-                    chrome_cookies = chrome()
-                    cookies = {cookie.name: cookie.value for cookie in chrome_cookies if '.instagram.com' in cookie.domain}
-                except Exception as chrome_error:
-                    print(f"Chrome cookies error: {str(chrome_error)}")
-                    try:
-                        firefox_cookies = firefox()
-                        cookies = {cookie.name: cookie.value for cookie in firefox_cookies if '.instagram.com' in cookie.domain}
-                    except Exception as firefox_error:
-                        print(f"Firefox cookies error: {str(firefox_error)}")
-                        # Continue without cookies
-                        pass
+                cache.store(url, title, data)
             except Exception as e:
-                print(f"Cookie extraction error: {str(e)}")
-                # Continue without cookies
-                pass
-
-            # Configure yt-dlp options for Instagram
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': True,
-                'format': 'best',
-            }
-
-            # Only add cookie options if we successfully got cookies
-            if cookies:
-                # Create a temporary cookie file
-                with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt') as f:
-                    for name, value in cookies.items():
-                        f.write(f'.instagram.com\tTRUE\t/\tTRUE\t0\t{name}\t{value}\n')
-                    ydl_opts['cookiefile'] = f.name
-
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                try:
-                    info = ydl.extract_info(url, download=False)
-                except Exception as e:
-                    if 'Login required' in str(e):
-                        # If login required, try alternative method
-                        return VideoExtractor.extract_instagram_video_alternative(url, cookies)
-                    raise e
-
-                # Get video URL
-                if info.get('url'):
-                    return [info['url']]
-                elif info.get('entries'):
-                    return [entry['url'] for entry in info['entries'] if entry.get('url')]
-                else:
-                    raise Exception("No video URL found in the Instagram post")
-
-        except Exception as e:
-            if 'Login required' in str(e):
-                raise Exception("This Instagram content requires login. Please log in to Instagram in your browser first.")
-            raise Exception(f"Failed to extract Instagram video: {str(e)}")
-
-    @staticmethod
-    def extract_instagram_video_alternative(url, cookies):
-        try:
-            # Headers to mimic browser
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': '*/*',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate',
-                'Origin': 'https://www.instagram.com',
-                'Referer': 'https://www.instagram.com/',
-            }
-
-            # Create session with cookies
-            session = requests.Session()
-            for name, value in cookies.items():
-                session.cookies.set(name, value, domain='.instagram.com')
-
-            # Get the Instagram post page
-            response = session.get(url, headers=headers)
-            response.raise_for_status()
-
-            # Look for video URLs in the page source
-            video_urls = []
-            
-            # Pattern for video URLs in Instagram's HTML
-            patterns = [
-                r'"video_url":"([^"]+)"',
-                r'"video_versions":\[{"type":\d+,"width":\d+,"height":\d+,"url":"([^"]+)"',
-                r'property="og:video" content="([^"]+)"'
-            ]
-
-            for pattern in patterns:
-                matches = re.findall(pattern, response.text)
-                if matches:
-                    video_urls.extend(matches)
-
-            # Clean up URLs (remove escapes)
-            video_urls = [url.replace('\\u0026', '&') for url in video_urls]
-
-            if not video_urls:
-                raise Exception("No video URLs found in the Instagram post")
-
-            return list(set(video_urls))
-
-        except Exception as e:
-            raise Exception(f"Failed to extract Instagram video using alternative method: {str(e)}")
+                print(f"Thumbnail cache update failed: {str(e)}")
 
 class ScanWorker(QThread):
+    found = pyqtSignal(list)
+    # url, state, videos found on the page, error; only for batches
+    page_changed = pyqtSignal(str, str, list, str)
     finished = pyqtSignal(list)
     error = pyqtSignal(str)
 
-    def __init__(self, url):
+    def __init__(self, urls, crawl=None, force=False, workers=DEFAULT_BATCH_WORKERS):
         super().__init__()
-        self.url = url
+        self.urls = urls
+        self.url = urls[0]
+        # SiteCrawler options, None to scan only these pages
+        self.crawl = crawl
+        # Scan again even if the page is in the scan cache
+        self.force = force
+        self.workers = workers
 
     def run(self):
         try:
-            # Check if direct video URL
-            if any(ext in self.url.lower() for ext in ['.mp4', '.webm', '.ogg']) or \
-               any(site in self.url.lower() for site in ['youtube.com', 'youtu.be', 'vimeo.com']):
-                videos = [self.url]
-            else:
-                videos = VideoExtractor.extract_video_urls(self.url)
-            self.finished.emit(videos)
+            if len(self.urls) > 1:
+                # A failed page is reported with page_changed, the others go on
+                scanner = BatchScanner(self.urls, self.workers, self.crawl, self.force,
+                                       on_found=self.found.emit, on_page=self.report_page)
+                self.finished.emit(scanner.run())
+                return
+            if self.crawl is not None:
+                crawler = SiteCrawler(self.url, on_found=self.found.emit, **self.crawl)
+                self.finished.emit(crawler.run())
+                return
+            # Direct video URLs are used as they are, anything else is scanned
+            self.finished.emit(scan_url(self.url, on_found=self.found.emit, force=self.force))
         except Exception as e:
             self.error.emit(str(e))
 
-class DownloadWorker(QThread):
-    progress = pyqtSignal(float)
-    finished = pyqtSignal()
-    error = pyqtSignal(str)
-
-    def __init__(self, url, output_path):
-        super().__init__()
-        self.url = url
-        self.output_path = output_path
-        self.last_progress = 0
-        
-        # Enhanced session configuration
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': '*/*',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-        })
-        
-        # Configure more robust retry strategy
-        retries = Retry(
-            total=10,
-            backoff_factor=1,
-            status_forcelist=[403, 429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS", "POST"],
-            raise_on_status=False
-        )
-        self.session.mount('http://', HTTPAdapter(max_retries=retries))
-        self.session.mount('https://', HTTPAdapter(max_retries=retries))
-
-    def progress_hook(self, d):
-        if d['status'] == 'downloading':
-            # Calculate download progress
-            if 'total_bytes' in d:
-                # Direct byte calculation
-                progress = (d['downloaded_bytes'] / d['total_bytes']) * 100
-                self.progress.emit(progress)
-            elif 'total_bytes_estimate' in d:
-                # Use estimated total bytes
-                progress = (d['downloaded_bytes'] / d['total_bytes_estimate']) * 100
-                self.progress.emit(progress)
-            elif '_percent_str' in d:
-                # Parse percentage string directly
-                try:
-                    percent_str = d['_percent_str'].strip().replace('%', '')
-                    progress = float(percent_str)
-                    self.progress.emit(progress)
-                except:
-                    pass
-            elif 'downloaded_bytes' in d:
-                # If we only have downloaded bytes, emit -1 to show indeterminate progress
-                self.progress.emit(-1)
-
-        elif d['status'] == 'finished':
-            self.progress.emit(100)
-
-    def run(self):
-        try:
-            print(f"Starting download for URL: {self.url}")
-            
-            # Enhanced yt-dlp options
-            ydl_opts = {
-                'format': 'best',
-                'outtmpl': str(Path(self.output_path) / '%(title)s.%(ext)s'),
-                'progress_hooks': [self.progress_hook],
-                'quiet': False,
-                'no_warnings': False,
-                'extract_flat': False,
-                'socket_timeout': 120,
-                'retries': 30,
-                'fragment_retries': 30,
-                'retry_sleep': lambda n: min(10 + n, 60),
-                'nocheckcertificate': True,
-                'ignoreerrors': True,
-                'no_color': True,
-                'geo_bypass': True,
-                'geo_bypass_country': 'US',
-                # Add these options for better progress reporting
-                'progress_with_newline': True,
-                'force_progress': True,
-            }
-
-            # Try multiple download methods
-            try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([self.url])
-            except Exception as e:
-                print(f"yt-dlp download failed: {str(e)}")
-                print("Attempting direct download...")
-                self.download_direct(self.url)
-                
-            self.finished.emit()
-            
-        except Exception as e:
-            error_msg = f"Download failed: {str(e)}"
-            print(error_msg)
-            self.error.emit(error_msg)
-
-    def download_direct(self, url):
-        try:
-            # Enhanced direct download with chunked transfer
-            response = self.session.get(url, stream=True, timeout=60)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            block_size = 8192
-            downloaded = 0
-            
-            with open(self.output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=block_size):
-                    if chunk:
-                        downloaded += len(chunk)
-                        f.write(chunk)
-                        if total_size:
-                            progress = (downloaded / total_size) * 100
-                            self.progress.emit(progress)
-                            
-        except Exception as e:
-            raise Exception(f"Direct download failed: {str(e)}")
-
-    @staticmethod
-    def sanitize_filename(url):
-        """Sanitize filename from URL"""
-        # Extract filename from URL
-        filename = url.split('/')[-1].split('?')[0]
-        # Remove invalid characters
-        filename = re.sub(r'[<>:"/\\|?*]', '', filename)
-        # Limit length
-        return filename[:50]
+    def report_page(self, url, state, videos, error):
+        self.page_changed.emit(url, state, list(videos), error or '')
 
 class VideoListItemWidget(QWidget):
     thumbnail_loaded = pyqtSignal(bool)
@@ -642,6 +472,7 @@ class VideoListItemWidget(QWidget):
         super().__init__(parent)
         self.url = url
         self.has_thumbnail = False
+        self.title = None
         
         # Remove the forced white text style
         self.setStyleSheet("""
@@ -656,7 +487,7 @@ class VideoListItemWidget(QWidget):
         
         # Thumbnail label
         self.thumbnail_label = QLabel()
-        self.thumbnail_label.setFixedSize(160, 90)  # 16:9 aspect ratio
+        self.thumbnail_label.setFixedSize(THUMBNAIL_SIZE)  # 16:9 aspect ratio
         self.thumbnail_label.setStyleSheet("""
             QLabel {
                 background-color: #2d2d2d;
@@ -744,25 +575,16 @@ class VideoListItemWidget(QWidget):
         layout.addWidget(self.thumbnail_label)
         layout.addWidget(right_container, stretch=1)
         
-        # Start fetching thumbnail and title
-        self.fetch_thumbnail_and_title()
-    
-    def fetch_thumbnail_and_title(self):
-        self.thumbnail_worker = ThumbnailWorker(self.url)
-        self.thumbnail_worker.thumbnail_ready.connect(self.set_thumbnail)
-        self.thumbnail_worker.title_ready.connect(self.set_title)
-        self.thumbnail_worker.error.connect(self.handle_error)
-        self.thumbnail_worker.start()
     
     def set_thumbnail(self, pixmap):
         if not pixmap.isNull():
             self.has_thumbnail = True
-            scaled_pixmap = pixmap.scaled(
-                self.thumbnail_label.size(),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
-            self.thumbnail_label.setPixmap(scaled_pixmap)
+            # Thumbnails arrive at the list size, only larger images are scaled here
+            size = self.thumbnail_label.size()
+            if pixmap.width() > size.width() or pixmap.height() > size.height():
+                pixmap = pixmap.scaled(size, Qt.AspectRatioMode.KeepAspectRatio,
+                                       Qt.TransformationMode.SmoothTransformation)
+            self.thumbnail_label.setPixmap(pixmap)
             self.thumbnail_loaded.emit(True)
         else:
             # Emit False for invalid thumbnails
@@ -770,8 +592,14 @@ class VideoListItemWidget(QWidget):
             self.handle_error("Failed to load thumbnail")
     
     def set_title(self, title):
+        self.title = title
         self.title_label.setText(title)
     
+    def mark_downloaded(self):
+        """Flag a video that is already in the download history"""
+        self.url_label.setText(f"✔ Downloaded before · {self.url}")
+        self.download_button.setToolTip("Download Again")
+    
     def handle_error(self, error):
         self.title_label.setText("Untitled Video")
         self.has_thumbnail = False
@@ -784,6 +612,172 @@ class VideoListItemWidget(QWidget):
     def copy_url(self):
         QApplication.clipboard().setText(self.url)
 
+class DownloadQueueItemWidget(QWidget):
+    pause_requested = pyqtSignal(int)
+    resume_requested = pyqtSignal(int)
+    cancel_requested = pyqtSignal(int)
+    rate_limit_requested = pyqtSignal(int)
+
+    STATE_LABELS = {
+        QUEUED: "Queued",
+        RUNNING: "Downloading",
+        PAUSED: "Paused",
+        COMPLETED: "Completed",
+        FAILED: "Failed",
+        CANCELLED: "Cancelled",
+    }
+
+    def __init__(self, job, parent=None):
+        super().__init__(parent)
+        self.job_id = job.id
+        
+        self.setStyleSheet("""
+            QWidget {
+                background-color: transparent;
+            }
+        """)
+        
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(10, 5, 10, 5)
+        layout.setSpacing(10)
+        
+        # URL and state
+        info_layout = QVBoxLayout()
+        info_layout.setSpacing(2)
+        self.url_label = QLabel(job.url)
+        self.url_label.setStyleSheet("font-size: 12px; background-color: transparent;")
+        self.state_label = QLabel()
+        self.state_label.setStyleSheet("font-size: 11px; background-color: transparent;")
+        info_layout.addWidget(self.url_label)
+        info_layout.addWidget(self.state_label)
+        
+        # Per-job progress
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setFixedWidth(120)
+        self.progress_bar.setTextVisible(True)
+        
+        button_style = """
+            QPushButton {
+                background-color: #526D82;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                padding: 4px;
+                font-size: 12px;
+                min-width: 28px;
+            }
+            QPushButton:hover {
+                background-color: #27374D;
+            }
+        """
+        
+        # Pause/resume toggle and cancel buttons
+        self.pause_button = QPushButton("⏸")
+        self.pause_button.setToolTip("Pause")
+        self.pause_button.setStyleSheet(button_style)
+        self.pause_button.clicked.connect(self.toggle_pause)
+        
+        self.limit_button = QPushButton("🐢")
+        self.limit_button.setToolTip("Limit speed")
+        self.limit_button.setStyleSheet(button_style)
+        self.limit_button.clicked.connect(lambda: self.rate_limit_requested.emit(self.job_id))
+        
+        self.cancel_button = QPushButton("✖")
+        self.cancel_button.setToolTip("Cancel")
+        self.cancel_button.setStyleSheet(button_style)
+        self.cancel_button.clicked.connect(lambda: self.cancel_requested.emit(self.job_id))
+        
+        layout.addLayout(info_layout, stretch=1)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.pause_button)
+        layout.addWidget(self.limit_button)
+        layout.addWidget(self.cancel_button)
+        
+        self.update_job(job)
+
+    def update_job(self, job):
+        self.state = job.state
+        state_text = self.STATE_LABELS.get(job.state, job.state)
+        if job.state == RUNNING and job.stop_event.is_set():
+            state_text = "Stopping..."
+        if job.rate_bucket.rate:
+            state_text = f"{state_text} (max {job.rate_bucket.rate // 1024} KB/s)"
+        if job.error:
+            state_text = f"{state_text}: {job.error}"
+        self.state_text = state_text
+        self.state_label.setText(state_text)
+        self.set_progress(job.progress)
+        
+        paused = job.state in (PAUSED, FAILED)
+        self.pause_button.setText("▶" if paused else "⏸")
+        self.pause_button.setToolTip("Resume" if paused else "Pause")
+        self.pause_button.setEnabled(job.state in (QUEUED, RUNNING, PAUSED, FAILED))
+        self.limit_button.setEnabled(not job.is_finished)
+        self.cancel_button.setEnabled(not job.is_finished)
+
+    def update_sample(self, sample):
+        self.set_progress(sample.percent)
+        self.state_label.setText(
+            f"{self.state_text} • {format_speed(sample.speed)} • ETA {format_eta(sample.eta)}")
+
+    def set_progress(self, progress):
+        if progress < 0:
+            self.progress_bar.setRange(0, 0)
+        else:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(int(max(0, min(100, progress))))
+
+    def toggle_pause(self):
+        if self.state in (PAUSED, FAILED):
+            self.resume_requested.emit(self.job_id)
+        else:
+            self.pause_requested.emit(self.job_id)
+
+class BatchScanDialog(QDialog):
+    """Paste or import a list of page URLs to scan together"""
+
+    def __init__(self, text='', parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Batch Scan")
+        self.setMinimumSize(560, 360)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("One page URL per line, lines starting with # are skipped:"))
+        self.url_edit = QPlainTextEdit()
+        self.url_edit.setPlainText(text)
+        layout.addWidget(self.url_edit)
+
+        button_layout = QHBoxLayout()
+        import_btn = QPushButton("📂 Import List...")
+        import_btn.clicked.connect(self.import_list)
+        scan_btn = QPushButton("🔍 Scan All")
+        scan_btn.clicked.connect(self.accept)
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.reject)
+        button_layout.addWidget(import_btn)
+        button_layout.addStretch()
+        button_layout.addWidget(scan_btn)
+        button_layout.addWidget(cancel_btn)
+        layout.addLayout(button_layout)
+
+    def import_list(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import URL List", "",
+                                              "Text files (*.txt *.csv *.lst);;All files (*)")
+        if not path:
+            return
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Could not read the list: {str(e)}")
+            return
+        current = self.url_edit.toPlainText().rstrip()
+        self.url_edit.setPlainText(f"{current}\n{text}" if current else text)
+
+    def urls(self):
+        return parse_url_list(self.url_edit.toPlainText().splitlines())
+
 class SettingsDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -825,6 +819,241 @@ class SettingsDialog(QDialog):
         theme_layout.addWidget(self.theme_combo)
         theme_group.setLayout(theme_layout)
         
+        # Download Queue Group
+        queue_group = QGroupBox("Download Queue")
+        queue_layout = QVBoxLayout()
+        
+        concurrent_layout = QHBoxLayout()
+        concurrent_layout.addWidget(QLabel("Simultaneous downloads:"))
+        self.max_concurrent_spin = QSpinBox()
+        self.max_concurrent_spin.setRange(1, 32)
+        self.max_concurrent_spin.setValue(
+            self.settings.value('max_concurrent_downloads', DEFAULT_MAX_CONCURRENT, type=int))
+        concurrent_layout.addWidget(self.max_concurrent_spin)
+        
+        per_host_layout = QHBoxLayout()
+        per_host_layout.addWidget(QLabel("Downloads per host:"))
+        self.per_host_spin = QSpinBox()
+        self.per_host_spin.setRange(1, 16)
+        self.per_host_spin.setValue(
+            self.settings.value('max_downloads_per_host', DEFAULT_PER_HOST_LIMIT, type=int))
+        per_host_layout.addWidget(self.per_host_spin)
+        
+        # yt-dlp in worker processes keeps extraction off the GUI process
+        process_layout = QHBoxLayout()
+        self.process_pool_check = QCheckBox("Run yt-dlp in separate processes:")
+        self.process_pool_check.setChecked(self.settings.value('use_process_pool', False, type=bool))
+        self.process_pool_spin = QSpinBox()
+        self.process_pool_spin.setRange(1, 32)
+        self.process_pool_spin.setSuffix(" workers")
+        self.process_pool_spin.setValue(self.settings.value('process_pool_size', DEFAULT_PROCESSES, type=int))
+        process_layout.addWidget(self.process_pool_check)
+        process_layout.addWidget(self.process_pool_spin)
+        
+        self.skip_downloaded_check = QCheckBox("Hide videos that were already downloaded")
+        self.skip_downloaded_check.setChecked(self.settings.value('skip_downloaded_videos', False, type=bool))
+        
+        queue_layout.addLayout(concurrent_layout)
+        queue_layout.addLayout(per_host_layout)
+        queue_layout.addLayout(process_layout)
+        queue_layout.addWidget(self.skip_downloaded_check)
+        queue_group.setLayout(queue_layout)
+        
+        # Bandwidth Group
+        bandwidth_group = QGroupBox("Bandwidth")
+        bandwidth_layout = QVBoxLayout()
+        
+        limit_layout = QHBoxLayout()
+        limit_layout.addWidget(QLabel("Global limit (KB/s, 0 = unlimited):"))
+        self.bandwidth_spin = QSpinBox()
+        self.bandwidth_spin.setRange(0, 10000000)
+        self.bandwidth_spin.setValue(self.settings.value('bandwidth_limit_kbps', 0, type=int))
+        limit_layout.addWidget(self.bandwidth_spin)
+        
+        # Time-of-day window with its own limit
+        self.schedule_check = QCheckBox("Use a different limit between")
+        self.schedule_check.setChecked(self.settings.value('bandwidth_schedule_enabled', False, type=bool))
+        self.schedule_start = QTimeEdit(
+            QTime.fromString(self.settings.value('bandwidth_schedule_start', '09:00'), 'HH:mm'))
+        self.schedule_start.setDisplayFormat('HH:mm')
+        self.schedule_end = QTimeEdit(
+            QTime.fromString(self.settings.value('bandwidth_schedule_end', '18:00'), 'HH:mm'))
+        self.schedule_end.setDisplayFormat('HH:mm')
+        self.schedule_spin = QSpinBox()
+        self.schedule_spin.setRange(0, 10000000)
+        self.schedule_spin.setSuffix(" KB/s")
+        self.schedule_spin.setValue(self.settings.value('bandwidth_schedule_limit_kbps', 0, type=int))
+        
+        schedule_layout = QHBoxLayout()
+        schedule_layout.addWidget(self.schedule_check)
+        schedule_layout.addWidget(self.schedule_start)
+        schedule_layout.addWidget(QLabel("and"))
+        schedule_layout.addWidget(self.schedule_end)
+        schedule_layout.addWidget(self.schedule_spin)
+        
+        bandwidth_layout.addLayout(limit_layout)
+        bandwidth_layout.addLayout(schedule_layout)
+        bandwidth_group.setLayout(bandwidth_layout)
+        
+        # Download Profile Group
+        profile_group = QGroupBox("Download Profile")
+        profile_layout = QFormLayout()
+        
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItems(list(PROFILES) + [CUSTOM_PROFILE])
+        
+        self.fragments_spin = QSpinBox()
+        self.fragments_spin.setRange(1, 64)
+        self.chunk_spin = QSpinBox()
+        self.chunk_spin.setRange(0, 1024)
+        self.chunk_spin.setSuffix(" MB")
+        self.chunk_spin.setSpecialValueText("Whole file")
+        self.buffer_spin = QSpinBox()
+        self.buffer_spin.setRange(1, 65536)
+        self.buffer_spin.setSuffix(" KB")
+        self.timeout_spin = QSpinBox()
+        self.timeout_spin.setRange(5, 600)
+        self.timeout_spin.setSuffix(" s")
+        self.retries_spin = QSpinBox()
+        self.retries_spin.setRange(0, 100)
+        
+        profile_layout.addRow("Profile:", self.profile_combo)
+        profile_layout.addRow("Parallel fragments:", self.fragments_spin)
+        profile_layout.addRow("HTTP chunk size:", self.chunk_spin)
+        profile_layout.addRow("Buffer size:", self.buffer_spin)
+        profile_layout.addRow("Socket timeout:", self.timeout_spin)
+        profile_layout.addRow("Retries:", self.retries_spin)
+        profile_group.setLayout(profile_layout)
+        
+        # Integrity Group
+        integrity_group = QGroupBox("Integrity")
+        integrity_layout = QHBoxLayout()
+        integrity_layout.addWidget(QLabel("Checksum while downloading:"))
+        self.hash_combo = QComboBox()
+        self.hash_combo.addItem("None", "none")
+        for algorithm in available_algorithms():
+            self.hash_combo.addItem(algorithm.upper(), algorithm)
+        index = self.hash_combo.findData(self.settings.value('hash_algorithm', DEFAULT_ALGORITHM))
+        self.hash_combo.setCurrentIndex(max(0, index))
+        integrity_layout.addWidget(self.hash_combo)
+        integrity_group.setLayout(integrity_layout)
+        
+        # Site Crawl Group
+        crawl_group = QGroupBox("Site Crawl")
+        crawl_layout = QFormLayout()
+        
+        self.crawl_depth_spin = QSpinBox()
+        self.crawl_depth_spin.setRange(1, 10)
+        self.crawl_depth_spin.setValue(self.settings.value('crawl_depth', DEFAULT_DEPTH, type=int))
+        self.crawl_pages_spin = QSpinBox()
+        self.crawl_pages_spin.setRange(1, 10000)
+        self.crawl_pages_spin.setValue(self.settings.value('crawl_max_pages', DEFAULT_MAX_PAGES, type=int))
+        self.crawl_time_spin = QSpinBox()
+        self.crawl_time_spin.setRange(10, 86400)
+        self.crawl_time_spin.setSuffix(" s")
+        self.crawl_time_spin.setValue(self.settings.value('crawl_time_budget', DEFAULT_TIME_BUDGET, type=int))
+        self.crawl_delay_spin = QDoubleSpinBox()
+        self.crawl_delay_spin.setRange(0, 60)
+        self.crawl_delay_spin.setSingleStep(0.5)
+        self.crawl_delay_spin.setSuffix(" s")
+        self.crawl_delay_spin.setValue(self.settings.value('crawl_host_delay', DEFAULT_HOST_DELAY, type=float))
+        self.crawl_workers_spin = QSpinBox()
+        self.crawl_workers_spin.setRange(1, 16)
+        self.crawl_workers_spin.setValue(self.settings.value('crawl_workers', DEFAULT_WORKERS, type=int))
+        self.crawl_iframes_check = QCheckBox("Follow iframes on the same site")
+        self.crawl_iframes_check.setChecked(self.settings.value('crawl_follow_iframes', False, type=bool))
+        
+        crawl_layout.addRow("Link depth:", self.crawl_depth_spin)
+        crawl_layout.addRow("Page budget:", self.crawl_pages_spin)
+        crawl_layout.addRow("Time budget:", self.crawl_time_spin)
+        crawl_layout.addRow("Delay per host:", self.crawl_delay_spin)
+        crawl_layout.addRow("Parallel pages:", self.crawl_workers_spin)
+        crawl_layout.addRow(self.crawl_iframes_check)
+        crawl_group.setLayout(crawl_layout)
+        
+        # Batch Scan Group
+        batch_group = QGroupBox("Batch Scan")
+        batch_layout = QHBoxLayout()
+        batch_layout.addWidget(QLabel("Pages scanned at the same time:"))
+        self.batch_workers_spin = QSpinBox()
+        self.batch_workers_spin.setRange(1, 32)
+        self.batch_workers_spin.setValue(
+            self.settings.value('batch_scan_workers', DEFAULT_BATCH_WORKERS, type=int))
+        batch_layout.addWidget(self.batch_workers_spin)
+        batch_group.setLayout(batch_layout)
+        
+        # Scan Cache Group
+        cache_group = QGroupBox("Scan Cache")
+        cache_layout = QFormLayout()
+        
+        self.scan_cache_check = QCheckBox("Reuse the results of recent scans")
+        self.scan_cache_check.setChecked(self.settings.value('scan_cache_enabled', True, type=bool))
+        self.scan_cache_ttl_spin = QSpinBox()
+        self.scan_cache_ttl_spin.setRange(0, 10080)
+        self.scan_cache_ttl_spin.setSuffix(" min")
+        self.scan_cache_ttl_spin.setValue(
+            self.settings.value('scan_cache_ttl_minutes', SCAN_CACHE_TTL // 60, type=int))
+        self.scan_cache_size_spin = QSpinBox()
+        self.scan_cache_size_spin.setRange(10, 1000000)
+        self.scan_cache_size_spin.setSuffix(" pages")
+        self.scan_cache_size_spin.setValue(
+            self.settings.value('scan_cache_max_entries', SCAN_CACHE_MAX_ENTRIES, type=int))
+        clear_cache_btn = QPushButton("Clear Cache")
+        clear_cache_btn.clicked.connect(self.clear_scan_cache)
+        
+        cache_layout.addRow(self.scan_cache_check)
+        cache_layout.addRow("Use without checking for:", self.scan_cache_ttl_spin)
+        cache_layout.addRow("Keep at most:", self.scan_cache_size_spin)
+        cache_layout.addRow(clear_cache_btn)
+        cache_group.setLayout(cache_layout)
+        
+        # Thumbnail Cache Group
+        thumbnail_group = QGroupBox("Thumbnail Cache")
+        thumbnail_layout = QFormLayout()
+        
+        self.thumbnail_cache_check = QCheckBox("Keep titles and thumbnails of listed videos")
+        self.thumbnail_cache_check.setChecked(
+            self.settings.value('thumbnail_cache_enabled', True, type=bool))
+        self.thumbnail_cache_size_spin = QSpinBox()
+        self.thumbnail_cache_size_spin.setRange(1, 100000)
+        self.thumbnail_cache_size_spin.setSuffix(" MB")
+        self.thumbnail_cache_size_spin.setValue(
+            self.settings.value('thumbnail_cache_mb', THUMBNAIL_CACHE_MAX_BYTES // (1024 * 1024), type=int))
+        clear_thumbnails_btn = QPushButton("Clear Cache")
+        clear_thumbnails_btn.clicked.connect(self.clear_thumbnail_cache)
+        
+        thumbnail_layout.addRow(self.thumbnail_cache_check)
+        thumbnail_layout.addRow("Keep at most:", self.thumbnail_cache_size_spin)
+        thumbnail_layout.addRow(clear_thumbnails_btn)
+        thumbnail_group.setLayout(thumbnail_layout)
+        
+        # Video Info Cache Group
+        info_group = QGroupBox("Video Info Cache")
+        info_layout = QFormLayout()
+        
+        self.info_cache_check = QCheckBox("Reuse video details when listing, previewing and downloading")
+        self.info_cache_check.setChecked(self.settings.value('info_cache_enabled', True, type=bool))
+        self.info_cache_ttl_spin = QSpinBox()
+        self.info_cache_ttl_spin.setRange(1, 10080)
+        self.info_cache_ttl_spin.setSuffix(" min")
+        self.info_cache_ttl_spin.setToolTip("Links that expire sooner are refreshed before they expire")
+        self.info_cache_ttl_spin.setValue(
+            self.settings.value('info_cache_ttl_minutes', INFO_CACHE_TTL // 60, type=int))
+        clear_info_btn = QPushButton("Clear Cache")
+        clear_info_btn.clicked.connect(self.clear_info_cache)
+        
+        info_layout.addRow(self.info_cache_check)
+        info_layout.addRow("Keep for at most:", self.info_cache_ttl_spin)
+        info_layout.addRow(clear_info_btn)
+        info_group.setLayout(info_layout)
+        
+        # Custom values are shown even while a preset is selected
+        self.custom_profile = load_custom_profile(self.settings)
+        self.shown_profile = None
+        self.profile_combo.currentTextChanged.connect(self.show_profile)
+        self.profile_combo.setCurrentText(self.settings.value('download_profile', DEFAULT_PROFILE))
+        self.show_profile(self.profile_combo.currentText())
+        
         # Buttons
         button_layout = QHBoxLayout()
         save_btn = QPushButton("Save")
@@ -838,6 +1067,15 @@ class SettingsDialog(QDialog):
         # Add all to main layout
         layout.addWidget(path_group)
         layout.addWidget(theme_group)
+        layout.addWidget(queue_group)
+        layout.addWidget(bandwidth_group)
+        layout.addWidget(profile_group)
+        layout.addWidget(integrity_group)
+        layout.addWidget(crawl_group)
+        layout.addWidget(batch_group)
+        layout.addWidget(cache_group)
+        layout.addWidget(thumbnail_group)
+        layout.addWidget(info_group)
         layout.addLayout(button_layout)
         
         # Apply current theme
@@ -848,10 +1086,106 @@ class SettingsDialog(QDialog):
         if directory:
             self.path_input.setText(directory)
 
+    def clear_scan_cache(self):
+        try:
+            cache = get_scan_cache()
+            if cache is not None:
+                cache.clear()
+            else:
+                # The cache is disabled, clear what an earlier session left
+                cache = ScanCache()
+                cache.clear()
+                cache.close()
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Could not clear the scan cache: {str(e)}")
+            return
+        QMessageBox.information(self, "Scan Cache", "The scan cache was cleared.")
+
+    def clear_thumbnail_cache(self):
+        try:
+            cache = get_thumbnail_cache()
+            if cache is not None:
+                cache.clear()
+            else:
+                # The cache is disabled, clear what an earlier session left
+                cache = ThumbnailCache()
+                cache.clear()
+                cache.close()
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Could not clear the thumbnail cache: {str(e)}")
+            return
+        QMessageBox.information(self, "Thumbnail Cache", "The thumbnail cache was cleared.")
+
+    def clear_info_cache(self):
+        try:
+            cache = get_info_cache()
+            if cache is not None:
+                cache.clear()
+            else:
+                # The cache is disabled, clear what an earlier session left
+                cache = InfoCache()
+                cache.clear()
+                cache.close()
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Could not clear the video info cache: {str(e)}")
+            return
+        QMessageBox.information(self, "Video Info Cache", "The video info cache was cleared.")
+
+    def show_profile(self, name):
+        """Fill the profile fields, only the custom profile can be edited"""
+        if self.shown_profile == CUSTOM_PROFILE:
+            # Keep unsaved custom edits when flipping through the presets
+            self.custom_profile = self.profile_values()
+        self.shown_profile = name
+        profile = PROFILES.get(name, self.custom_profile)
+        self.fragments_spin.setValue(profile['concurrent_fragments'])
+        self.chunk_spin.setValue(profile['http_chunk_size'] // (1024 * 1024))
+        self.buffer_spin.setValue(max(1, profile['buffer_size'] // 1024))
+        self.timeout_spin.setValue(profile['socket_timeout'])
+        self.retries_spin.setValue(profile['retries'])
+        for spin in (self.fragments_spin, self.chunk_spin, self.buffer_spin,
+                     self.timeout_spin, self.retries_spin):
+            spin.setEnabled(name == CUSTOM_PROFILE)
+
+    def profile_values(self):
+        return {
+            'concurrent_fragments': self.fragments_spin.value(),
+            'http_chunk_size': self.chunk_spin.value() * 1024 * 1024,
+            'buffer_size': self.buffer_spin.value() * 1024,
+            'socket_timeout': self.timeout_spin.value(),
+            'retries': self.retries_spin.value(),
+        }
+
     def save_settings(self):
         # Save settings
         self.settings.setValue('default_output_path', self.path_input.text())
         self.settings.setValue('theme', self.theme_combo.currentText())
+        self.settings.setValue('max_concurrent_downloads', self.max_concurrent_spin.value())
+        self.settings.setValue('max_downloads_per_host', self.per_host_spin.value())
+        self.settings.setValue('skip_downloaded_videos', self.skip_downloaded_check.isChecked())
+        self.settings.setValue('use_process_pool', self.process_pool_check.isChecked())
+        self.settings.setValue('process_pool_size', self.process_pool_spin.value())
+        self.settings.setValue('bandwidth_limit_kbps', self.bandwidth_spin.value())
+        self.settings.setValue('bandwidth_schedule_enabled', self.schedule_check.isChecked())
+        self.settings.setValue('bandwidth_schedule_start', self.schedule_start.time().toString('HH:mm'))
+        self.settings.setValue('bandwidth_schedule_end', self.schedule_end.time().toString('HH:mm'))
+        self.settings.setValue('bandwidth_schedule_limit_kbps', self.schedule_spin.value())
+        save_profile(self.settings, self.profile_combo.currentText(), self.profile_values())
+        self.settings.setValue('hash_algorithm', self.hash_combo.currentData())
+        self.settings.setValue('crawl_depth', self.crawl_depth_spin.value())
+        self.settings.setValue('crawl_max_pages', self.crawl_pages_spin.value())
+        self.settings.setValue('crawl_time_budget', self.crawl_time_spin.value())
+        self.settings.setValue('crawl_host_delay', self.crawl_delay_spin.value())
+        self.settings.setValue('crawl_workers', self.crawl_workers_spin.value())
+        self.settings.setValue('crawl_follow_iframes', self.crawl_iframes_check.isChecked())
+        self.settings.setValue('scan_cache_enabled', self.scan_cache_check.isChecked())
+        self.settings.setValue('scan_cache_ttl_minutes', self.scan_cache_ttl_spin.value())
+        self.settings.setValue('scan_cache_max_entries', self.scan_cache_size_spin.value())
+        self.settings.setValue('batch_scan_workers', self.batch_workers_spin.value())
+        self.settings.setValue('thumbnail_cache_enabled', self.thumbnail_cache_check.isChecked())
+        self.settings.setValue('thumbnail_cache_mb', self.thumbnail_cache_size_spin.value())
+        self.settings.setValue('info_cache_enabled', self.info_cache_check.isChecked())
+        self.settings.setValue('info_cache_ttl_minutes', self.info_cache_ttl_spin.value())
         self.accept()
 
     def apply_theme(self, theme_name):
@@ -936,6 +1270,8 @@ class SettingsDialog(QDialog):
             self.setStyleSheet(themes[theme_name])
 
 class VideoDownloaderApp(QMainWindow):
+    job_changed = pyqtSignal(object)
+
     def __init__(self):
         super().__init__()
 
@@ -1095,15 +1431,37 @@ class VideoDownloaderApp(QMainWindow):
         self.scan_button.setMinimumHeight(40)
         self.scan_button.clicked.connect(self.scan_videos)
         
+        # Follow same-site links from the page, limits are in the settings
+        self.crawl_check = QCheckBox("Crawl site")
+        self.crawl_check.setToolTip("Also scan the pages this page links to on the same site")
+        self.crawl_check.toggled.connect(lambda checked: self.settings.setValue('crawl_site', checked))
+        
+        # Several pages at once, pasted or imported
+        self.batch_button = QPushButton("📋 Batch")
+        self.batch_button.setMinimumHeight(40)
+        self.batch_button.setToolTip("Scan a list of pages at the same time")
+        self.batch_button.clicked.connect(lambda: self.show_batch_scan())
+        
         url_layout.addWidget(self.url_input)
+        url_layout.addWidget(self.crawl_check)
         url_layout.addWidget(self.scan_button)
+        url_layout.addWidget(self.batch_button)
         url_group.setLayout(url_layout)
         
         # Found Videos Group
         videos_group = QGroupBox("Found Videos")
         videos_layout = QVBoxLayout()
         self.video_list = QListWidget()
+        self.video_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         videos_layout.addWidget(self.video_list)
+        
+        # State of each page of a batch scan, hidden for single pages
+        self.page_list = QListWidget()
+        self.page_list.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.page_list.setMaximumHeight(120)
+        self.page_list.hide()
+        self.page_items = {}
+        videos_layout.addWidget(self.page_list)
         videos_group.setLayout(videos_layout)
         
         # Download Options Group
@@ -1171,10 +1529,63 @@ class VideoDownloaderApp(QMainWindow):
         download_layout.addLayout(progress_layout)
         download_group.setLayout(download_layout)
         
+        # Download Queue Group
+        queue_group = QGroupBox("Download Queue")
+        queue_layout = QVBoxLayout()
+        self.queue_list = QListWidget()
+        self.queue_list.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.queue_items = {}
+        
+        clear_finished_button = QPushButton("🧹 Clear Finished")
+        clear_finished_button.clicked.connect(self.clear_finished_downloads)
+        
+        queue_layout.addWidget(self.queue_list)
+        queue_layout.addWidget(clear_finished_button)
+        queue_group.setLayout(queue_layout)
+        
+        # Completed downloads are remembered so rescans can tell what is new
+        try:
+            self.history = DownloadHistory()
+        except Exception as e:
+            print(f"Download history unavailable: {str(e)}")
+            self.history = None
+        
+        # Videos already in the list while a scan is running
+        self.scanning = False
+        self.shown_videos = VideoUrlSet()
+        self.pending_thumbnails = 0
+        
+        # Titles and thumbnails come from one bounded pool, rows on screen first
+        self.thumbnail_loader = ThumbnailLoader(parent=self)
+        self.thumbnail_loader.title_ready.connect(self.handle_title_ready)
+        self.thumbnail_loader.thumbnail_ready.connect(self.handle_thumbnail_ready)
+        self.thumbnail_loader.failed.connect(self.handle_thumbnail_failed)
+        # Rows waiting for their thumbnail, by URL
+        self.thumbnail_rows = {}
+        self.visible_urls = set()
+        self.preview_url = None
+        self.visible_timer = QTimer(self)
+        self.visible_timer.setSingleShot(True)
+        self.visible_timer.setInterval(50)
+        self.visible_timer.timeout.connect(self.prioritize_visible_rows)
+        self.video_list.verticalScrollBar().valueChanged.connect(self.visible_timer.start)
+        
+        # Scheduler runs queued downloads on its own threads, updates arrive via job_changed
+        self.download_scheduler = DownloadScheduler(listener=self.job_changed.emit,
+                                                    history=self.history)
+        self.job_changed.connect(self.handle_job_changed)
+        
+        # Byte counters of running jobs are sampled at a fixed rate, one batched update per tick
+        self.progress_aggregator = ProgressAggregator()
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(int(SAMPLE_INTERVAL * 1000))
+        self.progress_timer.timeout.connect(self.refresh_progress)
+        
         # Add all groups to left layout
         left_layout.addWidget(url_group)
         left_layout.addWidget(videos_group)
         left_layout.addWidget(download_group)
+        left_layout.addWidget(queue_group)
         
         # Right side: web view container with title bar
         web_container = QWidget()
@@ -1443,28 +1854,100 @@ class VideoDownloaderApp(QMainWindow):
         if directory:
             self.path_input.setText(directory)
 
-    def scan_videos(self):
+    def scan_videos(self, checked=False, force=False):
         url = self.url_input.text().strip()
         if not url:
             QMessageBox.warning(self, "Error", "Please enter a URL")
             return
+        self.start_scan([url], force)
+
+    def show_batch_scan(self, text=''):
+        dialog = BatchScanDialog(text, self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        urls = dialog.urls()
+        if not urls:
+            QMessageBox.warning(self, "Error", "Please enter at least one URL")
+            return
+        self.url_input.setText(urls[0])
+        self.start_scan(urls)
+
+    def start_scan(self, urls, force=False):
+        """Scan one page, or several at the same time with a status line for each"""
+        if self.scanning:
+            QMessageBox.information(self, "Scan Running", "Please wait for the current scan to finish.")
+            return
         
         self.scan_button.setEnabled(False)
-        self.progress_bar.setRange(0, 0)
+        self.batch_button.setEnabled(False)
         self.video_list.clear()
-        
-        self.scan_worker = ScanWorker(url)
+        self.page_list.clear()
+        self.page_items = {}
+        if len(urls) > 1:
+            for url in urls:
+                item = QListWidgetItem(f"⏳ {url}")
+                self.page_list.addItem(item)
+                self.page_items[url] = item
+            self.page_list.show()
+            self.progress_bar.setRange(0, len(urls))
+            self.progress_bar.setValue(0)
+        else:
+            self.page_list.hide()
+            self.progress_bar.setRange(0, 0)
+        
+        self.scanning = True
+        self.shown_videos = VideoUrlSet()
+        self.pending_thumbnails = 0
+        self.thumbnail_loader.clear()
+        self.thumbnail_rows = {}
+        self.visible_urls = set()
+        
+        crawl = crawl_options(self.settings) if self.crawl_check.isChecked() else None
+        workers = self.settings.value('batch_scan_workers', DEFAULT_BATCH_WORKERS, type=int)
+        self.scan_worker = ScanWorker(urls, crawl, force, workers)
+        self.scan_worker.found.connect(self.add_videos)
+        self.scan_worker.page_changed.connect(self.update_page_status)
         self.scan_worker.finished.connect(self.scan_complete)
-        self.scan_worker.error.connect(self.show_error)
+        self.scan_worker.error.connect(self.scan_failed)
         self.scan_worker.start()
 
-    def scan_complete(self, videos):
-        self.video_list.clear()
-        self.pending_thumbnails = len(videos)
+    def update_page_status(self, url, state, videos, error):
+        item = self.page_items.get(url)
+        if item is None:
+            return
+        if state == PAGE_SCANNING:
+            item.setText(f"🔄 {url}")
+            return
+        if state == PAGE_FAILED:
+            item.setText(f"❌ {url}: {error}")
+            item.setToolTip(error)
+        else:
+            item.setText(f"✅ {url}: {len(videos)} video{'s' if len(videos) != 1 else ''}")
+        self.progress_bar.setValue(self.progress_bar.value() + 1)
+
+    def add_videos(self, videos):
+        """Add the videos not in the list yet, called while the page is scanned"""
+        # URLs of a video that is listed already are dropped before any
+        # thumbnail or extraction work starts
+        videos = self.shown_videos.add(videos)
+        if not videos:
+            return
+        
+        known = set()
+        if self.history is not None:
+            try:
+                known = self.history.known_urls(videos)
+            except Exception as e:
+                print(f"Download history lookup failed: {str(e)}")
+        if known and self.settings.value('skip_downloaded_videos', False, type=bool):
+            videos = [url for url in videos if url not in known]
+        self.pending_thumbnails += len(videos)
         
         for url in videos:
             item = QListWidgetItem(self.video_list)
             widget = VideoListItemWidget(url)
+            if url in known:
+                widget.mark_downloaded()
             # Connect thumbnail_loaded signal to handle_thumbnail_loaded
             widget.thumbnail_loaded.connect(lambda success, item=item: 
                 self.handle_thumbnail_loaded(success, item))
@@ -1472,10 +1955,72 @@ class VideoDownloaderApp(QMainWindow):
             item.setSizeHint(widget.sizeHint())
             self.video_list.addItem(item)
             self.video_list.setItemWidget(item, widget)
+            self.thumbnail_rows[url] = widget
+            self.thumbnail_loader.request(url)
+        self.visible_timer.start()
+
+    def prioritize_visible_rows(self):
+        """Move the rows on screen to the front of the thumbnail queue"""
+        count = self.video_list.count()
+        if count == 0:
+            return
+        viewport = self.video_list.viewport()
+        first = self.video_list.indexAt(QPoint(0, 0)).row()
+        last = self.video_list.indexAt(QPoint(0, viewport.height() - 1)).row()
+        first = max(first, 0)
+        last = count - 1 if last < 0 else last
+        
+        visible = set()
+        for row in range(first, last + 1):
+            widget = self.video_list.itemWidget(self.video_list.item(row))
+            if widget is not None and widget.url in self.thumbnail_rows:
+                visible.add(widget.url)
+        for url in self.visible_urls - visible:
+            self.thumbnail_loader.set_priority(url, PRIORITY_NORMAL)
+        for url in visible:
+            self.thumbnail_loader.set_priority(url, PRIORITY_VISIBLE)
+        self.visible_urls = visible
+
+    def handle_title_ready(self, url, title):
+        widget = self.thumbnail_rows.get(url)
+        if widget is not None:
+            widget.set_title(title)
+        if url == self.preview_url:
+            self.set_title(title)
+
+    def handle_thumbnail_ready(self, url, image):
+        widget = self.thumbnail_rows.pop(url, None)
+        self.visible_urls.discard(url)
+        if widget is not None:
+            widget.set_thumbnail(QPixmap.fromImage(image))
+
+    def handle_thumbnail_failed(self, url, error):
+        widget = self.thumbnail_rows.pop(url, None)
+        self.visible_urls.discard(url)
+        if widget is not None:
+            widget.handle_error(error)
+        if url == self.preview_url:
+            self.show_preview_error(error)
+
+    def scan_complete(self, videos):
+        # Most videos were added while scanning, this adds the rest
+        self.add_videos(videos)
+        self.scanning = False
         
         self.scan_button.setEnabled(True)
+        self.batch_button.setEnabled(True)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        if self.shown_videos and self.pending_thumbnails == 0 and self.video_list.count() == 0:
+            QMessageBox.information(self, "No Videos", "No videos with valid thumbnails found.")
+    
+    def scan_failed(self, error_message):
+        self.scanning = False
+        self.scan_button.setEnabled(True)
+        self.batch_button.setEnabled(True)
         self.progress_bar.setRange(0, 100)
         self.progress_bar.setValue(0)
+        self.show_error(error_message)
     
     def download_video(self, url):
         output_path = self.path_input.text()
@@ -1483,14 +2028,7 @@ class VideoDownloaderApp(QMainWindow):
             QMessageBox.warning(self, "Error", "Please select an output directory")
             return
         
-        self.download_button.setEnabled(False)
-        self.progress_bar.setValue(0)
-        
-        self.download_worker = DownloadWorker(url, output_path)
-        self.download_worker.progress.connect(self.update_progress)
-        self.download_worker.finished.connect(self.download_complete)
-        self.download_worker.error.connect(self.show_error)
-        self.download_worker.start()
+        self.download_scheduler.submit(url, output_path)
 
     def start_download(self):
         selected_items = self.video_list.selectedItems()
@@ -1503,29 +2041,83 @@ class VideoDownloaderApp(QMainWindow):
             QMessageBox.warning(self, "Error", "Please select an output directory")
             return
         
-        # Get URL from the widget
-        widget = self.video_list.itemWidget(selected_items[0])
-        url = widget.url
+        # Queue every selected video, the scheduler limits how many run at once
+        for item in selected_items:
+            widget = self.video_list.itemWidget(item)
+            self.download_scheduler.submit(widget.url, output_path)
+
+    def handle_job_changed(self, job):
+        widget = self.queue_items.get(job.id)
+        if widget is None:
+            item = QListWidgetItem(self.queue_list)
+            widget = DownloadQueueItemWidget(job)
+            widget.pause_requested.connect(self.download_scheduler.pause)
+            widget.resume_requested.connect(self.download_scheduler.resume)
+            widget.cancel_requested.connect(self.download_scheduler.cancel)
+            widget.rate_limit_requested.connect(self.limit_job_speed)
+            item.setSizeHint(widget.sizeHint())
+            self.queue_list.addItem(item)
+            self.queue_list.setItemWidget(item, widget)
+            self.queue_items[job.id] = widget
+            previous_state = None
+        else:
+            previous_state = widget.state
         
-        # Reset progress indicators
-        self.progress_bar.setValue(0)
-        self.progress_label.setText("0.00%")
-        self.download_button.setEnabled(False)
+        widget.update_job(job)
+        
+        # Signals are queued, so only react the first time a job reaches its final state
+        if previous_state != job.state:
+            if job.state == COMPLETED:
+                self.download_complete()
+            elif job.state == FAILED:
+                self.show_error(job.error)
         
-        # Create and start download worker
-        self.download_worker = DownloadWorker(url, output_path)
-        self.download_worker.progress.connect(self.update_progress)
-        self.download_worker.finished.connect(self.download_complete)
-        self.download_worker.error.connect(self.show_error)
-        self.download_worker.start()
+        if job.state == RUNNING and not self.progress_timer.isActive():
+            self.progress_timer.start()
 
-    def update_progress(self, progress):
+    def refresh_progress(self):
+        samples = self.progress_aggregator.sample(self.download_scheduler.progress_counters())
+        if not samples:
+            self.progress_timer.stop()
+            return
+        
+        for sample in samples:
+            widget = self.queue_items.get(sample.key)
+            if widget is not None:
+                widget.update_sample(sample)
+        
+        progress, speed, eta = self.progress_aggregator.combine(samples)
+        self.update_progress(progress, speed, eta)
+
+    def limit_job_speed(self, job_id):
+        job = self.download_scheduler.get(job_id)
+        if not job:
+            return
+        limit, ok = QInputDialog.getInt(self, "Limit Speed", "Maximum speed for this download (KB/s, 0 = unlimited):",
+                                        job.rate_bucket.rate // 1024, 0, 10000000)
+        if ok:
+            self.download_scheduler.set_job_rate_limit(job_id, limit * 1024)
+
+    def clear_finished_downloads(self):
+        self.download_scheduler.clear_finished()
+        for row in reversed(range(self.queue_list.count())):
+            item = self.queue_list.item(row)
+            widget = self.queue_list.itemWidget(item)
+            if self.download_scheduler.get(widget.job_id) is None:
+                del self.queue_items[widget.job_id]
+                self.queue_list.takeItem(row)
+
+    def update_progress(self, progress, speed=None, eta=None):
         """Update progress bar and label with precise percentage"""
         try:
+            details = ""
+            if speed is not None:
+                details = f" • {format_speed(speed)} • ETA {format_eta(eta)}"
+            
             if progress < 0:
                 # Show indeterminate progress
                 self.progress_bar.setRange(0, 0)
-                self.progress_label.setText("Downloading...")
+                self.progress_label.setText(f"Downloading...{details}")
             else:
                 # Ensure progress bar has proper range
                 if self.progress_bar.maximum() == 0:
@@ -1538,22 +2130,24 @@ class VideoDownloaderApp(QMainWindow):
                 self.progress_bar.setValue(int(progress))
                 
                 # Update label with 2 decimal precision
-                self.progress_label.setText(f"{progress:.2f}%")
-            
-            # Force immediate update
-            QApplication.processEvents()
+                self.progress_label.setText(f"{progress:.2f}%{details}")
             
         except Exception as e:
             print(f"Error updating progress: {str(e)}")
 
     def download_complete(self):
-        self.download_button.setEnabled(True)
+        # Only report once the whole queue has drained
+        if any(job.is_active for job in self.download_scheduler.jobs()):
+            return
+        if self.progress_bar.maximum() == 0:
+            self.progress_bar.setRange(0, 100)
         self.progress_bar.setValue(100)  # Set to 100 instead of 1000
         self.progress_label.setText("100.00%")
         QMessageBox.information(self, "Success", "Download completed!")
 
     def show_error(self, error_message):
-        self.download_button.setEnabled(True)
+        if self.progress_bar.maximum() == 0:
+            self.progress_bar.setRange(0, 100)
         self.progress_bar.setValue(0)
         self.progress_label.setText("0.00%")
         QMessageBox.critical(self, "Error", error_message)
@@ -1568,24 +2162,16 @@ class VideoDownloaderApp(QMainWindow):
             # Load URL directly in web view
             self.web_view.setUrl(QUrl(url))
             
-            # Get title using yt-dlp
-            self.thumbnail_worker = ThumbnailWorker(url)
-            self.thumbnail_worker.title_ready.connect(self.set_title)
-            self.thumbnail_worker.error.connect(self.show_preview_error)
-            self.thumbnail_worker.start()
+            # The row's title, or ask yt-dlp ahead of every other row
+            self.preview_url = url
+            if widget.title:
+                self.set_title(widget.title)
+            else:
+                self.thumbnail_loader.request(url, PRIORITY_PREVIEW)
     
     def extract_youtube_id(self, url):
         # Extract YouTube video ID from various YouTube URL formats
-        patterns = [
-            r'(?:youtube\.com/watch\?v=|youtu\.be/)([^&\n?#]+)',
-            r'youtube.com/embed/([^&\n?#]+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        return None
+        return youtube_id(url)
 
     def set_title(self, title):
         self.title_label.setText(title)
@@ -1624,17 +2210,22 @@ class VideoDownloaderApp(QMainWindow):
 
     def dropEvent(self, event):
         if event.mimeData().hasUrls():
-            url = event.mimeData().urls()[0].toString()
-            self.url_input.setText(url)
-            self.scan_videos()
+            self.scan_text('\n'.join(url.toString() for url in event.mimeData().urls()))
         elif event.mimeData().hasText():
-            self.url_input.setText(event.mimeData().text())
-            self.scan_videos()
+            self.scan_text(event.mimeData().text())
 
     def paste_url(self):
         """Handle URL pasting"""
         clipboard = QApplication.clipboard()
-        self.url_input.setText(clipboard.text())
+        self.scan_text(clipboard.text())
+
+    def scan_text(self, text):
+        """Scan a pasted or dropped URL, several URLs open the batch scan"""
+        urls = parse_url_list(text.splitlines())
+        if len(urls) > 1:
+            self.show_batch_scan('\n'.join(urls))
+            return
+        self.url_input.setText(text)
         self.scan_videos()
 
     def handle_thumbnail_loaded(self, success, item):
@@ -1644,7 +2235,7 @@ class VideoDownloaderApp(QMainWindow):
             self.video_list.takeItem(row)
         
         self.pending_thumbnails -= 1
-        if self.pending_thumbnails == 0:
+        if self.pending_thumbnails == 0 and not self.scanning:
             # All thumbnails processed
             if self.video_list.count() == 0:
                 QMessageBox.information(self, "No Videos", "No videos with valid thumbnails found.")
@@ -1662,6 +2253,18 @@ class VideoDownloaderApp(QMainWindow):
         settings_action.triggered.connect(self.show_settings)
         file_menu.addAction(settings_action)
         
+        # Rescan action, bypasses the scan cache
+        rescan_action = QAction('Rescan Page (Ignore Cache)', self)
+        rescan_action.setShortcut('Ctrl+Shift+R')
+        rescan_action.triggered.connect(lambda: self.scan_videos(force=True))
+        file_menu.addAction(rescan_action)
+        
+        # Batch scan action, for pasted or imported lists of pages
+        batch_action = QAction('Batch Scan...', self)
+        batch_action.setShortcut('Ctrl+B')
+        batch_action.triggered.connect(lambda: self.show_batch_scan())
+        file_menu.addAction(batch_action)
+        
         # Exit action
         exit_action = QAction(QIcon.fromTheme('exit'), 'Exit', self)
         exit_action.setShortcut('Ctrl+Q')
@@ -1681,6 +2284,14 @@ class VideoDownloaderApp(QMainWindow):
         
         theme = self.settings.value('theme', 'Light')
         self.apply_theme(theme)
+        
+        self.crawl_check.setChecked(self.settings.value('crawl_site', False, type=bool))
+        configure_thumbnail_cache(
+            self.settings.value('thumbnail_cache_enabled', True, type=bool),
+            self.settings.value('thumbnail_cache_mb', THUMBNAIL_CACHE_MAX_BYTES // (1024 * 1024),
+                                type=int) * 1024 * 1024)
+        self.download_scheduler.set_limits(*queue_limits(self.settings))
+        apply_transfer_settings(self.settings)
 
     def apply_theme(self, theme_name):
         themes = {
@@ -1970,56 +2581,6 @@ class CustomWebPage(QWebEnginePage):
         # Log JavaScript console messages for debugging
         print(f"JS Console ({level}): {message} [line {line}] {source}")
 
-class VideoDownloader(QObject):
-    finished = pyqtSignal()
-    progress = pyqtSignal(float)
-    error_signal = pyqtSignal(str)
-
-    def __init__(self, url, save_path):
-        super().__init__()
-        self.url = url
-        self.save_path = save_path
-
-    def run(self):
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': '*/*',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Referer': self.url.split('/get_file/')[0],
-                'Sec-Fetch-Dest': 'video',
-                'Sec-Fetch-Mode': 'no-cors',
-                'Sec-Fetch-Site': 'same-origin',
-            }
-
-            session = requests.Session()
-            
-            # Get file size
-            response = session.head(self.url, headers=headers, allow_redirects=True)
-            total_size = int(response.headers.get('content-length', 0))
-
-            # Download with proper headers and streaming
-            response = session.get(self.url, headers=headers, stream=True)
-            response.raise_for_status()
-
-            downloaded_size = 0
-            with open(self.save_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        downloaded_size += len(chunk)
-                        f.write(chunk)
-                        if total_size:
-                            progress = (downloaded_size / total_size) * 100
-                            self.progress.emit(progress)
-
-            self.finished.emit()
-
-        except Exception as e:
-            self.error_signal.emit(str(e))
-        finally:
-            self.finished.emit()
-
 def main():
     app = QApplication(sys.argv)
     
@@ -0,0 +1,174 @@
+import codecs
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from canonical import VideoUrlSet
+from urlscan import StreamScan
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# Bytes read from the connection at a time
+CHUNK_SIZE = 64 * 1024
+
+# Characters fed to one lxml parser before it is replaced
+LXML_RESTART_CHARS = 4 * 1024 * 1024
+
+# Only these tags are looked at, everything else is skipped by the parser
+MEDIA_TAGS = ('video', 'source', 'iframe')
+EMBED_PLATFORMS = ['youtube', 'vimeo', 'dailymotion']
+
+# Tags whose targets are reported to on_link, for crawling
+LINK_TAGS = ('a', 'iframe')
+
+
+def media_tag_urls(tag, attrs, page_url):
+    """Video URLs of one video, source or iframe tag"""
+    if tag == 'iframe':
+        # Iframes that might contain videos
+        src = attrs.get('src') or ''
+        if any(platform in src.lower() for platform in EMBED_PLATFORMS):
+            return [urljoin(page_url, src)]
+        return []
+    # The src and data-src attributes of video elements
+    return [urljoin(page_url, attrs[key]) for key in ('src', 'data-src') if attrs.get(key)]
+
+
+class MediaTagParser(HTMLParser):
+    """Incremental parser that reports the given tags and builds no tree"""
+
+    def __init__(self, on_tag, tags=MEDIA_TAGS):
+        super().__init__(convert_charrefs=True)
+        self.on_tag = on_tag
+        self.tags = tags
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.tags:
+            self.on_tag(tag, dict(attrs))
+
+
+class LxmlMediaTarget:
+    """Parser target for lxml, which is much faster than html.parser"""
+
+    def __init__(self, on_tag, tags):
+        self.on_tag = on_tag
+        self.tags = tags
+
+    def start(self, tag, attrib):
+        if tag in self.tags:
+            self.on_tag(tag, dict(attrib))
+
+    def close(self):
+        return None
+
+
+class LxmlTagParser:
+    """Incremental lxml parsing with flat memory.
+
+    libxml2 keeps everything a push parser was fed until it is closed, so
+    the parser is replaced by a fresh one at the end of a tag every
+    LXML_RESTART_CHARS characters.
+    """
+
+    def __init__(self, on_tag, tags=MEDIA_TAGS):
+        self.on_tag = on_tag
+        self.tags = tags
+        self._start()
+
+    def _start(self):
+        self.parser = etree.HTMLParser(target=LxmlMediaTarget(self.on_tag, self.tags))
+        self.fed = 0
+
+    def feed(self, text):
+        if self.fed + len(text) > LXML_RESTART_CHARS:
+            cut = text.rfind('>') + 1
+            if cut:
+                self.parser.feed(text[:cut])
+                self.close()
+                self._start()
+                text = text[cut:]
+        if text:
+            self.parser.feed(text)
+            self.fed += len(text)
+
+    def close(self):
+        try:
+            self.parser.close()
+        except etree.XMLSyntaxError:
+            # Raised for a parser that was fed no markup, there are no tags to miss
+            pass
+
+
+def new_tag_parser(on_tag, tags=MEDIA_TAGS):
+    """The fastest incremental HTML parser installed, fed with feed() and close()"""
+    if etree is not None:
+        return LxmlTagParser(on_tag, tags)
+    return MediaTagParser(on_tag, tags)
+
+
+class PageScan:
+    """Scan a page for video URLs while it downloads.
+
+    The body is decoded chunk by chunk and fed both to an HTML parser that
+    only reports media tags and to the URL scanner, so memory stays flat
+    on very large pages. URLs are reported as soon as they are found.
+    With on_link, the targets of links and iframes are reported as well.
+    """
+
+    def __init__(self, page_url, encoding=None, on_found=None, on_link=None):
+        self.page_url = page_url
+        self.on_found = on_found
+        self.on_link = on_link
+        # Each video once, however many URLs of it the page has
+        self.videos = VideoUrlSet()
+        self.video_urls = []
+        # Without a charset in the headers the page can't be sniffed whole
+        try:
+            self.decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        except LookupError:
+            self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.url_scan = StreamScan(page_url)
+        self.parser = new_tag_parser(self.handle_tag, MEDIA_TAGS + LINK_TAGS if on_link else MEDIA_TAGS)
+        self._tag_urls = []
+
+    def handle_tag(self, tag, attrs):
+        if self.on_link and tag in LINK_TAGS:
+            target = attrs.get('href' if tag == 'a' else 'src')
+            if target:
+                self.on_link(tag, urljoin(self.page_url, target.strip()))
+        if tag in MEDIA_TAGS:
+            self._tag_urls.extend(media_tag_urls(tag, attrs, self.page_url))
+
+    def feed(self, data):
+        self._scan(self.decoder.decode(data))
+
+    def close(self):
+        self._scan(self.decoder.decode(b'', final=True), final=True)
+        return self.video_urls
+
+    def _scan(self, text, final=False):
+        if text:
+            self.parser.feed(text)
+            found = self.url_scan.feed(text)
+        else:
+            found = []
+        if final:
+            self.parser.close()
+            found += self.url_scan.close()
+
+        urls = self.videos.add(self._tag_urls + found)
+        self._tag_urls = []
+        if urls:
+            self.video_urls.extend(urls)
+            if self.on_found:
+                self.on_found(urls)
+
+
+def scan_response(response, page_url, on_found=None):
+    """Scan a response opened with stream=True, return all the video URLs found"""
+    scan = PageScan(page_url, response.encoding, on_found)
+    for chunk in response.iter_content(CHUNK_SIZE):
+        scan.feed(chunk)
+    return scan.close()
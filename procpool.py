@@ -0,0 +1,252 @@
+import itertools
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future
+
+from ydlpool import pooled_ydl
+
+DEFAULT_PROCESSES = max(1, min(4, (os.cpu_count() or 2) // 2))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class WorkerKilled(Exception):
+    """The worker process running a task was killed or died"""
+
+
+# Tasks run inside the worker processes. Each one gets a report(data)
+# function that sends progress back to the app.
+
+def task_extract_info(report, url, options):
+    with pooled_ydl(options) as ydl:
+        return ydl.sanitize_info(ydl.extract_info(url, download=False))
+
+
+def task_download(report, url, options, info=None):
+    """Download with yt-dlp, from info when given, and return the files it wrote"""
+    results = []
+
+    def hook(d):
+        if d['status'] == 'downloading':
+            report({'status': 'downloading', 'filename': d.get('filename'),
+                    'downloaded_bytes': d.get('downloaded_bytes'),
+                    'total_bytes': d.get('total_bytes'),
+                    'total_bytes_estimate': d.get('total_bytes_estimate')})
+        elif d['status'] == 'finished':
+            info = d.get('info_dict') or {}
+            total = d.get('total_bytes') or d.get('downloaded_bytes') or 0
+            report({'status': 'finished', 'filename': d.get('filename'), 'total_bytes': total,
+                    'downloaded_bytes': d.get('downloaded_bytes')})
+            results.append({'file_path': d.get('filename'), 'size': total,
+                            'extractor': info.get('extractor_key'), 'video_id': info.get('id'),
+                            'title': info.get('title')})
+
+    options = dict(options, progress_hooks=[hook])
+    with pooled_ydl(options) as ydl:
+        if info is not None:
+            ydl.process_ie_result(info, download=True)
+        else:
+            ydl.download([url])
+    return results
+
+
+TASKS = {
+    'extract_info': task_extract_info,
+    'download': task_download,
+}
+
+
+def worker_main():
+    """Entry point of a worker process: run pickled tasks from stdin until it closes"""
+    # Messages use the real stdout, everything the task prints goes to stderr
+    messages = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    tasks = sys.stdin.buffer
+
+    def send(message):
+        pickle.dump(message, messages)
+        messages.flush()
+
+    while True:
+        try:
+            task_id, name, args = pickle.load(tasks)
+        except EOFError:
+            return
+        try:
+            result = TASKS[name](lambda data: send(('progress', task_id, data)), *args)
+            send(('result', task_id, result))
+        except BaseException as e:
+            send(('error', task_id, f"{type(e).__name__}: {str(e)}"))
+
+
+class WorkerProcess:
+    """One Python process that runs tasks one at a time"""
+
+    def __init__(self):
+        env = dict(os.environ)
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [package_dir, env.get('PYTHONPATH')]))
+        self.process = subprocess.Popen(
+            [sys.executable, '-c', 'import procpool; procpool.worker_main()'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+        self.killed = False
+
+    def run(self, task_id, name, args, progress_callback=None):
+        try:
+            pickle.dump((task_id, name, args), self.process.stdin)
+            self.process.stdin.flush()
+        except OSError:
+            raise WorkerKilled(self._exit_reason())
+        while True:
+            try:
+                kind, _, payload = pickle.load(self.process.stdout)
+            except (EOFError, pickle.UnpicklingError, OSError):
+                raise WorkerKilled(self._exit_reason())
+            if kind == 'progress':
+                if progress_callback:
+                    progress_callback(payload)
+            elif kind == 'result':
+                return payload
+            else:
+                raise Exception(payload)
+
+    def _exit_reason(self):
+        return "Worker process was killed" if self.killed else "Worker process exited unexpectedly"
+
+    def kill(self):
+        self.killed = True
+        try:
+            self.process.kill()
+        except OSError:
+            pass
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+
+class ProcessPool:
+    """Run yt-dlp work in separate Python processes.
+
+    Extraction is pure Python and holds the GIL, so running it in worker
+    processes keeps the app responsive and uses more cores. Tasks and
+    results are pickled over the workers' stdin/stdout, progress is sent
+    back while a task runs. A task that hangs or is no longer wanted can
+    be killed with kill(); its worker is replaced by a fresh process.
+    """
+
+    def __init__(self, processes=DEFAULT_PROCESSES, task_timeout=None):
+        self.processes = max(1, processes)
+        self.task_timeout = task_timeout
+        self._tasks = queue.Queue()
+        self._running = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._closed = False
+        self._threads = []
+        for _ in range(self.processes):
+            thread = threading.Thread(target=self._worker_loop, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, name, *args, progress_callback=None, timeout=None):
+        if self._closed:
+            raise Exception("Process pool is shut down")
+        future = Future()
+        self._tasks.put((future, name, args, progress_callback, timeout or self.task_timeout))
+        return future
+
+    def kill(self, future):
+        """Stop the task behind future, killing its process if it already started"""
+        if future.cancel():
+            return
+        with self._lock:
+            worker = self._running.get(future)
+        if worker:
+            worker.kill()
+
+    def shutdown(self, kill_running=False):
+        """Stop the workers once queued tasks are done, or right away with kill_running"""
+        self._closed = True
+        for _ in self._threads:
+            self._tasks.put(None)
+        if kill_running:
+            with self._lock:
+                for worker in self._running.values():
+                    worker.kill()
+
+    def _worker_loop(self):
+        worker = None
+        while True:
+            item = self._tasks.get()
+            if item is None:
+                break
+            future, name, args, progress_callback, timeout = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            # Processes are started lazily and replaced after being killed
+            if worker is None:
+                worker = WorkerProcess()
+            with self._lock:
+                self._running[future] = worker
+            timer = threading.Timer(timeout, worker.kill) if timeout else None
+            if timer:
+                timer.start()
+            try:
+                future.set_result(worker.run(next(self._ids), name, args, progress_callback))
+            except WorkerKilled as e:
+                worker = None
+                future.set_exception(e)
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                if timer:
+                    timer.cancel()
+                with self._lock:
+                    self._running.pop(future, None)
+
+        if worker is not None:
+            worker.close()
+
+
+def configure_process_pool(enabled, processes=DEFAULT_PROCESSES):
+    """Start, resize or stop the shared pool used for yt-dlp work"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and (not enabled or _pool.processes != processes):
+            _pool.shutdown()
+            _pool = None
+        if enabled and _pool is None:
+            _pool = ProcessPool(processes)
+
+
+def get_process_pool():
+    """The shared pool, or None when yt-dlp runs in this process"""
+    return _pool
+
+
+def picklable_options(options):
+    """Drop hooks and callables, the worker process adds its own"""
+    return {key: value for key, value in options.items()
+            if key != 'progress_hooks' and not callable(value)}
+
+
+def extract_info(url, options, timeout=None):
+    """yt-dlp extract_info, in a worker process when the pool is enabled"""
+    pool = get_process_pool()
+    if pool is None:
+        with pooled_ydl(options) as ydl:
+            return ydl.extract_info(url, download=False)
+
+    future = pool.submit('extract_info', url, picklable_options(options), timeout=timeout)
+    return future.result()
@@ -0,0 +1,94 @@
+import threading
+
+# Every profile defines the same keys, sizes are in bytes and timeouts in seconds
+PROFILES = {
+    # Matches the options the app always used
+    'Balanced': {
+        'concurrent_fragments': 1,
+        'http_chunk_size': 0,
+        'buffer_size': 1024,
+        'socket_timeout': 120,
+        'retries': 30,
+    },
+    # Many parallel fragments and large chunks for fast, tolerant servers
+    'Throughput': {
+        'concurrent_fragments': 8,
+        'http_chunk_size': 10 * 1024 * 1024,
+        'buffer_size': 1024 * 1024,
+        'socket_timeout': 30,
+        'retries': 10,
+    },
+    # One connection at a time with small reads, for shared or fragile links
+    'Gentle': {
+        'concurrent_fragments': 1,
+        'http_chunk_size': 1024 * 1024,
+        'buffer_size': 16 * 1024,
+        'socket_timeout': 120,
+        'retries': 30,
+    },
+}
+DEFAULT_PROFILE = 'Balanced'
+CUSTOM_PROFILE = 'Custom'
+
+_active_profile = dict(PROFILES[DEFAULT_PROFILE])
+_active_lock = threading.Lock()
+
+
+def load_profile(settings):
+    """Read the selected profile from a QSettings-like object"""
+    name = settings.value('download_profile', DEFAULT_PROFILE)
+    if name in PROFILES:
+        return dict(PROFILES[name])
+    return load_custom_profile(settings)
+
+
+def load_custom_profile(settings):
+    """User edited values, starting from the default profile"""
+    profile = dict(PROFILES[DEFAULT_PROFILE])
+    for key, default in profile.items():
+        profile[key] = int(settings.value(f'download_profile_custom/{key}', default))
+    return profile
+
+
+def save_profile(settings, name, values=None):
+    settings.setValue('download_profile', name)
+    if name == CUSTOM_PROFILE and values:
+        for key, value in values.items():
+            settings.setValue(f'download_profile_custom/{key}', int(value))
+
+
+def set_active_profile(profile):
+    global _active_profile
+    with _active_lock:
+        _active_profile = dict(profile)
+
+
+def active_profile():
+    """The profile every yt-dlp invocation in this process uses"""
+    with _active_lock:
+        return dict(_active_profile)
+
+
+def ydl_network_options(profile=None):
+    """yt-dlp options that apply to every request, including metadata extraction"""
+    profile = profile or active_profile()
+    return {
+        'socket_timeout': profile['socket_timeout'],
+        'retries': profile['retries'],
+        'extractor_retries': min(profile['retries'], 3),
+    }
+
+
+def ydl_download_options(profile=None):
+    """yt-dlp options for transfers"""
+    profile = profile or active_profile()
+    options = ydl_network_options(profile)
+    options.update({
+        'fragment_retries': profile['retries'],
+        'concurrent_fragment_downloads': max(1, profile['concurrent_fragments']),
+        'buffersize': profile['buffer_size'],
+    })
+    # A chunk size of 0 means the whole file in one request
+    if profile['http_chunk_size']:
+        options['http_chunk_size'] = profile['http_chunk_size']
+    return options
@@ -0,0 +1,107 @@
+import time
+
+# Progress is sampled this often (seconds), independent of how fast bytes arrive
+SAMPLE_INTERVAL = 0.1
+# Weight of the newest speed measurement in the moving average
+SPEED_SMOOTHING = 0.3
+
+
+class ProgressSample:
+    """Progress of one transfer at one sampling tick"""
+
+    def __init__(self, key, downloaded, total, speed, eta):
+        self.key = key
+        self.downloaded = downloaded
+        self.total = total
+        self.speed = speed
+        self.eta = eta
+
+    @property
+    def percent(self):
+        """Percentage done, or -1 while the total size is unknown"""
+        if not self.total:
+            return -1
+        return max(0.0, min(100.0, self.downloaded / self.total * 100))
+
+
+class TransferStats:
+    """Smoothed speed of one transfer, fed with its byte counter"""
+
+    def __init__(self):
+        self.speed = 0.0
+        self._last_bytes = None
+        self._last_time = None
+
+    def update(self, downloaded, now):
+        if self._last_time is not None and now > self._last_time:
+            # Counters restart when yt-dlp moves on to the next file
+            delta = max(0, downloaded - self._last_bytes)
+            rate = delta / (now - self._last_time)
+            if self.speed:
+                self.speed += SPEED_SMOOTHING * (rate - self.speed)
+            else:
+                self.speed = rate
+        self._last_bytes = downloaded
+        self._last_time = now
+        return self.speed
+
+
+class ProgressAggregator:
+    """Turn raw byte counters of many transfers into batched progress samples.
+
+    Workers only update their counters; whoever displays progress calls
+    sample() at a fixed rate and gets one consistent batch for all transfers.
+    """
+
+    def __init__(self):
+        self._stats = {}
+
+    def sample(self, transfers, now=None):
+        """Sample (key, downloaded, total) tuples and return ProgressSamples"""
+        now = time.monotonic() if now is None else now
+        samples = []
+        for key, downloaded, total in transfers:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = TransferStats()
+            speed = stats.update(downloaded, now)
+            eta = None
+            if total and speed > 0:
+                eta = max(0, total - downloaded) / speed
+            samples.append(ProgressSample(key, downloaded, total, speed, eta))
+
+        # Forget transfers that are no longer reported
+        active = {sample.key for sample in samples}
+        for key in list(self._stats):
+            if key not in active:
+                del self._stats[key]
+        return samples
+
+    @staticmethod
+    def combine(samples):
+        """Merge samples into one overall (percent, speed, eta) triple"""
+        speed = sum(sample.speed for sample in samples)
+        if not samples or any(not sample.total for sample in samples):
+            return -1, speed, None
+        downloaded = sum(sample.downloaded for sample in samples)
+        total = sum(sample.total for sample in samples)
+        eta = max(0, total - downloaded) / speed if speed > 0 else None
+        return min(100.0, downloaded / total * 100), speed, eta
+
+
+def format_speed(speed):
+    for unit in ('B/s', 'KB/s', 'MB/s'):
+        if speed < 1024:
+            return f"{speed:.1f} {unit}"
+        speed /= 1024
+    return f"{speed:.1f} GB/s"
+
+
+def format_eta(eta):
+    if eta is None:
+        return "--:--"
+    minutes, seconds = divmod(int(eta), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
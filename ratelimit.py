@@ -0,0 +1,110 @@
+import threading
+import time
+from datetime import datetime
+
+# Seconds of traffic a bucket may accumulate while idle
+BURST_SECONDS = 0.5
+# Longest single sleep, so rate changes and cancellation apply quickly
+MAX_SLEEP = 0.1
+
+
+class TokenBucket:
+    """Token bucket measured in bytes per second, a rate of 0 means unlimited.
+
+    Consumers may overdraw the bucket and then wait until the debt is repaid,
+    so large chunks are throttled just as accurately as small ones.
+    """
+
+    def __init__(self, rate=0):
+        self.rate = max(0, rate)
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = max(0, rate)
+            self.tokens = min(self.tokens, self._capacity())
+
+    def consume(self, amount, cancel_event=None):
+        with self._lock:
+            if not self.rate:
+                return
+            self._refill()
+            self.tokens -= amount
+
+        while True:
+            with self._lock:
+                # The limit may have been lifted while we were waiting
+                if not self.rate:
+                    return
+                self._refill()
+                if self.tokens >= 0:
+                    return
+                wait = -self.tokens / self.rate
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            time.sleep(min(wait, MAX_SLEEP))
+
+    def _capacity(self):
+        return max(self.rate * BURST_SECONDS, 1)
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate:
+            self.tokens = min(self._capacity(), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class BandwidthLimiter:
+    """Global bandwidth cap shared by every transfer in the process.
+
+    The global rate can be overridden by time-of-day windows, given as
+    (start, end, rate) with start/end as datetime.time. Windows that end
+    before they start wrap around midnight.
+    """
+
+    def __init__(self, rate=0):
+        self.rate = max(0, rate)
+        self.schedule = []
+        self.bucket = TokenBucket(rate)
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self._lock:
+            self.rate = max(0, rate)
+        self._update_bucket()
+
+    def set_schedule(self, schedule):
+        with self._lock:
+            self.schedule = list(schedule)
+        self._update_bucket()
+
+    def current_rate(self, now=None):
+        now = now or datetime.now().time()
+        with self._lock:
+            for start, end, rate in self.schedule:
+                if start <= end:
+                    active = start <= now < end
+                else:
+                    active = now >= start or now < end
+                if active:
+                    return max(0, rate)
+            return self.rate
+
+    def throttle(self, amount, job_bucket=None, cancel_event=None):
+        """Block until amount bytes may be transferred"""
+        if job_bucket is not None:
+            job_bucket.consume(amount, cancel_event)
+        self._update_bucket()
+        self.bucket.consume(amount, cancel_event)
+
+    def _update_bucket(self):
+        rate = self.current_rate()
+        if rate != self.bucket.rate:
+            self.bucket.set_rate(rate)
+
+
+# Shared by all downloads so the cap applies to the sum of their traffic
+bandwidth_limiter = BandwidthLimiter()
@@ -0,0 +1,139 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from canonical import canonical_url
+
+DEFAULT_CACHE_PATH = Path.home() / '.vloader' / 'scancache.db'
+# Seconds a scan is used without asking the server whether the page changed
+DEFAULT_TTL = 15 * 60
+# Pages kept, the least recently used ones are dropped first
+DEFAULT_MAX_ENTRIES = 2000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    page_key TEXT PRIMARY KEY,
+    page_url TEXT NOT NULL,
+    videos TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scans_used ON scans (used_at);
+"""
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+class ScanCache:
+    """SQLite cache of page scans.
+
+    Each entry holds the video URLs found on a page with the page's ETag
+    and Last-Modified. Within ttl seconds an entry is used as it is, after
+    that the page is requested conditionally and a 304 reuses the entry.
+    At most max_entries pages are kept, least recently used go first.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def get(self, page_url):
+        """Return the entry for page_url, with the videos as a list, or None"""
+        key = canonical_url(page_url)
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM scans WHERE page_key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE scans SET used_at = ? WHERE page_key = ?', (time.time(), key))
+            self._conn.commit()
+        entry = dict(row)
+        entry['videos'] = json.loads(entry['videos'])
+        return entry
+
+    def is_fresh(self, entry):
+        return time.time() - entry['fetched_at'] < self.ttl
+
+    def store(self, page_url, videos, etag=None, last_modified=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO scans (page_key, page_url, videos, etag, last_modified, '
+                'fetched_at, used_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (canonical_url(page_url), page_url, json.dumps(list(videos)), etag, last_modified,
+                 now, now))
+            self._evict()
+            self._conn.commit()
+
+    def revalidated(self, page_url, etag=None, last_modified=None):
+        """The server answered 304, the entry is fresh again"""
+        with self._lock:
+            self._conn.execute(
+                'UPDATE scans SET fetched_at = ?, etag = COALESCE(?, etag), '
+                'last_modified = COALESCE(?, last_modified) WHERE page_key = ?',
+                (time.time(), etag, last_modified, canonical_url(page_url)))
+            self._conn.commit()
+
+    def _evict(self):
+        count = self._conn.execute('SELECT COUNT(*) FROM scans').fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                'DELETE FROM scans WHERE page_key IN '
+                '(SELECT page_key FROM scans ORDER BY used_at LIMIT ?)', (count - self.max_entries,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM scans')
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def validator_headers(entry):
+    """Conditional request headers for a cached entry"""
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+def configure_scan_cache(enabled, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+    """Open, update or close the shared scan cache"""
+    global _cache
+    with _cache_lock:
+        if not enabled:
+            if _cache is not None:
+                _cache.close()
+                _cache = None
+            return
+        if _cache is None:
+            try:
+                _cache = ScanCache(ttl=ttl, max_entries=max_entries)
+            except Exception as e:
+                print(f"Scan cache unavailable: {str(e)}")
+                return
+        _cache.ttl = ttl
+        _cache.max_entries = max_entries
+
+
+def get_scan_cache():
+    """The shared scan cache, or None when it is disabled"""
+    return _cache
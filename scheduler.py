@@ -0,0 +1,235 @@
+import itertools
+import threading
+from urllib.parse import urlparse
+
+from downloader import DownloadCancelled, DownloadTask
+from ratelimit import TokenBucket
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+PAUSED = 'paused'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+DEFAULT_MAX_CONCURRENT = 3
+DEFAULT_PER_HOST_LIMIT = 2
+
+
+class DownloadJob:
+    """A single queued download and its current state"""
+
+    def __init__(self, job_id, url, output_path):
+        self.id = job_id
+        self.url = url
+        self.output_path = output_path
+        self.host = urlparse(url).hostname or ''
+        self.state = QUEUED
+        self.downloaded_bytes = 0
+        self.total_bytes = 0
+        self.error = None
+        self.stop_event = threading.Event()
+        self.stop_reason = None
+        # Optional per-job cap in bytes per second, applied on top of the global limit
+        self.rate_bucket = TokenBucket()
+
+    @property
+    def progress(self):
+        """Percentage done, -1 while running with an unknown size"""
+        if self.state == COMPLETED:
+            return 100
+        if self.total_bytes:
+            return min(100.0, self.downloaded_bytes / self.total_bytes * 100)
+        return -1 if self.state == RUNNING and self.downloaded_bytes else 0
+
+    @property
+    def is_active(self):
+        return self.state in (QUEUED, RUNNING)
+
+    @property
+    def is_finished(self):
+        return self.state in (COMPLETED, FAILED, CANCELLED)
+
+
+class DownloadScheduler:
+    """Run download jobs with a global and a per-host concurrency limit.
+
+    Jobs are started in FIFO order as soon as a slot is free. Every state
+    change is passed to listener(job), which is called from the thread that
+    caused the change. Byte progress is only recorded on the job, so
+    listeners are not flooded and sample it at their own pace. Completed
+    downloads are recorded in history when one is given.
+    """
+
+    def __init__(self, max_concurrent=DEFAULT_MAX_CONCURRENT,
+                 per_host_limit=DEFAULT_PER_HOST_LIMIT, listener=None, runner=None,
+                 history=None):
+        self.max_concurrent = max(1, max_concurrent)
+        self.per_host_limit = max(1, per_host_limit)
+        self.listener = listener
+        self.runner = runner or self.run_download
+        self.history = history
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def submit(self, url, output_path):
+        with self._lock:
+            job = DownloadJob(next(self._ids), url, output_path)
+            self._jobs[job.id] = job
+        self._notify(job)
+        self._dispatch()
+        return job
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def running_count(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.state == RUNNING)
+
+    def set_limits(self, max_concurrent, per_host_limit):
+        with self._lock:
+            self.max_concurrent = max(1, max_concurrent)
+            self.per_host_limit = max(1, per_host_limit)
+        self._dispatch()
+
+    def set_job_rate_limit(self, job_id, rate):
+        """Cap a single job at rate bytes per second, 0 removes the cap"""
+        job = self.get(job_id)
+        if job:
+            job.rate_bucket.set_rate(rate)
+            self._notify(job)
+
+    def pause(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or not job.is_active:
+                return
+            if job.state == QUEUED:
+                job.state = PAUSED
+            else:
+                # The worker notices the event and the job becomes paused when it exits
+                job.stop_reason = PAUSED
+                job.stop_event.set()
+        self._notify(job)
+
+    def resume(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job.state not in (PAUSED, FAILED):
+                return
+            job.state = QUEUED
+            job.error = None
+            job.stop_reason = None
+            job.stop_event = threading.Event()
+        self._notify(job)
+        self._dispatch()
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job.is_finished:
+                return
+            if job.state == RUNNING:
+                job.stop_reason = CANCELLED
+                job.stop_event.set()
+            else:
+                job.state = CANCELLED
+        self._notify(job)
+
+    def cancel_all(self):
+        for job in self.jobs():
+            self.cancel(job.id)
+
+    def clear_finished(self):
+        with self._lock:
+            for job_id in [job.id for job in self._jobs.values() if job.is_finished]:
+                del self._jobs[job_id]
+
+    def set_progress(self, job, downloaded, total_size):
+        job.downloaded_bytes = downloaded
+        job.total_bytes = total_size
+
+    def progress_counters(self):
+        """Return (job_id, downloaded, total) for every running job"""
+        return [(job.id, job.downloaded_bytes, job.total_bytes)
+                for job in self.jobs() if job.state == RUNNING]
+
+    def run_download(self, job):
+        """Default runner: yt-dlp with direct download fallback"""
+        task = DownloadTask(
+            job.url, job.output_path,
+            progress_callback=lambda downloaded, total: self.set_progress(job, downloaded, total),
+            cancel_event=job.stop_event,
+            rate_bucket=job.rate_bucket
+        )
+        try:
+            task.run()
+        except DownloadCancelled:
+            if job.stop_reason == CANCELLED:
+                task.discard()
+            raise
+        self.record_history(job, task.results)
+
+    def record_history(self, job, results):
+        if self.history is None:
+            return
+        try:
+            for result in results:
+                self.history.record(job.url, **result)
+        except Exception as e:
+            # A broken history database must not fail a finished download
+            print(f"Could not record download history: {str(e)}")
+
+    def _dispatch(self):
+        started = []
+        with self._lock:
+            running = [job for job in self._jobs.values() if job.state == RUNNING]
+            host_counts = {}
+            for job in running:
+                host_counts[job.host] = host_counts.get(job.host, 0) + 1
+
+            for job in self._jobs.values():
+                if len(running) + len(started) >= self.max_concurrent:
+                    break
+                if job.state != QUEUED:
+                    continue
+                if host_counts.get(job.host, 0) >= self.per_host_limit:
+                    continue
+                host_counts[job.host] = host_counts.get(job.host, 0) + 1
+                job.state = RUNNING
+                started.append(job)
+
+        for job in started:
+            self._notify(job)
+            thread = threading.Thread(target=self._run_job, args=(job,), daemon=True)
+            thread.start()
+
+    def _run_job(self, job):
+        try:
+            self.runner(job)
+            state = COMPLETED
+        except DownloadCancelled:
+            state = PAUSED if job.stop_reason == PAUSED else CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            state = FAILED
+
+        with self._lock:
+            job.state = state
+        self._notify(job)
+        self._dispatch()
+
+    def _notify(self, job):
+        if self.listener:
+            try:
+                self.listener(job)
+            except Exception as e:
+                print(f"Download listener error: {str(e)}")
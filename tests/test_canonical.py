@@ -0,0 +1,94 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from canonical import VideoUrlSet, canonical_url, preferred_url, video_key  # noqa: E402
+
+
+class VideoKeyTest(unittest.TestCase):
+    def test_youtube_spellings_share_a_key(self):
+        urls = [
+            'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+            'https://youtube.com/watch?v=dQw4w9WgXcQ&t=42',
+            'https://youtu.be/dQw4w9WgXcQ',
+            'https://www.youtube.com/embed/dQw4w9WgXcQ?autoplay=1',
+        ]
+        self.assertEqual({video_key(url) for url in urls}, {'Youtube:dQw4w9WgXcQ'})
+
+    def test_other_platforms(self):
+        self.assertEqual(video_key('https://player.vimeo.com/video/76979871'),
+                         video_key('https://vimeo.com/76979871'))
+        self.assertEqual(video_key('https://dai.ly/x7tgad0'),
+                         video_key('https://www.dailymotion.com/embed/video/x7tgad0'))
+
+    def test_youtube_non_videos_are_not_ids(self):
+        self.assertNotEqual(video_key('https://www.youtube.com/embed/videoseries?list=PL1'),
+                            video_key('https://www.youtube.com/embed/videoseries?list=PL2'))
+
+    def test_plain_urls_are_normalised(self):
+        self.assertEqual(video_key('HTTPS://WWW.Example.com:443/v/clip.mp4/?b=2&a=1#t=10'),
+                         video_key('https://example.com/v/clip.mp4?a=1&b=2'))
+        self.assertNotEqual(video_key('https://example.com/v/clip.mp4?quality=hd'),
+                            video_key('https://example.com/v/clip.mp4?quality=sd'))
+
+    def test_canonical_url_keeps_the_query(self):
+        self.assertEqual(canonical_url('https://www.example.com:8080/a/?x=1#frag'),
+                         'https://example.com:8080/a?x=1')
+
+    def test_preferred_url(self):
+        self.assertEqual(preferred_url('https://youtu.be/dQw4w9WgXcQ'),
+                         'https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+        self.assertEqual(preferred_url('https://example.com/clip.mp4?utm_source=x'),
+                         'https://example.com/clip.mp4?utm_source=x')
+
+
+class VideoUrlSetTest(unittest.TestCase):
+    def test_merges_urls_of_one_video(self):
+        videos = VideoUrlSet()
+        new = videos.add(['https://youtu.be/dQw4w9WgXcQ',
+                          'https://example.com/clip.mp4?utm_source=a',
+                          'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+                          'https://example.com/clip.mp4'])
+        self.assertEqual(new, ['https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+                               'https://example.com/clip.mp4?utm_source=a'])
+        self.assertEqual(len(videos), 2)
+
+    def test_later_batches_only_return_new_videos(self):
+        videos = VideoUrlSet()
+        videos.add(['https://vimeo.com/76979871'])
+        self.assertEqual(videos.add(['https://player.vimeo.com/video/76979871',
+                                     'https://vimeo.com/1']), ['https://vimeo.com/1'])
+        self.assertIn('https://player.vimeo.com/video/76979871', videos)
+        self.assertNotIn('https://vimeo.com/2', videos)
+
+
+class SignedUrlTest(unittest.TestCase):
+    def test_tracking_and_expiry_dropped_everywhere(self):
+        self.assertEqual(video_key('https://example.com/v.mp4?utm_source=x&fbclid=y&expires=1'),
+                         video_key('https://example.com/v.mp4'))
+
+    def test_token_that_picks_the_file_is_kept(self):
+        self.assertNotEqual(video_key('https://example.com/get?token=abc'),
+                            video_key('https://example.com/get?token=def'))
+        self.assertNotEqual(video_key('https://example.com/v?id=1&sig=a'),
+                            video_key('https://example.com/v?id=1&sig=b'))
+
+    def test_signature_of_known_cdns_dropped(self):
+        self.assertEqual(
+            video_key('https://d1.cloudfront.net/v.mp4?Expires=1&Signature=a&Key-Pair-Id=k'),
+            video_key('https://d1.cloudfront.net/v.mp4?Expires=2&Signature=b&Key-Pair-Id=k'))
+        self.assertEqual(
+            video_key('https://scontent.xx.fbcdn.net/v/t.mp4?_nc_cat=1&oh=a&oe=b'),
+            video_key('https://scontent.xx.fbcdn.net/v/t.mp4?_nc_cat=2&oh=c&oe=d'))
+        self.assertEqual(video_key('https://bucket.s3.amazonaws.com/v.mp4?X-Amz-Signature=a'),
+                         video_key('https://bucket.s3.amazonaws.com/v.mp4?X-Amz-Signature=b'))
+
+    def test_cdn_signature_names_kept_on_other_hosts(self):
+        self.assertNotEqual(video_key('https://example.com/v?oh=1'),
+                            video_key('https://example.com/v?oh=2'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import http.client
+import json
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from daemon import DaemonServer, is_loopback, main  # noqa: E402
+
+
+class IdleService:
+    """Stands in for DownloadService, with no jobs"""
+
+    def jobs(self):
+        return []
+
+
+class RejectedRequestTest(unittest.TestCase):
+    """A rejected request must not leave its body on a kept-alive connection"""
+
+    def setUp(self):
+        self.server = DaemonServer(IdleService(), port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.port = self.server.server_address[1]
+        self.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+
+    def tearDown(self):
+        self.conn.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def request(self, method, path, body=None, headers=None):
+        self.conn.request(method, path, body=body, headers=headers or {})
+        response = self.conn.getresponse()
+        return response.status, json.loads(response.read())
+
+    def assert_next_request_works(self):
+        status, result = self.request('GET', '/status')
+        self.assertEqual(status, 200)
+        self.assertEqual(result['jobs'], {})
+
+    def test_wrong_content_type(self):
+        status, _ = self.request('POST', '/downloads', b'{"url":"x"}',
+                                 {'Content-Type': 'text/plain'})
+        self.assertEqual(status, 415)
+        self.assert_next_request_works()
+
+    def test_foreign_host(self):
+        status, _ = self.request('POST', '/downloads', b'{"url":"x"}',
+                                 {'Content-Type': 'application/json', 'Host': 'evil.example'})
+        self.assertEqual(status, 403)
+        self.assert_next_request_works()
+
+    def test_invalid_json(self):
+        status, _ = self.request('POST', '/downloads', b'{"url":',
+                                 {'Content-Type': 'application/json'})
+        self.assertEqual(status, 400)
+        self.assert_next_request_works()
+
+    def test_body_not_an_object(self):
+        status, _ = self.request('POST', '/downloads', b'["x"]',
+                                 {'Content-Type': 'application/json'})
+        self.assertEqual(status, 400)
+        self.assert_next_request_works()
+
+    def test_bad_event_id(self):
+        status, result = self.request('GET', '/events?since=abc&stream=0')
+        self.assertEqual(status, 400)
+        self.assertIn('error', result)
+        self.assert_next_request_works()
+
+
+class ListenAddressTest(unittest.TestCase):
+    def test_is_loopback(self):
+        for host in ('127.0.0.1', '127.0.0.2', 'localhost', '::1', '[::1]'):
+            self.assertTrue(is_loopback(host), host)
+        for host in ('0.0.0.0', '192.168.1.10', '::', 'example.com'):
+            self.assertFalse(is_loopback(host), host)
+
+    def test_refuses_other_addresses(self):
+        self.assertEqual(main(['--daemon', '--no-settings', '--host', '0.0.0.0']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
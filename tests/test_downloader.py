@@ -0,0 +1,343 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from downloader import (DiskWriter, DownloadCancelled, DownloadJournal,  # noqa: E402
+                        SegmentedDownloader, release_output, reserve_output)
+
+SIZE = 64 * 1024
+
+
+def make_content(seed):
+    return bytes((seed + i * 7) % 251 for i in range(SIZE))
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves server.files, with byte ranges unless server.ranges is off"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(head=True)
+
+    def do_GET(self):
+        self._respond(head=False)
+
+    def _respond(self, head):
+        data = self.server.files.get(self.path)
+        if data is None:
+            self._send(404, {}, b'', head)
+            return
+        byterange = self.headers.get('Range')
+        headers = {'Accept-Ranges': 'bytes'} if self.server.ranges else {}
+        if self.server.etag:
+            headers['ETag'] = self.server.etag
+        if_range = self.headers.get('If-Range')
+        if if_range and if_range != self.server.etag:
+            # The file changed, send all of it
+            byterange = None
+        if byterange and self.server.ranges and not head:
+            start, end = byterange[len('bytes='):].split('-')
+            start, end = int(start), min(int(end), len(data) - 1)
+            with self.server.lock:
+                self.server.range_requests.append((start, end))
+            headers['Content-Range'] = f'bytes {start}-{end}/{len(data)}'
+            self._send(206, headers, data[start:end + 1], head)
+        else:
+            self._send(200, headers, data, head)
+
+    def _send(self, status, headers, data, head):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(data)
+
+
+class QuietServer(ThreadingHTTPServer):
+    # Stopped downloads drop their connections
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class ServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = QuietServer(('127.0.0.1', 0), RangeHandler)
+        self.server.files = {}
+        self.server.ranges = True
+        self.server.etag = None
+        self.server.range_requests = []
+        self.server.lock = threading.Lock()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def serve(self, path, data):
+        self.server.files[path] = data
+        return self.base_url + path
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def downloader(self, url, output_file, **kwargs):
+        kwargs.setdefault('min_segment_size', 4096)
+        return SegmentedDownloader(url, output_file, throttle=lambda amount: None, timeout=5,
+                                   **kwargs)
+
+    def read(self, name):
+        with open(self.path(name), 'rb') as f:
+            return f.read()
+
+
+class DiskWriterTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def write(self, writer, offset, data):
+        buffer = writer.acquire()
+        buffer[:len(data)] = data
+        writer.write(offset, buffer, len(data))
+        return buffer
+
+    def read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def test_out_of_order_offsets(self):
+        written = []
+        writer = DiskWriter(self.path, buffer_size=4, buffer_count=2, queue_depth=2,
+                            on_written=lambda offset, length: written.append((offset, length)))
+        for offset, data in ((8, b'ijk'), (0, b'abcd'), (4, b'efgh')):
+            self.write(writer, offset, data)
+        writer.close()
+        self.assertEqual(self.read(), b'abcdefghijk')
+        # Buffers reach the file in the order they were queued
+        self.assertEqual(written, [(8, 3), (0, 4), (4, 4)])
+
+    def test_later_write_wins(self):
+        writer = DiskWriter(self.path, buffer_size=4)
+        self.write(writer, 0, b'aaaa')
+        self.write(writer, 0, b'bb')
+        writer.close()
+        self.assertEqual(self.read(), b'bbaa')
+
+    def test_buffers_are_reused(self):
+        writer = DiskWriter(self.path, buffer_size=1024, buffer_count=3, queue_depth=2)
+        seen = set()
+        for number in range(100):
+            seen.add(id(self.write(writer, number * 1024, bytes([number]) * 1024)))
+        writer.close()
+        self.assertEqual(len(seen), 3)
+        self.assertEqual(self.read(), b''.join(bytes([number]) * 1024 for number in range(100)))
+
+    def test_readers_wait_for_a_free_buffer(self):
+        writer = DiskWriter(self.path, buffer_size=4, buffer_count=1, queue_depth=1)
+        held = writer.acquire()
+        acquired = threading.Event()
+        threading.Thread(target=lambda: (writer.acquire(), acquired.set()), daemon=True).start()
+        self.assertFalse(acquired.wait(0.2))
+        writer.release(held)
+        self.assertTrue(acquired.wait(5))
+        writer.close()
+
+    def test_write_errors_reach_the_reader(self):
+        def fail(offset, length):
+            raise OSError("disk full")
+
+        writer = DiskWriter(self.path, buffer_size=4, on_written=fail)
+        self.write(writer, 0, b'abcd')
+        with self.assertRaises(Exception) as raised:
+            writer.close()
+        self.assertIn("disk full", str(raised.exception))
+
+
+class SplitRangesTest(unittest.TestCase):
+    def assert_covers(self, ranges, total_size):
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], total_size - 1)
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(start, end + 1)
+
+    def test_even_split(self):
+        ranges = SegmentedDownloader.split_ranges(400, 4, 100)
+        self.assertEqual(ranges, [(0, 99), (100, 199), (200, 299), (300, 399)])
+
+    def test_last_segment_takes_the_rest(self):
+        ranges = SegmentedDownloader.split_ranges(1003, 4, 100)
+        self.assertEqual(len(ranges), 4)
+        self.assertEqual(ranges[-1], (750, 1002))
+        self.assert_covers(ranges, 1003)
+
+    def test_small_files_get_fewer_segments(self):
+        self.assertEqual(SegmentedDownloader.split_ranges(250, 4, 100), [(0, 124), (125, 249)])
+        self.assertEqual(SegmentedDownloader.split_ranges(50, 4, 100), [(0, 49)])
+
+
+class SegmentedDownloadTest(ServerTestCase):
+    def test_parallel_ranges(self):
+        url = self.serve('/video.mp4', make_content(1))
+        progress = []
+        downloader = self.downloader(url, self.path('video.mp4'), segments=4,
+                                     progress_callback=lambda done, total: progress.append(done))
+        downloader.download()
+
+        self.assertEqual(self.read('video.mp4'), make_content(1))
+        self.assertEqual(sorted(self.server.range_requests),
+                         SegmentedDownloader.split_ranges(SIZE, 4, 4096))
+        self.assertEqual(progress[-1], SIZE)
+        self.assertEqual(os.listdir(self.directory.name), ['video.mp4'])
+
+    def test_server_without_ranges(self):
+        self.server.ranges = False
+        url = self.serve('/video.mp4', make_content(1))
+        self.downloader(url, self.path('video.mp4')).download()
+        self.assertEqual(self.read('video.mp4'), make_content(1))
+        self.assertEqual(self.server.range_requests, [])
+
+    def test_error_status(self):
+        self.server.ranges = False
+        with self.assertRaises(Exception):
+            self.downloader(self.base_url + '/missing.mp4', self.path('video.mp4')).download()
+        self.assertFalse(os.path.exists(self.path('video.mp4')))
+
+
+class JournalTest(ServerTestCase):
+    def interrupt(self, url, output_file):
+        """Start a download and stop it half way, as a crash or pause would"""
+        cancel_event = threading.Event()
+
+        def progress(downloaded, total):
+            if downloaded >= total // 2:
+                cancel_event.set()
+
+        downloader = self.downloader(url, output_file, segments=1, buffer_size=4096,
+                                     progress_callback=progress, cancel_event=cancel_event)
+        with self.assertRaises(DownloadCancelled):
+            downloader.download()
+        journal = DownloadJournal.load(output_file + '.part.json')
+        self.assertTrue(0 < journal.completed_bytes() < SIZE)
+        return journal
+
+    def test_resume_after_interruption(self):
+        url = self.serve('/video.mp4', make_content(1))
+        output_file = self.path('video.mp4')
+        journal = self.interrupt(url, output_file)
+        done = journal.completed_bytes()
+
+        del self.server.range_requests[:]
+        progress = []
+        self.downloader(url, output_file, segments=1,
+                        progress_callback=lambda downloaded, total: progress.append(downloaded)
+                        ).download()
+        self.assertEqual(self.read('video.mp4'), make_content(1))
+        # Only the missing bytes were fetched again
+        self.assertEqual(self.server.range_requests, [(done, SIZE - 1)])
+        # Progress counts the bytes kept from the first run
+        self.assertGreater(progress[0], done)
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ['video.mp4'])
+
+    def test_changed_size_restarts(self):
+        url = self.serve('/video.mp4', make_content(1))
+        output_file = self.path('video.mp4')
+        self.interrupt(url, output_file)
+
+        bigger = make_content(2) + b'more'
+        self.serve('/video.mp4', bigger)
+        del self.server.range_requests[:]
+        self.downloader(url, output_file, segments=1).download()
+        self.assertEqual(self.read('video.mp4'), bigger)
+        self.assertEqual(self.server.range_requests, [(0, len(bigger) - 1)])
+
+    def test_changed_etag_restarts(self):
+        self.server.etag = '"one"'
+        url = self.serve('/video.mp4', make_content(1))
+        output_file = self.path('video.mp4')
+        self.interrupt(url, output_file)
+
+        self.server.etag = '"two"'
+        self.serve('/video.mp4', make_content(2))
+        self.downloader(url, output_file, segments=1).download()
+        self.assertEqual(self.read('video.mp4'), make_content(2))
+
+    def test_missing_part_file_restarts(self):
+        url = self.serve('/video.mp4', make_content(1))
+        output_file = self.path('video.mp4')
+        self.interrupt(url, output_file)
+        os.remove(output_file + '.part')
+
+        self.downloader(url, output_file, segments=1).download()
+        self.assertEqual(self.read('video.mp4'), make_content(1))
+
+    def test_part_file_of_another_url_is_not_resumed(self):
+        first = self.serve('/a/video.mp4', make_content(1))
+        second = self.serve('/b/video.mp4', make_content(2))
+        output_file = self.path('video.mp4')
+
+        # An interrupted download of the first URL, same size and no validators
+        with open(output_file + '.part', 'wb') as f:
+            f.write(make_content(1)[:SIZE // 2] + bytes(SIZE - SIZE // 2))
+        journal = DownloadJournal(output_file + '.part.json', first, SIZE)
+        journal.add_range(0, SIZE // 2 - 1)
+        journal.save()
+
+        self.downloader(second, output_file).download()
+        self.assertEqual(self.read('video.mp4'), make_content(2))
+
+
+class ReserveOutputTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_running_jobs_get_different_paths(self):
+        first = reserve_output(self.directory.name, 'video', ['.mp4'])
+        second = reserve_output(self.directory.name, 'video', ['.mp4'])
+        self.assertEqual(first, self.path('video'))
+        self.assertEqual(second, self.path('video (2)'))
+        release_output(first)
+        self.assertEqual(reserve_output(self.directory.name, 'video', ['.mp4']), first)
+        release_output(first)
+        release_output(second)
+
+    def test_existing_files_are_not_overwritten(self):
+        open(self.path('video.ts'), 'wb').close()
+        open(self.path('video (2).mp4.part'), 'wb').close()
+        path = reserve_output(self.directory.name, 'video', ['.ts', '.mp4'])
+        self.assertEqual(path, self.path('video (3)'))
+        release_output(path)
+
+    def test_resumable_part_file_is_reused(self):
+        open(self.path('video.mp4.part'), 'wb').close()
+        path = reserve_output(self.directory.name, 'video', ['.mp4'], lambda file_path: True)
+        self.assertEqual(path, self.path('video'))
+        release_output(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
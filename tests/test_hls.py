@@ -0,0 +1,119 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from downloader import DownloadCancelled, DownloadTask  # noqa: E402
+from hls import HLSDownloader  # noqa: E402
+
+MEDIA = bytes(range(256)) * 64
+
+PLAYLIST = """#EXTM3U
+#EXT-X-TARGETDURATION:4
+#EXTINF:4.0,
+#EXT-X-BYTERANGE:4096@0
+media.ts
+#EXTINF:4.0,
+#EXT-X-BYTERANGE:8192
+media.ts
+#EXTINF:4.0,
+#EXT-X-BYTERANGE:4096
+media.ts
+#EXT-X-ENDLIST
+"""
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+    """Serves one byterange playlist, honouring Range only when the server says so"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.endswith('/index.m3u8'):
+            self._send(200, PLAYLIST.encode('ascii'))
+        elif self.path.endswith('/media.ts') and self.server.broken:
+            self._send(403, b'')
+        elif self.path.endswith('/media.ts'):
+            byterange = self.headers.get('Range')
+            if byterange and self.server.honour_range:
+                start, end = (int(value) for value in byterange[len('bytes='):].split('-'))
+                self._send(206, MEDIA[start:end + 1])
+            else:
+                self._send(200, MEDIA)
+        else:
+            self._send(404, b'')
+
+    def _send(self, status, data):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class HLSDownloaderTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), MediaHandler)
+        self.server.honour_range = True
+        self.server.broken = False
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/index.m3u8'
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.directory.name, 'video.ts')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def download(self, **kwargs):
+        downloader = HLSDownloader(self.url, self.output_file, throttle=lambda amount: None,
+                                   timeout=5, **kwargs)
+        return downloader.download()
+
+    def read_output(self):
+        with open(self.output_file, 'rb') as f:
+            return f.read()
+
+    def test_byte_ranges(self):
+        self.download()
+        self.assertEqual(self.read_output(), MEDIA[:16384])
+
+    def test_server_ignoring_range(self):
+        self.server.honour_range = False
+        self.download()
+        self.assertEqual(self.read_output(), MEDIA[:16384])
+
+    def test_failure_removes_part_file(self):
+        self.server.broken = True
+        with self.assertRaises(Exception):
+            self.download()
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_cancel_removes_part_file(self):
+        cancel_event = threading.Event()
+        with self.assertRaises(DownloadCancelled):
+            self.download(concurrency=1, cancel_event=cancel_event,
+                          progress_callback=lambda downloaded, total: cancel_event.set())
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_playlists_with_the_same_name(self):
+        base = f'http://127.0.0.1:{self.server.server_address[1]}'
+        saved = []
+        for path in ('/a/index.m3u8', '/b/index.m3u8', '/a/index.m3u8'):
+            task = DownloadTask(base + path, self.directory.name)
+            task.throttle = lambda amount: None
+            task.download_hls(base + path)
+            saved.append(os.path.basename(task.results[0]['file_path']))
+        # An earlier download is never overwritten
+        self.assertEqual(saved, ['a.ts', 'b.ts', 'a (2).ts'])
+        videos = [name for name in os.listdir(self.directory.name) if name.endswith('.ts')]
+        self.assertEqual(sorted(videos), ['a (2).ts', 'a.ts', 'b.ts'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import integrity  # noqa: E402
+from integrity import StreamHasher  # noqa: E402
+
+PIECE = 4096
+
+
+class StreamHasherTest(unittest.TestCase):
+    def setUp(self):
+        self.data = os.urandom(64 * PIECE + 123)
+        handle, self.path = tempfile.mkstemp()
+        with os.fdopen(handle, 'wb') as f:
+            f.write(self.data)
+        self.expected = hashlib.sha256(self.data).hexdigest()
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def pieces(self, start=0, end=None):
+        end = len(self.data) if end is None else end
+        return [(offset, self.data[offset:min(offset + PIECE, end)])
+                for offset in range(start, end, PIECE)]
+
+    def test_out_of_order_pieces(self):
+        pieces = self.pieces()
+        random.Random(1).shuffle(pieces)
+        hasher = StreamHasher('sha256', self.path)
+        for offset, data in pieces:
+            hasher.update(offset, data)
+        self.assertEqual(hasher.hexdigest(), self.expected)
+
+    def test_overlapping_retries(self):
+        hasher = StreamHasher('sha256', self.path)
+        hasher.update(2 * PIECE, self.data[2 * PIECE:5 * PIECE])
+        hasher.update(3 * PIECE, self.data[3 * PIECE:4 * PIECE])
+        hasher.update(0, self.data[:3 * PIECE])
+        hasher.update(PIECE, self.data[PIECE:])
+        self.assertEqual(hasher.hexdigest(), self.expected)
+
+    def test_existing_ranges(self):
+        hasher = StreamHasher('sha256', self.path)
+        hasher.add_existing(10 * PIECE, 20 * PIECE - 1)
+        for offset, data in self.pieces(0, 10 * PIECE) + self.pieces(20 * PIECE):
+            hasher.update(offset, data)
+        self.assertEqual(hasher.hexdigest(), self.expected)
+
+    def test_file_read_back_once_per_catch_up(self):
+        # Two segments written side by side, the second one is hashed from the file at the end
+        half = 32 * PIECE
+        first, second = self.pieces(0, half), self.pieces(half)
+        hasher = StreamHasher('sha256', self.path)
+        with mock.patch.object(integrity, 'open', create=True, wraps=open) as opened:
+            for index in range(max(len(first), len(second))):
+                for pieces in (first, second):
+                    if index < len(pieces):
+                        hasher.update(*pieces[index])
+            self.assertEqual(opened.call_count, 1)
+        self.assertEqual(hasher.hexdigest(), self.expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
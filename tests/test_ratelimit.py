@@ -0,0 +1,101 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from datetime import time as clock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ratelimit import BandwidthLimiter, TokenBucket  # noqa: E402
+
+RATE = 200 * 1024
+CHUNK = 8 * 1024
+
+
+def transfer(bucket, total, cancel_event=None):
+    for _ in range(total // CHUNK):
+        bucket.consume(CHUNK, cancel_event)
+
+
+def timed(func, *args):
+    started = time.monotonic()
+    func(*args)
+    return time.monotonic() - started
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_unlimited(self):
+        self.assertLess(timed(transfer, TokenBucket(0), 100 * 1024 * 1024), 0.5)
+
+    def test_rate(self):
+        # Half a second of traffic, the bucket starts empty
+        elapsed = timed(transfer, TokenBucket(RATE), RATE // 2)
+        self.assertGreater(elapsed, 0.4)
+        self.assertLess(elapsed, 0.8)
+
+    def test_rate_is_shared_by_threads(self):
+        bucket = TokenBucket(RATE)
+        threads = [threading.Thread(target=transfer, args=(bucket, RATE // 4)) for _ in range(2)]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        self.assertGreater(elapsed, 0.4)
+        self.assertLess(elapsed, 0.8)
+
+    def test_large_chunk_waits_for_its_debt(self):
+        elapsed = timed(TokenBucket(RATE).consume, RATE // 2)
+        self.assertGreater(elapsed, 0.4)
+        self.assertLess(elapsed, 0.8)
+
+    def test_lifting_the_limit_releases_waiters(self):
+        bucket = TokenBucket(1024)
+        threading.Timer(0.2, bucket.set_rate, (0,)).start()
+        self.assertLess(timed(bucket.consume, 100 * 1024), 1)
+
+    def test_cancel_releases_waiters(self):
+        cancel_event = threading.Event()
+        threading.Timer(0.2, cancel_event.set).start()
+        self.assertLess(timed(TokenBucket(1024).consume, 100 * 1024, cancel_event), 1)
+
+
+class ScheduleTest(unittest.TestCase):
+    def setUp(self):
+        self.limiter = BandwidthLimiter(RATE)
+
+    def test_rate_outside_windows(self):
+        self.limiter.set_schedule([(clock(9), clock(17), 1000)])
+        self.assertEqual(self.limiter.current_rate(clock(8, 59)), RATE)
+        self.assertEqual(self.limiter.current_rate(clock(17)), RATE)
+
+    def test_rate_inside_window(self):
+        self.limiter.set_schedule([(clock(9), clock(17), 1000)])
+        self.assertEqual(self.limiter.current_rate(clock(9)), 1000)
+        self.assertEqual(self.limiter.current_rate(clock(16, 59)), 1000)
+
+    def test_window_wrapping_midnight(self):
+        self.limiter.set_schedule([(clock(22), clock(6), 0)])
+        self.assertEqual(self.limiter.current_rate(clock(23)), 0)
+        self.assertEqual(self.limiter.current_rate(clock(5, 59)), 0)
+        self.assertEqual(self.limiter.current_rate(clock(12)), RATE)
+
+    def test_first_matching_window_wins(self):
+        self.limiter.set_schedule([(clock(9), clock(12), 1000), (clock(0), clock(23, 59), 2000)])
+        self.assertEqual(self.limiter.current_rate(clock(10)), 1000)
+        self.assertEqual(self.limiter.current_rate(clock(13)), 2000)
+
+    def test_job_bucket_and_global_cap(self):
+        # The job's own, slower rate applies on top of the global one
+        limiter = BandwidthLimiter(0)
+        job_bucket = TokenBucket(RATE)
+        elapsed = timed(lambda: [limiter.throttle(CHUNK, job_bucket)
+                                 for _ in range(RATE // 2 // CHUNK)])
+        self.assertGreater(elapsed, 0.4)
+        self.assertLess(elapsed, 0.8)
+
+
+if __name__ == '__main__':
+    unittest.main()
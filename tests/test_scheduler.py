@@ -0,0 +1,148 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from downloader import DownloadCancelled  # noqa: E402
+from scheduler import (CANCELLED, COMPLETED, FAILED, PAUSED, QUEUED, RUNNING,  # noqa: E402
+                       DownloadScheduler)
+
+
+class FakeRunner:
+    """Stands in for a download: runs until released or stopped"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.released = {}
+        self.started = []
+        self.running = {}
+        self.peak = 0
+        self.peak_per_host = {}
+
+    def __call__(self, job):
+        with self.lock:
+            self.started.append(job.id)
+            self.running[job.id] = job.host
+            self.peak = max(self.peak, len(self.running))
+            count = sum(1 for host in self.running.values() if host == job.host)
+            self.peak_per_host[job.host] = max(self.peak_per_host.get(job.host, 0), count)
+            release = self.released.setdefault(job.id, threading.Event())
+        try:
+            while not release.wait(0.01):
+                if job.stop_event.is_set():
+                    raise DownloadCancelled("Download stopped")
+            if job.url.endswith('/fail'):
+                raise Exception("broken")
+        finally:
+            with self.lock:
+                del self.running[job.id]
+
+    def release(self, job_id):
+        with self.lock:
+            self.released.setdefault(job_id, threading.Event()).set()
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting")
+        time.sleep(0.01)
+
+
+class SchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.runner = FakeRunner()
+        self.scheduler = DownloadScheduler(max_concurrent=3, per_host_limit=2,
+                                           runner=self.runner)
+
+    def tearDown(self):
+        self.scheduler.cancel_all()
+
+    def submit(self, url):
+        return self.scheduler.submit(url, '/tmp')
+
+    def test_limits(self):
+        jobs = [self.submit(f'https://{host}.example.com/{number}')
+                for number in range(4) for host in ('a', 'b')]
+        wait_for(lambda: self.scheduler.running_count() == 3)
+        self.assertEqual([job.state for job in jobs].count(QUEUED), 5)
+
+        for job in jobs:
+            wait_for(lambda: job.state == RUNNING)
+            self.runner.release(job.id)
+        wait_for(lambda: all(job.state == COMPLETED for job in jobs))
+        self.assertEqual(self.runner.peak, 3)
+        self.assertEqual(self.runner.peak_per_host, {'a.example.com': 2, 'b.example.com': 2})
+
+    def test_per_host_limit_lets_other_hosts_through(self):
+        jobs = [self.submit(f'https://a.example.com/{number}') for number in range(3)]
+        other = self.submit('https://b.example.com/1')
+        wait_for(lambda: other.state == RUNNING)
+        self.assertEqual([job.state for job in jobs], [RUNNING, RUNNING, QUEUED])
+
+    def test_raising_limits_starts_queued_jobs(self):
+        jobs = [self.submit(f'https://a.example.com/{number}') for number in range(3)]
+        wait_for(lambda: self.scheduler.running_count() == 2)
+        self.scheduler.set_limits(3, 3)
+        wait_for(lambda: jobs[2].state == RUNNING)
+
+    def test_pause_and_resume_running_job(self):
+        job = self.submit('https://a.example.com/1')
+        wait_for(lambda: job.id in self.runner.running)
+        self.scheduler.pause(job.id)
+        wait_for(lambda: job.state == PAUSED)
+
+        self.scheduler.resume(job.id)
+        wait_for(lambda: job.state == RUNNING)
+        self.runner.release(job.id)
+        wait_for(lambda: job.state == COMPLETED)
+        self.assertEqual(self.runner.started, [job.id, job.id])
+
+    def test_pause_queued_job(self):
+        self.scheduler.set_limits(1, 1)
+        first = self.submit('https://a.example.com/1')
+        second = self.submit('https://a.example.com/2')
+        self.scheduler.pause(second.id)
+        self.assertEqual(second.state, PAUSED)
+
+        self.runner.release(first.id)
+        wait_for(lambda: first.state == COMPLETED)
+        self.assertEqual(second.state, PAUSED)
+        self.assertNotIn(second.id, self.runner.started)
+
+        self.scheduler.resume(second.id)
+        wait_for(lambda: second.state == RUNNING)
+
+    def test_cancel(self):
+        self.scheduler.set_limits(1, 1)
+        running = self.submit('https://a.example.com/1')
+        queued = self.submit('https://a.example.com/2')
+        wait_for(lambda: running.id in self.runner.running)
+
+        self.scheduler.cancel(queued.id)
+        self.assertEqual(queued.state, CANCELLED)
+        self.scheduler.cancel(running.id)
+        wait_for(lambda: running.state == CANCELLED)
+        self.assertEqual(self.runner.started, [running.id])
+
+        # Cancelled jobs stay cancelled
+        self.scheduler.resume(running.id)
+        self.assertEqual(running.state, CANCELLED)
+
+    def test_failed_job_can_be_retried(self):
+        job = self.submit('https://a.example.com/fail')
+        self.runner.release(job.id)
+        wait_for(lambda: job.state == FAILED)
+        self.assertEqual(job.error, "broken")
+
+        self.scheduler.resume(job.id)
+        wait_for(lambda: job.state == FAILED and len(self.runner.started) == 2)
+        self.assertEqual(self.runner.started, [job.id, job.id])
+
+
+if __name__ == '__main__':
+    unittest.main()
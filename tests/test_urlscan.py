@@ -0,0 +1,92 @@
+import os
+import random
+import re
+import sys
+import unittest
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from urlscan import UrlScanner  # noqa: E402
+
+BASE_URL = 'https://example.com/page/'
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'scan')
+
+# The patterns as they were before the registry, each run over the whole page
+LEGACY_PATTERNS = [
+    r'https?://[^\s<>"\']+?\.(?:mp4|webm|ogg|m3u8)(?:[^\s<>"\']*)?',
+    r'https?://(?:www\.)?youtube\.com/watch\?v=[^\s<>"\']+',
+    r'https?://(?:www\.)?youtu\.be/[^\s<>"\']+',
+    r'https?://(?:www\.)?vimeo\.com/[^\s<>"\']+',
+    r'https?://(?:www\.)?dailymotion\.com/video/[^\s<>"\']+',
+    r'https?://[^\s<>"\']+?/(?:videos?|media|embed)/[a-zA-Z0-9-_]+',
+    r'https?://[^\s<>"\']+?\.cdn\.net/[^\s<>"\']+?\.(?:mp4|webm|ogg|m3u8)',
+    r'https?://[^\s<>"\']+?/storage\d+/[^\s<>"\']+?\.(?:mp4|webm|ogg|m3u8)',
+    r'https?://[^\s<>"\']+?/download/[^\s<>"\']+?\.(?:mp4|webm|ogg)',
+    r'https?://[^\s<>"\']+?/files?/[^\s<>"\']+?\.(?:mp4|webm|ogg)'
+]
+LEGACY_JSON_PATTERN = r'["\'](https?://[^\s<>"\']+?\.(?:mp4|webm|ogg|m3u8)[^\s<>"\']*)["\']'
+
+# Pieces the fuzz pages are made of, including case and Unicode oddities
+FUZZ_TOKENS = [
+    'http://', 'https://', 'HTTP://', 'hTtPs://', 'https\u017f://', 'www.', 'youtube.com/watch?v=',
+    'youtu.be/', 'YOUTU.BE/', 'vimeo.com/', 'v\u0130meo.com/', 'dailymotion.com/video/',
+    '/videos/', '/video/', '/media/', '/embed/', '/EMBED/', '.cdn.net/', '/storage12/', '/storage/',
+    '/download/', '/files/', '/file/', '.mp4', '.MP4', '.webm', '.ogg', '.m3u8', 'abc', 'x_y-z',
+    '?q=1', '&a=b', '"', "'", ' ', '<', '>', '\n', ';', ',', '\\', '/', '.', 'a', '9',
+    '\u212a', '\u0131', '\u00e9', '#frag', ':',
+]
+FUZZ_PAGES = 3000
+
+
+def legacy_scan(text, base_url):
+    """The page scan as it was before UrlScanner, the reference it must match"""
+    video_urls = set()
+    for pattern in LEGACY_PATTERNS:
+        for url in re.findall(pattern, text, re.IGNORECASE):
+            cleaned_url = url.strip("'\"\\;,")
+            if cleaned_url:
+                video_urls.add(urljoin(base_url, cleaned_url))
+    video_urls.update(re.findall(LEGACY_JSON_PATTERN, text))
+    return video_urls
+
+
+def fuzz_pages(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield ''.join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(1, 30)))
+
+
+def corpus():
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        with open(os.path.join(CORPUS_DIR, name), encoding='utf-8') as f:
+            yield name, f.read()
+
+
+class LegacyEquivalenceTest(unittest.TestCase):
+    """UrlScanner must find exactly the URLs the per-pattern scan found"""
+
+    def setUp(self):
+        self.scanner = UrlScanner()
+
+    def test_corpus(self):
+        pages = list(corpus())
+        self.assertTrue(pages)
+        for name, text in pages:
+            with self.subTest(page=name):
+                expected = legacy_scan(text, BASE_URL)
+                self.assertTrue(expected)
+                self.assertEqual(self.scanner.scan(text, BASE_URL), expected)
+
+    def test_fuzz_pages(self):
+        for text in fuzz_pages(FUZZ_PAGES, seed=1):
+            self.assertEqual(self.scanner.scan(text, BASE_URL), legacy_scan(text, BASE_URL),
+                             repr(text))
+
+    def test_whole_corpus_as_one_page(self):
+        text = '\n'.join(text for _, text in corpus())
+        self.assertEqual(self.scanner.scan(text, BASE_URL), legacy_scan(text, BASE_URL))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import http.cookiejar
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ydlpool import YoutubeDLPool  # noqa: E402
+
+OPTIONS = {'quiet': True, 'no_warnings': True}
+
+
+def make_cookie(name, domain='.example.com'):
+    return http.cookiejar.Cookie(
+        0, name, 'value', None, False, domain, True, True, '/', True, False, 2 ** 31, False,
+        None, None, {})
+
+
+def cookie_names(ydl):
+    return sorted(cookie.name for cookie in ydl.cookiejar)
+
+
+class PoolTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = YoutubeDLPool()
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_same_options_reuse_the_instance(self):
+        options = dict(OPTIONS)
+        ydl = self.pool.checkout(options)
+        self.pool.checkin(ydl)
+        self.assertEqual(options, OPTIONS)
+        self.assertIs(self.pool.checkout(options), ydl)
+
+    def test_cookies_do_not_reach_the_next_checkout(self):
+        ydl = self.pool.checkout(OPTIONS)
+        ydl.cookiejar.set_cookie(make_cookie('session'))
+        self.pool.checkin(ydl)
+
+        again = self.pool.checkout(OPTIONS)
+        self.assertIs(again, ydl)
+        self.assertEqual(cookie_names(again), [])
+        self.pool.checkin(again)
+
+    def test_cookie_file_is_saved_and_reloaded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cookiefile = os.path.join(directory, 'cookies.txt')
+            with open(cookiefile, 'w') as f:
+                f.write('# Netscape HTTP Cookie File\n'
+                        '.example.com\tTRUE\t/\tTRUE\t2147483647\tlogin\tyes\n')
+            options = dict(OPTIONS, cookiefile=cookiefile)
+
+            ydl = self.pool.checkout(options)
+            self.assertEqual(cookie_names(ydl), ['login'])
+            ydl.cookiejar.set_cookie(make_cookie('session'))
+            self.pool.checkin(ydl)
+            with open(cookiefile) as f:
+                self.assertIn('session', f.read())
+
+            # Cookies set outside the file since the checkin are gone
+            ydl.cookiejar.set_cookie(make_cookie('stray'))
+            again = self.pool.checkout(options)
+            self.assertIs(again, ydl)
+            self.assertEqual(cookie_names(again), ['login', 'session'])
+            self.pool.checkin(again)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from canonical import video_key
+
+DEFAULT_CACHE_DIR = Path.home() / '.vloader' / 'thumbnails'
+# Bytes of thumbnail files kept on disk, the least recently used go first
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+# Bytes of thumbnails also kept in memory
+DEFAULT_MEMORY_BYTES = 8 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS thumbnails (
+    video_key TEXT PRIMARY KEY,
+    title TEXT,
+    digest TEXT,
+    size INTEGER NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_thumbnails_used ON thumbnails (used_at);
+CREATE INDEX IF NOT EXISTS idx_thumbnails_digest ON thumbnails (digest);
+"""
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+class ThumbnailCache:
+    """Titles and list-sized thumbnails of videos, kept across restarts.
+
+    Images are stored once per content hash under path, the index maps
+    each video (by video_key, so every URL of a video shares the entry)
+    to its title and image. Videos without a thumbnail are stored with
+    no image. Recently used images are also kept in memory. When the
+    files grow beyond max_bytes the least recently used videos go first.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES,
+                 memory_bytes=DEFAULT_MEMORY_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._conn = sqlite3.connect(str(self.path / 'index.db'), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def get(self, url):
+        """Return (title, image bytes or None) for url's video, or None"""
+        key = video_key(url)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            else:
+                row = self._conn.execute('SELECT title, digest FROM thumbnails WHERE video_key = ?',
+                                         (key,)).fetchone()
+                if row is None:
+                    return None
+                title, digest = row
+                data = None
+                if digest:
+                    try:
+                        data = self._file(digest).read_bytes()
+                    except OSError:
+                        # The file is gone, so is the entry
+                        self._conn.execute('DELETE FROM thumbnails WHERE video_key = ?', (key,))
+                        self._conn.commit()
+                        return None
+                entry = (title, data)
+                self._remember(key, entry)
+            self._conn.execute('UPDATE thumbnails SET used_at = ? WHERE video_key = ?',
+                               (time.time(), key))
+            self._conn.commit()
+        return entry
+
+    def store(self, url, title, data=None):
+        """Keep the title and encoded thumbnail of url's video"""
+        key = video_key(url)
+        digest = hashlib.sha256(data).hexdigest() if data else None
+        with self._lock:
+            if digest:
+                path = self._file(digest)
+                if not path.exists():
+                    path.parent.mkdir(exist_ok=True)
+                    temp = path.with_suffix('.tmp')
+                    temp.write_bytes(data)
+                    os.replace(temp, path)
+            previous = self._conn.execute('SELECT digest FROM thumbnails WHERE video_key = ?',
+                                          (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO thumbnails (video_key, title, digest, size, used_at) '
+                'VALUES (?, ?, ?, ?, ?)', (key, title, digest, len(data or b''), time.time()))
+            if previous and previous[0] != digest:
+                self._drop_unused(previous[0])
+            self._evict()
+            self._conn.commit()
+            self._remember(key, (title, data))
+
+    def _file(self, digest):
+        return self.path / digest[:2] / f'{digest}.jpg'
+
+    def _remember(self, key, entry):
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key)[1] or b'')
+        self._memory[key] = entry
+        self._memory_size += len(entry[1] or b'')
+        while self._memory_size > self.memory_bytes and len(self._memory) > 1:
+            self._memory_size -= len(self._memory.popitem(last=False)[1][1] or b'')
+
+    def _drop_unused(self, digest):
+        """Delete an image file no video refers to any more"""
+        if not digest:
+            return
+        used = self._conn.execute('SELECT 1 FROM thumbnails WHERE digest = ? LIMIT 1',
+                                  (digest,)).fetchone()
+        if used is None:
+            try:
+                self._file(digest).unlink()
+            except OSError:
+                pass
+
+    def _evict(self):
+        # Images shared by several videos are counted once
+        total = self._conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM thumbnails '
+            'WHERE digest IS NOT NULL GROUP BY digest)').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute('SELECT video_key, digest, size FROM thumbnails ORDER BY used_at')
+        for key, digest, size in rows.fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute('DELETE FROM thumbnails WHERE video_key = ?', (key,))
+            if key in self._memory:
+                self._memory_size -= len(self._memory.pop(key)[1] or b'')
+            if digest and self._conn.execute('SELECT 1 FROM thumbnails WHERE digest = ? LIMIT 1',
+                                             (digest,)).fetchone() is None:
+                self._drop_unused(digest)
+                total -= size
+
+    def clear(self):
+        with self._lock:
+            digests = [row[0] for row in
+                       self._conn.execute('SELECT DISTINCT digest FROM thumbnails WHERE digest IS NOT NULL')]
+            self._conn.execute('DELETE FROM thumbnails')
+            self._conn.commit()
+            for digest in digests:
+                self._drop_unused(digest)
+            self._memory.clear()
+            self._memory_size = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def configure_thumbnail_cache(enabled, max_bytes=DEFAULT_MAX_BYTES):
+    """Open, update or close the shared thumbnail cache"""
+    global _cache
+    with _cache_lock:
+        if not enabled:
+            if _cache is not None:
+                _cache.close()
+                _cache = None
+            return
+        if _cache is None:
+            try:
+                _cache = ThumbnailCache(max_bytes=max_bytes)
+            except Exception as e:
+                print(f"Thumbnail cache unavailable: {str(e)}")
+                return
+        _cache.max_bytes = max_bytes
+
+
+def get_thumbnail_cache():
+    """The shared thumbnail cache, or None when it is disabled"""
+    return _cache
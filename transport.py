@@ -0,0 +1,67 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': '*/*',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+# Number of hosts with a cached connection pool
+POOL_CONNECTIONS = 20
+# Kept-alive connections per host, enough for several segmented downloads
+POOL_MAXSIZE = 32
+# (connect, read) timeout used when a caller does not pass one
+DEFAULT_TIMEOUT = (15, 60)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def create_retry():
+    """Retry policy shared by every HTTP request the app makes"""
+    return Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["HEAD", "GET", "OPTIONS"],
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies DEFAULT_TIMEOUT to requests without a timeout"""
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = DEFAULT_TIMEOUT
+        return super().send(request, **kwargs)
+
+
+def create_session():
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=create_retry()
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide session so connections are reused across jobs"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
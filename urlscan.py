@@ -0,0 +1,196 @@
+import re
+from urllib.parse import urljoin
+
+# Characters that end a URL in page source
+URL_CHARS = r'[^\s<>"\']'
+
+# File extensions treated as video
+VIDEO_EXTENSIONS = ('.mp4', '.webm', '.ogg', '.m3u8')
+
+# Characters stripped from both ends of every match
+STRIP_CHARS = "'\"\\;,"
+
+# Non-ASCII characters that IGNORECASE matches against ASCII letters, so the
+# hint check never skips text the regex would have matched
+_CASE_FIXES = str.maketrans({'\u0130': 'i', '\u0131': 'i', '\u017f': 's', '\u212a': 'k'})
+
+
+class ScanRule:
+    """One entry of the pattern registry.
+
+    pattern is matched against each URL candidate. hints are lowercase
+    substrings of which at least one must occur in the candidate for the
+    pattern to be able to match, so most rules are skipped without running
+    their regex. quoted rules only match a candidate that is a whole quoted
+    string, they are case sensitive and their match is used as it is.
+    """
+
+    def __init__(self, name, kind, pattern, hints, quoted=False):
+        self.name = name
+        self.kind = kind
+        self.pattern = pattern
+        self.hints = hints
+        self.quoted = quoted
+        self.regex = re.compile(pattern, 0 if quoted else re.IGNORECASE)
+
+
+# Pattern registry. Every pattern starts with https?:// and only matches URL
+# characters, so each match lies inside a single candidate found by
+# CANDIDATE_PATTERN and the rules can be run on the candidates alone.
+RULES = [
+    # Standard video files
+    ScanRule('video-file', 'extension',
+             rf'https?://{URL_CHARS}+?\.(?:mp4|webm|ogg|m3u8)(?:{URL_CHARS}*)?',
+             VIDEO_EXTENSIONS),
+
+    # Video platforms
+    ScanRule('youtube', 'platform',
+             rf'https?://(?:www\.)?youtube\.com/watch\?v={URL_CHARS}+', ('youtube.com/watch?v=',)),
+    ScanRule('youtube-short', 'platform',
+             rf'https?://(?:www\.)?youtu\.be/{URL_CHARS}+', ('youtu.be/',)),
+    ScanRule('vimeo', 'platform',
+             rf'https?://(?:www\.)?vimeo\.com/{URL_CHARS}+', ('vimeo.com/',)),
+    ScanRule('dailymotion', 'platform',
+             rf'https?://(?:www\.)?dailymotion\.com/video/{URL_CHARS}+', ('dailymotion.com/video/',)),
+
+    # Video IDs and embeds
+    ScanRule('embed-path', 'platform',
+             rf'https?://{URL_CHARS}+?/(?:videos?|media|embed)/[a-zA-Z0-9-_]+',
+             ('/video', '/media/', '/embed/')),
+
+    # CDN patterns
+    ScanRule('cdn', 'cdn',
+             rf'https?://{URL_CHARS}+?\.cdn\.net/{URL_CHARS}+?\.(?:mp4|webm|ogg|m3u8)', ('.cdn.net/',)),
+
+    # Storage patterns
+    ScanRule('storage', 'storage',
+             rf'https?://{URL_CHARS}+?/storage\d+/{URL_CHARS}+?\.(?:mp4|webm|ogg|m3u8)', ('/storage',)),
+
+    # Additional patterns from JS code
+    ScanRule('download-path', 'storage',
+             rf'https?://{URL_CHARS}+?/download/{URL_CHARS}+?\.(?:mp4|webm|ogg)', ('/download/',)),
+    ScanRule('file-path', 'storage',
+             rf'https?://{URL_CHARS}+?/files?/{URL_CHARS}+?\.(?:mp4|webm|ogg)', ('/file',)),
+
+    # Quoted video URLs in JSON data and scripts
+    ScanRule('quoted-video-file', 'extension',
+             rf'https?://{URL_CHARS}+?\.(?:mp4|webm|ogg|m3u8){URL_CHARS}*',
+             VIDEO_EXTENSIONS, quoted=True),
+]
+
+# Delimiters a stream of page source is cut at, a subset of the characters
+# that end a URL
+CUT_DELIMITERS = ('\n', ' ', '>', '<', '"', "'")
+
+# From the first http:// or https:// in a run of URL characters to its end
+CANDIDATE_PATTERN = re.compile(rf'https?://{URL_CHARS}*', re.IGNORECASE)
+
+
+class UrlScanner:
+    """Find video URLs in page source in a single pass.
+
+    The text is swept once for URL candidates, then each candidate is
+    classified by the rules whose hints it contains. The result is the same
+    set the rules give when each one is run with re.findall over the whole
+    text, without scanning the page once per pattern.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = RULES if rules is None else rules
+        # Most candidates (images, links) contain no hint at all and are
+        # dropped with a single search
+        hints = sorted({hint for rule in self.rules for hint in rule.hints})
+        self.hint_regex = re.compile('|'.join(re.escape(hint) for hint in hints))
+
+    def matches(self, text):
+        """Return (rule, url) for every rule match in text, URLs as found"""
+        return self.scan_range(text, len(text))[0]
+
+    def scan_range(self, text, endpos, quote_used=-1):
+        """Match the candidates in text[:endpos], text[endpos - 1] must be a delimiter.
+
+        quote_used is the index of a quote already used up by a quoted
+        match. Returns the matches and the quote used up by the last one.
+        """
+        found = []
+        for match in CANDIDATE_PATTERN.finditer(text, 0, endpos):
+            start, end = match.span()
+            candidate = match.group()
+            folded = candidate.lower() if candidate.isascii() else candidate.translate(_CASE_FIXES).lower()
+            if not self.hint_regex.search(folded):
+                continue
+            for rule in self.rules:
+                if not any(hint in folded for hint in rule.hints):
+                    continue
+                if rule.quoted:
+                    # A quoted match uses up its closing quote, which then
+                    # can't open the next quoted match
+                    if (start > 0 and start - 1 != quote_used and text[start - 1] in '"\''
+                            and end < len(text) and text[end] in '"\''
+                            and rule.regex.fullmatch(candidate)):
+                        quote_used = end
+                        found.append((rule, candidate))
+                else:
+                    found.extend((rule, url) for url in rule.regex.findall(candidate))
+        return found, quote_used
+
+    def scan(self, text, base_url):
+        """Return the set of video URLs in text, relative ones resolved against base_url"""
+        return resolve_matches(self.matches(text), base_url)
+
+
+def resolve_matches(matches, base_url):
+    video_urls = set()
+    for rule, url in matches:
+        if rule.quoted:
+            video_urls.add(url)
+            continue
+        # Clean up the URL
+        cleaned_url = url.strip(STRIP_CHARS)
+        if cleaned_url:
+            video_urls.add(urljoin(base_url, cleaned_url))
+    return video_urls
+
+
+class StreamScan:
+    """Scan page source that arrives in chunks.
+
+    Each chunk is scanned up to its last delimiter and the rest is kept for
+    the next one, so a URL split across chunks is still found whole. The
+    URLs are the same as UrlScanner.scan gives for the whole text, while
+    only one chunk is held in memory.
+    """
+
+    def __init__(self, base_url, scanner=None):
+        self.base_url = base_url
+        self.scanner = scanner or default_scanner
+        self.found = set()
+        self._pending = ''
+        self._quote_used = -1
+
+    def feed(self, text):
+        """Scan the next chunk, return the URLs not found before"""
+        text = self._pending + text
+        cut = max(text.rfind(delimiter) for delimiter in CUT_DELIMITERS)
+        if cut < 0:
+            self._pending = text
+            return []
+        matches, quote_used = self.scanner.scan_range(text, cut + 1, self._quote_used)
+        # The delimiter is kept, a quoted match may start right after it
+        self._pending = text[cut:]
+        self._quote_used = quote_used - cut if quote_used >= cut else -1
+        return self._new_urls(matches)
+
+    def close(self):
+        """Scan what is left at the end of the page"""
+        text, self._pending = self._pending, ''
+        matches, _ = self.scanner.scan_range(text, len(text), self._quote_used)
+        return self._new_urls(matches)
+
+    def _new_urls(self, matches):
+        urls = resolve_matches(matches, self.base_url) - self.found
+        self.found.update(urls)
+        return sorted(urls)
+
+
+default_scanner = UrlScanner()
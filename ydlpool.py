@@ -0,0 +1,158 @@
+import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import yt_dlp
+from yt_dlp.cookies import load_cookies
+
+# Idle instances kept per option set
+DEFAULT_IDLE_PER_KEY = 4
+# Option sets kept, the least recently used one is closed first
+DEFAULT_MAX_KEYS = 8
+
+# Options that are per call, applied to an instance when it is checked out
+HOOK_OPTIONS = ('progress_hooks', 'postprocessor_hooks', 'post_hooks')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def options_key(options):
+    """Key of the options that shape a YoutubeDL, hooks and callables left out"""
+    return json.dumps({key: value for key, value in options.items()
+                       if key not in HOOK_OPTIONS and not callable(value)},
+                      sort_keys=True, default=repr)
+
+
+class YoutubeDLPool:
+    """Reuse YoutubeDL instances across URLs.
+
+    Building a YoutubeDL sets up the extractor registry, the cookie jar
+    and the HTTP handlers, and every extractor is initialised again on
+    first use. Instances are kept per option set and handed to one
+    caller at a time. On checkout the per-run counters and the cookie jar
+    are reset and the caller's hooks and callable options are installed.
+    Cookies are saved to the cookie file on checkin, as closing would.
+    """
+
+    def __init__(self, idle_per_key=DEFAULT_IDLE_PER_KEY, max_keys=DEFAULT_MAX_KEYS):
+        self.idle_per_key = idle_per_key
+        self.max_keys = max_keys
+        self._idle = OrderedDict()
+        self._lock = threading.Lock()
+
+    def checkout(self, options):
+        key = options_key(options)
+        with self._lock:
+            idle = self._idle.get(key)
+            ydl = idle.pop() if idle else None
+            if idle is not None:
+                self._idle.move_to_end(key)
+        if ydl is None:
+            # YoutubeDL fills in defaults in the dict it is given, which would change its key
+            ydl = yt_dlp.YoutubeDL(dict(options))
+        else:
+            self.reset(ydl, options)
+        ydl._pool_key = key
+        return ydl
+
+    def checkin(self, ydl):
+        try:
+            ydl.save_cookies()
+        except Exception as e:
+            print(f"Saving yt-dlp cookies failed: {str(e)}")
+        closed = []
+        with self._lock:
+            idle = self._idle.setdefault(ydl._pool_key, [])
+            self._idle.move_to_end(ydl._pool_key)
+            if len(idle) < self.idle_per_key:
+                idle.append(ydl)
+            else:
+                closed.append(ydl)
+            while len(self._idle) > self.max_keys:
+                closed.extend(self._idle.popitem(last=False)[1])
+        for instance in closed:
+            self.discard(instance)
+
+    @staticmethod
+    def reset(ydl, options):
+        """Make a used instance behave like a new one built from options"""
+        ydl._download_retcode = 0
+        ydl._num_downloads = 0
+        ydl._num_videos = 0
+        ydl._playlist_level = 0
+        ydl._playlist_urls = set()
+        ydl._progress_hooks = []
+        ydl._postprocessor_hooks = []
+        ydl._post_hooks = []
+        for key, value in options.items():
+            if key in HOOK_OPTIONS or callable(value):
+                ydl.params[key] = value
+        for hook in options.get('progress_hooks', []):
+            ydl.add_progress_hook(hook)
+        for hook in options.get('postprocessor_hooks', []):
+            ydl.add_postprocessor_hook(hook)
+        for hook in options.get('post_hooks', []):
+            ydl.add_post_hook(hook)
+        YoutubeDLPool.reset_cookies(ydl)
+
+    @staticmethod
+    def reset_cookies(ydl):
+        """Start again from the configured cookies, so cookies a site set
+        during one run never reach the next"""
+        # Loaded on first use and shared with the request handlers, so refilled in place
+        jar = ydl.__dict__.get('cookiejar')
+        if jar is None:
+            return
+        jar.clear()
+        cookiefile = ydl.params.get('cookiefile')
+        browser = ydl.params.get('cookiesfrombrowser')
+        if cookiefile or browser:
+            for cookie in load_cookies(cookiefile, browser, ydl):
+                jar.set_cookie(cookie)
+
+    @staticmethod
+    def discard(ydl):
+        try:
+            ydl.close()
+        except Exception as e:
+            print(f"Closing yt-dlp instance failed: {str(e)}")
+
+    def close(self):
+        with self._lock:
+            instances = [ydl for idle in self._idle.values() for ydl in idle]
+            self._idle.clear()
+        for ydl in instances:
+            self.discard(ydl)
+
+
+def get_ydl_pool():
+    """The pool shared by every yt-dlp call in this process"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = YoutubeDLPool()
+    return _pool
+
+
+@contextmanager
+def pooled_ydl(options):
+    """A YoutubeDL for options, returned to the pool afterwards.
+
+    Use it like yt_dlp.YoutubeDL(options). An instance that fails with
+    anything but a yt-dlp error is not reused.
+    """
+    pool = get_ydl_pool()
+    ydl = pool.checkout(options)
+    try:
+        yield ydl
+    except yt_dlp.utils.YoutubeDLError:
+        pool.checkin(ydl)
+        raise
+    except BaseException:
+        pool.discard(ydl)
+        raise
+    else:
+        pool.checkin(ydl)